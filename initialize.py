@@ -21,97 +21,344 @@
 # LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module can be used to adapt the template to your project needs.
 
-"""This module can be used to adapt the template to your project needs."""
+Without arguments, the template is adapted in place and the project name is
+read from the user. Given one or more specs "<name>[:flask]", every project is
+created as a copy of the template within the output directory instead:
 
+    python initialize.py --output ../services billing:flask reporting
+    python initialize.py --output ../services @projects.txt
+
+All changes to a project are computed in memory first, with one pass over each
+file. They are written to temporary files, which are renamed into place once all
+of them are written. The replaced and removed files are kept until all changes
+are applied, so a failure rolls the changes back and leaves the files untouched.
+"""
+
+import argparse
 import os
+import re
+import shutil
+import tempfile
+
+TEMPLATE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+TEMPLATE_IGNORES = (".git", "__pycache__", ".pytest_cache", "initialize.py", "initialize_test.py",
+                    "requests.jsonl", "REVIEW_DIFF.patch")
+
+# the tests write their results there, only these files belong to the template
+RESULTS_DIRECTORY = "tests/results"
+RESULTS_FILES = (".gitignore", "style.css")
+
+MAIN = "package/__main__.py"
+
+# path, [(original, replacement)], replacements are formatted with the project name
+SUBSTITUTIONS = (
+    ("tests/__init__.py",         [("package", "%(project)s")]),
+    ("tests/pylint_test.py",      [('PROJECT_NAME="package"', 'PROJECT_NAME="%(project)s"')]),
+    ("tests/runner.py",           [('PROJECT_NAME="package"', 'PROJECT_NAME="%(project)s"')]),
+    ("nose.cfg",                  [("cover-package=package,tests",
+                                    "cover-package=%(project)s,tests")]),
+    (".pylintrc",                 [('sys.path.insert(0, "./package")',
+                                    'sys.path.insert(0, "./%(project)s")')]),
+    ("tests/builder_test.py",     [("from package import", "from %(project)s import")]),
+    ("tests/service_test.py",     [("from package import", "from %(project)s import")]),
+    ("tests/version_test.py",     [("from package import", "from %(project)s import")]),
+    ("tests/prefork_test.py",     [("from package.prefork import",
+                                    "from %(project)s.prefork import")]),
+    ("tests/asyncserver_test.py", [("from package import", "from %(project)s import")]),
+    ("tests/benchmark.py",        [("package", "%(project)s")]),
+    ("tests/counters_test.py",    [("from package.counters import",
+                                    "from %(project)s.counters import")]),
+    ("tests/metrics_test.py",     [("from package", "from %(project)s")]),
+    ("tests/cache_test.py",       [("from package import", "from %(project)s import")]),
+    ("tests/config_test.py",      [("from package.config import",
+                                    "from %(project)s.config import")]),
+    ("tests/server_test.py",      [("from package.server import",
+                                    "from %(project)s.server import")]),
+    ("tests/assets_test.py",      [("from package import", "from %(project)s import")]),
+    ("tests/profiler_test.py",    [("from package import", "from %(project)s import")]),
+    ("tests/singleflight_test.py", [("from package import", "from %(project)s import")]),
+    ("tests/serialization_test.py", [("from package import", "from %(project)s import")]),
+    ("tests/streaming_test.py",   [("from package.streaming import",
+                                    "from %(project)s.streaming import")]),
+    ("tests/devserver_test.py",   [("from package.", "from %(project)s.")]),
+    ("tests/listeners_test.py",   [("from package.", "from %(project)s.")]),
+    ("tests/admission_test.py",   [("from package", "from %(project)s")]),
+    ("tests/warmup_test.py",      [("from package", "from %(project)s")]),
+    (MAIN,                        [("package", "%(project)s")])
+)
+
+DUMMY_FILES = ("package/dummy.py", "tests/dummy_test.py")
+
+# tests of the initialization, which are useless once the template is initialized
+INITIALIZE_FILES = ("tests/initialize_test.py",)
+
+FLASK_SERVICE_FILES = (
+    "package/service.py",     "tests/service_test.py",
+    "package/builder.py",     "tests/builder_test.py",
+    "package/version.py",     "tests/version_test.py",
+    "package/prefork.py",     "tests/prefork_test.py",
+    "package/asyncserver.py", "tests/asyncserver_test.py",
+    "tests/benchmark.py",     "tests/benchmark_test.py", "tests/benchmark_baseline.json",
+    "package/metrics.py",     "tests/metrics_test.py",
+    "package/cache.py",       "tests/cache_test.py",
+    "package/config.py",      "tests/config_test.py",
+    "package/server.py",      "tests/server_test.py",
+    "package/assets.py",      "tests/assets_test.py",
+    "package/profiler.py",    "tests/profiler_test.py",
+    "package/singleflight.py", "tests/singleflight_test.py",
+    "package/serialization.py", "tests/serialization_test.py",
+    "package/streaming.py",   "tests/streaming_test.py",
+    "package/devserver.py",   "tests/devserver_test.py",
+    "package/listeners.py",   "tests/listeners_test.py",
+    "package/admission.py",   "tests/admission_test.py",
+    "package/warmup.py",      "tests/warmup_test.py"
+)
+
+MICROSERVICE_MARKERS = (
+    ("#### START MICROSERVICE CODE",              "#### END MICROSERVICE CODE"),
+    ("#### START MICROSERVICE INSTANCE CREATION", "#### END MICROSERVICE INSTANCE CREATION")
+)
+
+class Transaction(object):
+    """Collects changes to the files of a directory and applies them at once."""
+
+    def __init__(self, root):
+        """Initiates the Transaction.
+
+        Args:
+            root (str): Directory all paths are relative to.
+        """
+        super(Transaction, self).__init__()
+
+        self.root    = root
+        self.files   = {}
+        self.removed = set()
+        self.renames = []
+
+    def read(self, path):
+        """Returns the content of a file, including the changes made so far.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            str: Returns the content of the file.
+        """
+        if path not in self.files:
+            with open(os.path.join(self.root, path), "r") as infile:
+                self.files[path] = infile.read()
+
+        return self.files[path]
+
+    def write(self, path, content):
+        """Replaces the content of a file.
+
+        Args:
+            path (str):    Path of the file.
+            content (str): New content of the file.
+        """
+        self.files[path] = content
+
+    def remove(self, path):
+        """Removes a file.
+
+        Args:
+            path (str): Path of the file.
+        """
+        self.files.pop(path, None)
+        self.removed.add(path)
+
+    def rename(self, source, destination):
+        """Renames a file or directory, after all other changes are applied.
+
+        Args:
+            source (str):      Current path.
+            destination (str): New path.
+        """
+        self.renames.append((source, destination))
+
+    def commit(self):
+        """Applies all changes or, if one of them fails, none.
+
+        The new contents are written to temporary files next to their targets,
+        which replace the targets only once all of them are written. Replaced and
+        removed files are moved to a backup directory first. Every rename is
+        logged, so a failure reverts them in reverse order.
+        """
+        temporaries = {}
+        backup = tempfile.mkdtemp(prefix=".initialize.", dir=self.root)
+        renamed = []
+
+        def move(source, destination):
+            """Renames a file and logs the rename."""
+            os.rename(source, destination)
+            renamed.append((source, destination))
+
+        try:
+            for path, content in sorted(self.files.items()):
+                target = os.path.join(self.root, path)
+                handle, temporary = tempfile.mkstemp(
+                    prefix=".%s." % os.path.basename(target), dir=os.path.dirname(target))
+                temporaries[target] = temporary
+
+                with os.fdopen(handle, "w") as outfile:
+                    outfile.write(content)
+                shutil.copymode(target, temporary)
+
+            for index, path in enumerate(sorted(set(self.files) | self.removed)):
+                target = os.path.join(self.root, path)
+                move(target, os.path.join(backup, str(index)))
+
+                if target in temporaries:
+                    move(temporaries[target], target)
+
+            for source, destination in self.renames:
+                move(os.path.join(self.root, source), os.path.join(self.root, destination))
+        except BaseException:
+            for source, destination in reversed(renamed):
+                os.rename(destination, source)
+            for temporary in temporaries.values():
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+            shutil.rmtree(backup)
+            raise
+
+        shutil.rmtree(backup)
+
+def substitute(content, substitutions, project):
+    """Applies all substitutions of a file in a single pass.
+
+    Args:
+        content (str):        Content of the file.
+        substitutions (list): List of (original, replacement) tuples.
+        project (str):        Name of the project.
+
+    Returns:
+        str: Returns the substituted content.
+    """
+    replacements = dict(
+        (original, replacement % {"project": project})
+        for original, replacement in substitutions)
+    pattern = re.compile("|".join(
+        re.escape(original) for original in sorted(replacements, key=len, reverse=True)))
+
+    return pattern.sub(lambda match: replacements[match.group(0)], content)
 
-def delete_dummy_files():
-    """Delete dummy test files."""
-    os.remove("package/dummy.py")
-    os.remove("tests/dummy_test.py")
-
-def rename_project(project):
-    """Rename the package directory."""
-    os.rename("package", project)
-
-def update_test_config(project):
-    """Update the test configuration."""
-    original = open("tests/__init__.py", "r").read()
-    open("tests/__init__.py", "w").write(
-        original.replace("package", project))
-
-def update_linter_test(project):
-    """Update the linter test."""
-    original = open("tests/pylint_test.py", "r").read()
-    open("tests/pylint_test.py", "w").write(
-        original.replace('PROJECT_NAME="package"', 'PROJECT_NAME="%s"' % project))
-
-def update_service_test(project):
-    """Update the tests for the service submodule."""
-    original = open("tests/service_test.py", "r").read()
-    open("tests/service_test.py", "w").write(
-        original.replace("from package import", "from %s import" % project))
-
-def update_builder_test(project):
-    """Update the tests for the builder submodule."""
-    original = open("tests/builder_test.py", "r").read()
-    open("tests/builder_test.py", "w").write(
-        original.replace("from package import", "from %s import" % project))
-
-def update_noseconfig(project):
-    """Update the test configuration to match with the projects package name."""
-    original = open("nose.cfg", "r").read()
-    open("nose.cfg", "w").write(
-        original.replace("cover-package=package,tests", "cover-package=%s,tests" % project))
-
-def update_pylintrc(project):
-    """Update the init-hook for pylint."""
-    original = open("nose.cfg", "r").read()
-    open("nose.cfg", "w").write(original.replace(
-        """init-hook='import sys, os; sys.path.insert[0]("."); sys.path.insert[0]("./package");'""",
-        """init-hook='import sys, os; sys.path.insert[0]("."); sys.path.insert[0]("./%s");'"""
-        % project))
-
-def update_main(project, is_flask_service):
-    """Remove the not required code from __main__.py"""
-    original = open("%s/__main__.py" % project, "r").read()
-
-    original = original.replace("package", project)
-
-    start_ms       = "#### START MICROSERVICE CODE"
-    end_ms         = "#### END MICROSERVICE CODE"
-    start_creation = "#### START MICROSERVICE INSTANCE CREATION"
-    end_creation   = "#### END MICROSERVICE INSTANCE CREATION"
+def strip_microservice_code(content, is_flask_service):
+    """Removes the markers of the microservice code in __main__.py.
+
+    Trailing blank lines left by the markers are removed as well.
+
+    Args:
+        content (str):           Content of __main__.py.
+        is_flask_service (bool): Whether the code between the markers is kept.
+
+    Returns:
+        str: Returns the content without the markers.
+    """
+    for start, end in MICROSERVICE_MARKERS:
+        if is_flask_service:
+            content = content.replace(start, "").replace(end, "")
+        else:
+            content = content[:content.find(start)] + content[content.find(end) + len(end):]
+
+    return content.rstrip() + "\n"
+
+def initialize_project(root, project, is_flask_service):
+    """Transforms the template in root into the given project.
+
+    Args:
+        root (str):              Directory containing the template.
+        project (str):           Name of the project.
+        is_flask_service (bool): Whether the project contains a Flask service.
+    """
+    transaction = Transaction(root)
+
+    for path in DUMMY_FILES + INITIALIZE_FILES:
+        if os.path.exists(os.path.join(root, path)):
+            transaction.remove(path)
 
     if not is_flask_service:
-        current_index = 0
+        for path in FLASK_SERVICE_FILES:
+            transaction.remove(path)
 
-        new = original[current_index : original.find(start_ms)]
-        current_index = original.find(end_ms) + len(end_ms)
+    for path, substitutions in SUBSTITUTIONS:
+        if path in transaction.removed:
+            continue
 
-        new += original[current_index : original.find(start_creation)]
-        current_index = original.find(end_creation) + len(end_creation)
+        content = substitute(transaction.read(path), substitutions, project)
+        if path == MAIN:
+            content = strip_microservice_code(content, is_flask_service)
+        transaction.write(path, content)
 
-        new += original[current_index:]
-        original = new
-    else:
-        original = original.replace(
-            'make_app("package")',
-            'make_app("%s")' % project)
+    if project != "package":
+        transaction.rename("package", project)
 
-    original = original.replace(start_ms, "").replace(end_ms, "")
-    original = original.replace(start_creation, "").replace(end_creation, "")
+    transaction.commit()
 
-    open("%s/__main__.py" % project, "w").write(original)
+def create_project(output, project, is_flask_service):
+    """Creates a project as an initialized copy of the template.
 
-def delete_flask_service_files(project):
-    """Delete flask related files."""
-    os.remove("%s/service.py" % project)
-    os.remove("tests/service_test.py")
+    Args:
+        output (str):            Directory the project is created in.
+        project (str):           Name of the project.
+        is_flask_service (bool): Whether the project contains a Flask service.
+
+    Returns:
+        str: Returns the directory of the project.
+    """
+    directory = os.path.join(output, project)
+    shutil.copytree(TEMPLATE_DIRECTORY, directory, ignore=ignore_artifacts)
+
+    try:
+        initialize_project(directory, project, is_flask_service)
+    except BaseException:
+        shutil.rmtree(directory)
+        raise
+
+    return directory
+
+def ignore_artifacts(directory, names):
+    """Returns the names, which are not copied from a directory of the template.
+
+    Args:
+        directory (str): Directory of the template being copied.
+        names (list):    Names of the files and directories within it.
+
+    Returns:
+        set: Returns the ignored names.
+    """
+    ignored = set(shutil.ignore_patterns(*TEMPLATE_IGNORES)(directory, names))
 
-    os.remove("%s/builder.py" % project)
-    os.remove("tests/builder_test.py")
+    relative = os.path.relpath(directory, TEMPLATE_DIRECTORY).replace(os.sep, "/")
+    if relative == RESULTS_DIRECTORY or relative.startswith(RESULTS_DIRECTORY + "/"):
+        ignored.update(name for name in names if name not in RESULTS_FILES
+                       and not os.path.isdir(os.path.join(directory, name)))
+
+    return ignored
+
+def parse_spec(spec):
+    """Parses a project spec "<name>[:flask]".
+
+    Args:
+        spec (str): The project spec.
+
+    Returns:
+        tuple: Returns a tuple, containing (project_name, is_flask_service)
+
+    Raises:
+        argparse.ArgumentTypeError: Raised for invalid specs.
+    """
+    project, _, kind = spec.strip().partition(":")
+
+    if not project.isidentifier() or kind not in ("", "flask"):
+        raise argparse.ArgumentTypeError(
+            "%r is no valid project spec, use <name>[:flask]" % spec)
+
+    return project, kind == "flask"
 
 def get_user_config():
     """Reads the project configuration from the user.
@@ -130,25 +377,41 @@ def get_user_config():
 
     return project, flask_service
 
-def main():
+def parse_arguments(arguments=None):
+    """Parses the command line arguments.
+
+    Args:
+        arguments (list): Arguments, defaults to sys.argv.
+
+    Returns:
+        argparse.Namespace: Returns the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Adapts the template to your project.", fromfile_prefix_chars="@")
+    parser.add_argument("specs", metavar="SPEC", nargs="*", type=parse_spec,
+                        help="Projects to be created, as <name>[:flask].")
+    parser.add_argument("--output", default=os.path.dirname(TEMPLATE_DIRECTORY),
+                        help="Directory the projects are created in. Default: %(default)s")
+
+    return parser.parse_args(arguments)
+
+def main(arguments=None):
     """Run the initializtion and execute all steps to
     transform the template into a usable project.
+
+    Args:
+        arguments (list): Arguments, defaults to sys.argv.
     """
-    project, is_flask_service = get_user_config()
-
-    delete_dummy_files()
-    rename_project(project)
-    update_test_config(project)
-    update_linter_test(project)
-    update_noseconfig(project)
-    update_pylintrc(project)
-    update_builder_test(project)
-    update_service_test(project)
-    update_main(project, is_flask_service)
+    arguments = parse_arguments(arguments)
 
-    if not is_flask_service:
-        delete_flask_service_files(project)
+    if not arguments.specs:
+        project, is_flask_service = get_user_config()
+        initialize_project(TEMPLATE_DIRECTORY, project, is_flask_service)
+        print("You can now delete initialize.py")
+        return
+
+    for project, is_flask_service in arguments.specs:
+        print("Created %s" % create_project(arguments.output, project, is_flask_service))
 
 if __name__=="__main__":
     main()
-    print("You can now delete initialize.py")
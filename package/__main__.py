@@ -27,47 +27,217 @@ You should give some information about your project here.
 """
 
 #### START MICROSERVICE CODE
+import os
+
 from builder import make_app
 
-def start_development_server(host, port, debug):
-    """Starts the server in development mode."""
+def start_development_server(config, debug=False, **options):
+    """Starts the server in development mode.
+
+    With threads, the requests are handled by a fixed size thread pool. Otherwise
+    Flask's server starts a thread per connection. The reloader is available for
+    the latter only, if it listens on host and port. The application is warmed up
+    before the server starts. SIGTERM stops the server like Ctrl+C, so the socket
+    file of a Unix domain socket is removed.
+
+    Args:
+        config (config.ServerConfig|int): Configuration of the server or the port
+                                          to listen on.
+        debug (bool):                     Whether to enable the debugger.
+        **options:                        Options for the ServerConfig, if only a
+                                          port is given.
+    """
+    import signal
+
+    from config import ServerConfig
+    from listeners import close_listener, open_listener
+    from profiler import install_signal_handler
+
+    if not isinstance(config, ServerConfig):
+        config = ServerConfig(config, **options)
+
     app = make_app("package")
-    app.run(host=host, port=port, debug=debug, threaded=True)
+    app.extensions["admission"].configure(
+        config.max_concurrency, config.queue_timeout, not config.fixed_concurrency)
+    install_signal_handler(app.extensions["profiler"])
+    app.extensions["warmup"].run(app, config.warmup_requests)
 
-def start_production_server(port):
-    """Starts the server in production mode using Tornado."""
-    from tornado.wsgi import WSGIContainer
-    from tornado.httpserver import HTTPServer
-    from tornado.ioloop import IOLoop
+    def interrupt(*_):
+        """Stops the server like Ctrl+C."""
+        raise KeyboardInterrupt()
+
+    signal.signal(signal.SIGTERM, interrupt)
+
+    listener = open_listener(config)
+    try:
+        if not config.threads and listener is None:
+            app.run(host=config.host, port=config.port, debug=debug, threaded=True)
+            return
+
+        server = make_development_server(app, config, listener, debug)
+        print("Serving on %s with %s." % (
+            server.host if server.host.startswith("unix://") else
+            "%s:%d" % (server.host, server.port),
+            "%d threads" % config.threads if config.threads else "a thread per connection"))
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+    finally:
+        close_listener(listener)
+
+def make_development_server(app, config, sock, debug):
+    """Creates the WSGI server of the development mode.
+
+    Args:
+        app (flask.Flask):            Application to be served.
+        config (config.ServerConfig): Configuration of the server.
+        sock (socket.socket):         Listening socket to serve on instead of host
+                                      and port, see listeners.open_listener.
+        debug (bool):                 Whether to enable the debugger.
+
+    Returns:
+        werkzeug.serving.BaseWSGIServer: Returns the server.
+    """
+    from werkzeug.debug import DebuggedApplication
+    from werkzeug.serving import make_server
+    from devserver import PooledWSGIServer
+    from listeners import get_server_address
+
+    host, port, inherited = config.host, config.port, None
+    if sock is not None:
+        (host, port), inherited = get_server_address(sock), sock.fileno()
+
+    app.debug = debug
+    application = DebuggedApplication(app, evalex=True) if debug else app
+
+    if not config.threads:
+        return make_server(host, port, application, threaded=True, fd=inherited)
+
+    server = PooledWSGIServer(host, port, application, threads=config.threads,
+                              queue_size=config.accept_queue, fd=inherited)
+    server.register_metrics(app.extensions["metrics"])
+
+    return server
+
+def start_production_server(config, **options):
+    """Starts the server in production mode using Tornado.
+
+    The application is warmed up before the sockets are opened and the workers
+    are forked, so every worker starts warm. Unless reuse_port is set, all
+    workers share the socket bound before forking. Otherwise every worker binds
+    its own socket using SO_REUSEPORT. A Unix domain socket or an inherited socket
+    is always shared and the socket file is removed on shutdown. A single worker
+    is served without a supervisor.
+
+    Args:
+        config (config.ServerConfig|int): Configuration of the server or the port
+                                          to listen on.
+        **options:                        Options for the ServerConfig, if only a
+                                          port is given.
+    """
+    import multiprocessing
+    from tornado.netutil import bind_sockets
+    from config import ServerConfig
+    from listeners import close_listener, open_listener
+    from prefork import Supervisor
+
+    if not isinstance(config, ServerConfig):
+        config = ServerConfig(config, **options)
 
     app = make_app("package")
+    app.config["USE_X_SENDFILE"] = config.x_sendfile
+    app.extensions["admission"].configure(
+        config.max_concurrency, config.queue_timeout, not config.fixed_concurrency)
+    app.extensions["warmup"].run(app, config.warmup_requests)
+    workers = config.workers or multiprocessing.cpu_count()
+
+    listener = open_listener(config)
+    if listener is not None:
+        listener.setblocking(False)
+
+    def bind(reuse_port=False):
+        """Binds the listening sockets."""
+        if listener is not None:
+            return [listener]
+        return bind_sockets(config.port, address=config.host,
+                            backlog=config.backlog, reuse_port=reuse_port)
+
+    sockets = None if config.reuse_port and listener is None else bind()
+
+    def serve(worker_id):
+        """Serves the application within a worker."""
+        serve_production_worker(app, sockets or bind(reuse_port=True), worker_id, config)
+
+    try:
+        if workers == 1:
+            serve(0)
+        else:
+            Supervisor(serve, workers).run()
+    finally:
+        close_listener(listener)
+
+def serve_production_worker(app, sockets, worker_id, config):
+    """Serves the application on the given sockets until SIGTERM or SIGINT is received.
 
-    http_server = HTTPServer(WSGIContainer(app))
-    http_server.listen(port)
-    IOLoop.instance().start()
+    Args:
+        app (flask.Flask):            Application to be served.
+        sockets (list):               Listening sockets.
+        worker_id (int):              Id of the worker.
+        config (config.ServerConfig): Configuration of the server.
+    """
+    import signal
+    from tornado.ioloop import IOLoop
+    from profiler import install_signal_handler
+    from server import BoundedHTTPServer
+    from streaming import StreamingWSGIContainer
+
+    if config.threads:
+        from asyncserver import make_async_app
+        application = make_async_app(app, config.threads)
+    else:
+        application = StreamingWSGIContainer(app)
+
+    http_server = BoundedHTTPServer(
+        application, max_connections=config.max_connections,
+        **config.get_http_server_options())
+    http_server.add_sockets(sockets)
+    io_loop = IOLoop.current()
+
+    async def shutdown():
+        """Stops accepting connections and closes the open ones, once."""
+        if http_server.stopped:
+            return
+
+        app.extensions["warmup"].ready = False
+        http_server.stop()
+        await http_server.close_all_connections()
+        io_loop.stop()
+
+    # SIGINT reaches the workers too, if Ctrl-C is pressed in a terminal
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        io_loop.asyncio_loop.add_signal_handler(signum, io_loop.add_callback, shutdown)
+    install_signal_handler(app.extensions["profiler"])
+
+    print("Worker %d (pid %d) is serving." % (worker_id, os.getpid()))
+    io_loop.start()
 #### END MICROSERVICE CODE
 
 if __name__=="__main__":
     print("""This code is executed, whenever the script is called directly.""")
 #### START MICROSERVICE INSTANCE CREATION
 
-    import sys
-    import os
-
-    if len(sys.argv) < 2:
-        print("[Usage] package <PORT>")
-        sys.exit()
+    import config as server_config
 
-    HOST  = "0.0.0.0"
-    PORT  = int(sys.argv[1])
+    CONFIG = server_config.ServerConfig.from_arguments()
 
     if not os.path.dirname(os.path.abspath(__file__)).split(os.sep)[-2].endswith("production"):
         # Flask's integrated server
         print ("Starting in DEVELOPMENT mode.")
-        start_development_server(HOST, PORT, True)
+        start_development_server(CONFIG, debug=True)
     else:
         # Tornado Server
         print("Starting in PRODUCTION mode.")
-        start_production_server(PORT)
+        start_production_server(CONFIG)
 
 #### END MICROSERVICE INSTANCE CREATION
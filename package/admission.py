@@ -0,0 +1,395 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module protects the latency of the service by admission control.
+
+Every route has its own concurrency limit. A request beyond the limit waits up
+to the queue timeout for a slot and is rejected with 503 and Retry-After
+otherwise, so an overloaded route sheds its excess load fast instead of letting
+every request queue. Time the request already spent queued in the server, e.g.
+behind a blocking WSGI call on Tornado's IOLoop, counts towards the timeout.
+
+The limit adapts to the observed latency: it shrinks as soon as the recent
+latency of a route grows beyond the tolerance of its long term latency, and it
+grows back, up to the configured limit, while the latency is stable. Health
+routes bypass the admission control.
+"""
+
+import math
+import threading
+import time
+
+from warmup import WARMUP_REQUEST
+
+UNMATCHED = "<unmatched>"
+
+HEALTH_ROUTES = ("/get/version", "/get/metrics", "/get/ready")
+
+# WSGI environ key of the time.monotonic() the server queued the request at
+QUEUED_SINCE = "admission.queued_since"
+
+SHORT_SMOOTHING = 0.25
+LONG_SMOOTHING  = 0.005
+LIMIT_SMOOTHING = 0.2
+
+class Overloaded(Exception):
+    """Raised if a request is not admitted."""
+
+    def __init__(self, rule, retry_after):
+        """Initiates the Overloaded exception.
+
+        Args:
+            rule (str):        Rule of the route.
+            retry_after (int): Seconds the client should wait before retrying.
+        """
+        super(Overloaded, self).__init__("%s is overloaded" % rule)
+
+        self.rule        = rule
+        self.retry_after = retry_after
+
+class LatencyGradient(object):     # pylint: disable=too-few-public-methods
+    """Compares the recent latency of a route to its long term latency."""
+
+    def __init__(self, tolerance=1.5):
+        """Initiates the LatencyGradient.
+
+        Args:
+            tolerance (float): Growth of the recent latency over the long term
+                               latency, before the gradient drops below 1.
+        """
+        super(LatencyGradient, self).__init__()
+
+        self.tolerance = tolerance
+        self.short     = None
+        self.long      = None
+
+    def update(self, latency):
+        """Adds the latency of a finished request.
+
+        Args:
+            latency (float): Seconds the request took.
+
+        Returns:
+            float: Returns the ratio of the tolerated long term latency to the recent
+                latency, bounded to [0.5, 1], or None for the first request.
+        """
+        if self.short is None:
+            self.short = self.long = latency
+            return None
+
+        self.short += (latency - self.short) * SHORT_SMOOTHING
+
+        # the long term latency follows drops at once, but rises slowly, so an
+        # overload does not become the new normal
+        if self.short < self.long:
+            self.long = self.short
+        else:
+            self.long += (latency - self.long) * LONG_SMOOTHING
+
+        return max(0.5, min(1.0, self.tolerance * self.long / max(self.short, 1e-9)))
+
+class Limiter(object):
+    """Limits the concurrent requests of a route, adapting the limit to the latency."""
+
+    def __init__(self, limit, adaptive=True, min_limit=1, tolerance=1.5):
+        """Initiates the Limiter.
+
+        Args:
+            limit (int):      Maximal number of concurrent requests.
+            adaptive (bool):  Whether to adapt the limit to the latency.
+            min_limit (int):  Lower bound of the adaptive limit.
+            tolerance (float): Growth of the recent latency over the long term
+                              latency, before the limit shrinks.
+        """
+        super(Limiter, self).__init__()
+
+        self.max_limit = limit
+        self.min_limit = min(min_limit, limit)
+        self.limit     = float(limit)
+        self.latency   = LatencyGradient(tolerance) if adaptive else None
+        self.in_flight = 0
+        self.counts    = {"waiting": 0, "admitted": 0, "rejected": 0}
+
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout=0.0):
+        """Waits for a free slot.
+
+        Args:
+            timeout (float): Seconds to wait, 0 to fail immediately.
+
+        Returns:
+            bool: Returns True, if the request was admitted.
+        """
+        deadline = time.monotonic() + timeout
+        counts = self.counts
+
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    counts["rejected"] += 1
+                    return False
+
+                counts["waiting"] += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    counts["waiting"] -= 1
+
+            self.in_flight += 1
+            counts["admitted"] += 1
+            return True
+
+    def release(self, latency):
+        """Frees the slot of a finished request.
+
+        Args:
+            latency (float): Seconds the request took.
+        """
+        with self._condition:
+            if self.latency is not None:
+                self.update(latency)
+            self.in_flight -= 1
+
+            free = int(self.limit) - self.in_flight
+            if free > 0 and self.counts["waiting"]:
+                self._condition.notify(free)
+
+    def update(self, latency):
+        """Adapts the limit to the latency of a finished request.
+
+        The limit follows limit * gradient + sqrt(limit), where the gradient is
+        taken from the LatencyGradient. A limit, which is not used by half, does
+        not grow.
+
+        Args:
+            latency (float): Seconds the request took.
+        """
+        gradient = self.latency.update(latency)
+        if gradient is None or (gradient == 1.0 and self.in_flight * 2 < self.limit):
+            return
+
+        target = self.limit * gradient + math.sqrt(self.limit)
+        limit  = self.limit + (target - self.limit) * LIMIT_SMOOTHING
+
+        self.limit = max(self.min_limit, min(self.max_limit, limit))
+
+    def stats(self):
+        """Returns the state of the limiter.
+
+        Returns:
+            dict: Returns the current "limit", the requests "in_flight" and "waiting",
+                and the number of requests "admitted" and "rejected".
+        """
+        with self._condition:
+            stats = dict(self.counts, limit=int(self.limit), in_flight=self.in_flight)
+
+        return stats
+
+class AdmissionControl(object):
+    """Admits the requests of every route through a Limiter of its own."""
+
+    def __init__(self, limit=32, queue_timeout=0.1, adaptive=True, retry_after=1,
+                 bypass=HEALTH_ROUTES):
+        """Initiates the AdmissionControl.
+
+        Args:
+            limit (int):           Concurrent requests per route, 0 for no limit.
+            queue_timeout (float): Seconds a request waits for admission.
+            adaptive (bool):       Whether to adapt the limits to the latency.
+            retry_after (int):     Seconds rejected clients should wait before retrying.
+            bypass (tuple):        Rules of the routes, which are always admitted.
+        """
+        super(AdmissionControl, self).__init__()
+
+        self.retry_after = retry_after
+        self.bypass      = set(bypass)
+        self.defaults    = None
+        self.routes      = {}
+        self.limiters    = {}
+
+        self._lock = threading.Lock()
+        self.configure(limit, queue_timeout, adaptive)
+
+    def configure(self, limit, queue_timeout, adaptive=True):
+        """Changes the defaults of all routes, resetting their limiters.
+
+        Args:
+            limit (int):           Concurrent requests per route, 0 for no limit.
+            queue_timeout (float): Seconds a request waits for admission.
+            adaptive (bool):       Whether to adapt the limits to the latency.
+        """
+        with self._lock:
+            self.defaults = (limit, queue_timeout, adaptive)
+            self.limiters = {}
+
+    def configure_route(self, rule, limit=None, queue_timeout=None):
+        """Overrides the defaults for a single route.
+
+        Args:
+            rule (str):            Rule of the route, e.g. "/get/sitemap".
+            limit (int):           Concurrent requests, 0 for no limit.
+            queue_timeout (float): Seconds a request waits for admission.
+        """
+        with self._lock:
+            self.routes[rule] = (limit, queue_timeout)
+            self.limiters.pop(rule, None)
+
+    def get_limiter(self, rule):
+        """Returns the limiter of a route, creating it on the first request.
+
+        Args:
+            rule (str): Rule of the route.
+
+        Returns:
+            admission.Limiter: Returns the limiter or None, if the route is not limited.
+        """
+        return self.get_route(rule)[0]
+
+    def get_route(self, rule):
+        """Returns the limiter and the queue timeout of a route.
+
+        The limiter is created on the first request. Both are read at once, while
+        configure may replace them.
+
+        Args:
+            rule (str): Rule of the route.
+
+        Returns:
+            tuple: Returns a tuple, containing (limiter, queue_timeout), where the
+                limiter is None, if the route is not limited.
+        """
+        with self._lock:
+            limit, queue_timeout, adaptive = self.defaults
+            route_limit, route_timeout = self.routes.get(rule, (None, None))
+            queue_timeout = queue_timeout if route_timeout is None else route_timeout
+
+            limiter = self.limiters.get(rule)
+            if limiter is not None or rule in self.bypass:
+                return limiter, queue_timeout
+
+            limit = limit if route_limit is None else route_limit
+            if limit:
+                limiter = self.limiters[rule] = Limiter(limit, adaptive)
+
+            return limiter, queue_timeout
+
+    def admit(self, rule, queued=0.0, wait=True):
+        """Admits a request to a route.
+
+        Args:
+            rule (str):     Rule of the route.
+            queued (float): Seconds the request already waited within the server.
+            wait (bool):    Whether to wait for a slot. The IOLoop must not wait.
+
+        Returns:
+            admission.Limiter: Returns the limiter to be released, once the request
+                finished, or None, if the route is not limited.
+
+        Raises:
+            Overloaded: Raised if the request was not admitted.
+        """
+        limiter, queue_timeout = self.get_route(rule)
+        if limiter is None:
+            return None
+
+        if not limiter.acquire(max(0.0, queue_timeout - queued) if wait else 0.0):
+            raise Overloaded(rule, self.retry_after)
+
+        return limiter
+
+    def stats(self):
+        """Returns the state of the limited routes.
+
+        Returns:
+            dict: Returns the stats of the Limiter per rule.
+        """
+        with self._lock:
+            limiters = list(self.limiters.items())
+
+        return dict((rule, limiter.stats()) for rule, limiter in limiters)
+
+    def register_metrics(self, metrics):
+        """Registers the totals of all routes with the metrics of the application.
+
+        Args:
+            metrics (metrics.Metrics): Metrics of the application.
+        """
+        def total(key):
+            """Returns a function summing up a value of all limiters."""
+            return lambda: sum(stats[key] for stats in self.stats().values())
+
+        metrics.register("admission_rejected_total", "counter",
+                         "Requests rejected by the admission control.", total("rejected"))
+        metrics.register("admission_waiting", "gauge",
+                         "Requests waiting for admission.", total("waiting"))
+
+def init_app(app, control=None):
+    """Admits every request handled by the Flask application through the control.
+
+    Rejected requests are answered with 503 and a Retry-After header. Requests of
+    the warm-up are admitted without a limiter.
+
+    Args:
+        app (flask.Flask):                    Application to be protected.
+        control (admission.AdmissionControl): Admission control, a new instance by
+                                              default.
+
+    Returns:
+        admission.AdmissionControl: Returns the admission control of the application.
+    """
+    from flask import abort, g, request
+
+    control = control or AdmissionControl()
+    app.extensions["admission"] = control
+
+    if "metrics" in app.extensions:
+        control.register_metrics(app.extensions["metrics"])
+
+    @app.before_request
+    def admit_request():
+        """Waits for the admission of the request."""
+        if request.environ.get(WARMUP_REQUEST):
+            return
+
+        rule = request.url_rule.rule if request.url_rule is not None else UNMATCHED
+        queued_since = request.environ.get(QUEUED_SINCE)
+        queued = time.monotonic() - queued_since if queued_since is not None else 0.0
+
+        try:
+            limiter = control.admit(rule, queued)
+        except Overloaded as error:
+            abort(503, retry_after=error.retry_after)
+
+        if limiter is not None:
+            g.admission = (limiter, time.perf_counter())
+
+    @app.teardown_request
+    def release_request(exception):     # pylint: disable=unused-argument
+        """Frees the slot of the request."""
+        admitted = g.pop("admission", None)
+        if admitted is not None:
+            admitted[0].release(time.perf_counter() - admitted[1])
+
+    return control
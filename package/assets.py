@@ -0,0 +1,296 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module serves the static assets of the application efficiently.
+
+At startup, every file in the static folder gets a gzip sibling, and a brotli
+sibling if the brotli module is installed, plus a content hash fingerprint.
+Requests get the best precompressed file for their Accept-Encoding. Fingerprinted
+urls, as returned by asset_url in templates, are cached by clients forever.
+Dynamic responses above a size threshold are compressed on the fly.
+
+Installs with a read-only static folder should precompress the files at build
+time, up to date siblings are used as they are:
+
+    python package/assets.py package/static
+
+Outdated siblings, which can't be written next to the file, are written to the
+directory in the ASSETS_CACHE_DIRECTORY environment variable instead. Without
+it, such files are served uncompressed.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ("text/", "application/json", "application/javascript",
+                "application/xml", "image/svg+xml")
+
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+MAX_AGE = 365 * 24 * 60 * 60
+
+def is_compressible(mimetype):
+    """Checks, if content of the mimetype benefits from compression.
+
+    Args:
+        mimetype (str): Mimetype of the content.
+
+    Returns:
+        bool: Returns True for text like content.
+    """
+    return bool(mimetype) and mimetype.startswith(COMPRESSIBLE)
+
+def precompress(path, target_path=None):
+    """Writes the compressed siblings of a file, if they are outdated.
+
+    Siblings, which are not smaller than the file, are not written.
+
+    Args:
+        path (str):        Path of the file.
+        target_path (str): Path of the siblings without their suffix, defaults to path.
+
+    Returns:
+        list: Returns the encodings available for the file.
+
+    Raises:
+        OSError: Raised if a sibling can't be written.
+    """
+    encodings = []
+    data = None
+
+    for encoding, suffix in sorted(SUFFIXES.items()):
+        if encoding == "br" and brotli is None:
+            continue
+
+        target = (target_path or path) + suffix
+        if not os.path.isfile(target) or os.path.getmtime(target) < os.path.getmtime(path):
+            if data is None:
+                with open(path, "rb") as infile:
+                    data = infile.read()
+
+            if encoding == "br":
+                compressed = brotli.compress(data)
+            else:
+                compressed = gzip.compress(data, 9)
+
+            if len(compressed) >= len(data):
+                continue
+
+            with open(target, "wb") as outfile:
+                outfile.write(compressed)
+
+        encodings.append(encoding)
+
+    return encodings
+
+class StaticAssets(object):
+    """Fingerprints and precompresses the files of a static folder."""
+
+    def __init__(self, directory, url_path="/static", cache_directory=None):
+        """Initiates the StaticAssets.
+
+        Args:
+            directory (str):       The static folder.
+            url_path (str):        The url the static folder is served at.
+            cache_directory (str): Writable folder for the siblings, which can't be
+                                   written to the static folder, None for none.
+        """
+        super(StaticAssets, self).__init__()
+
+        self.directory       = directory
+        self.url_path        = url_path
+        self.cache_directory = cache_directory
+        self.fingerprints    = {}
+        self.originals       = {}
+        self.encodings       = {}
+
+    def scan(self):
+        """Precompresses and fingerprints all files of the static folder."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+
+        for directory, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(tuple(SUFFIXES.values())):
+                    continue
+
+                path = os.path.join(directory, name)
+                filename = os.path.relpath(path, self.directory).replace(os.sep, "/")
+
+                with open(path, "rb") as infile:
+                    digest = hashlib.sha1(infile.read()).hexdigest()[:12]
+
+                stem, extension = os.path.splitext(filename)
+                fingerprinted = "%s.%s%s" % (stem, digest, extension)
+
+                self.fingerprints[filename] = fingerprinted
+                self.originals[fingerprinted] = filename
+
+                if is_compressible(mimetypes.guess_type(filename)[0]):
+                    self.encodings[filename] = self.compress(path, filename)
+
+    def compress(self, path, filename):
+        """Precompresses a file next to it or, if that fails, in the cache directory.
+
+        Args:
+            path (str):     Path of the file.
+            filename (str): Path of the file within the static folder.
+
+        Returns:
+            dict: Returns a dictionary mapping the available encodings to the folder
+                containing their sibling, empty if the file is served uncompressed.
+        """
+        try:
+            return dict.fromkeys(precompress(path), self.directory)
+        except OSError:
+            if not self.cache_directory:
+                return {}
+
+        target_path = os.path.join(self.cache_directory, filename)
+        try:
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            return dict.fromkeys(precompress(path, target_path), self.cache_directory)
+        except OSError:
+            return {}
+
+    def url_for(self, filename):
+        """Returns the fingerprinted url of a static file.
+
+        Args:
+            filename (str): Path of the file within the static folder.
+
+        Returns:
+            str: Returns the url, which may be cached forever.
+        """
+        return "%s/%s" % (self.url_path, self.fingerprints.get(filename, filename))
+
+    def resolve(self, filename):
+        """Resolves a requested, possibly fingerprinted, filename.
+
+        Args:
+            filename (str): Requested path within the static folder.
+
+        Returns:
+            tuple: Returns a tuple, containing (filename, is_fingerprinted).
+        """
+        if filename in self.originals:
+            return self.originals[filename], True
+
+        return filename, False
+
+    def choose_encoding(self, filename, accept_encodings):
+        """Chooses the best precompressed sibling accepted by the client.
+
+        Args:
+            filename (str):                          Path of the file.
+            accept_encodings (werkzeug.Accept): The accepted encodings.
+
+        Returns:
+            str: Returns "br", "gzip" or None for the uncompressed file.
+        """
+        for encoding in ("br", "gzip"):
+            if encoding in self.encodings.get(filename, ()) and accept_encodings[encoding] > 0:
+                return encoding
+
+        return None
+
+def init_app(app, min_size=1024):
+    """Serves the static folder of the application through StaticAssets.
+
+    Args:
+        app (flask.Flask): Application to be set up.
+        min_size (int):    Minimal size of dynamic responses to be compressed.
+
+    Returns:
+        assets.StaticAssets: Returns the assets of the application.
+    """
+    from flask import request, send_from_directory
+
+    assets = StaticAssets(app.static_folder, app.static_url_path,
+                          os.environ.get("ASSETS_CACHE_DIRECTORY"))
+    assets.scan()
+
+    app.extensions["assets"] = assets
+    app.jinja_env.globals["asset_url"] = assets.url_for
+
+    def serve_static(filename):
+        """Serves a static file, precompressed if possible."""
+        filename, fingerprinted = assets.resolve(filename)
+        encoding = assets.choose_encoding(filename, request.accept_encodings)
+
+        response = send_from_directory(
+            assets.encodings[filename][encoding] if encoding else assets.directory,
+            filename + SUFFIXES[encoding] if encoding else filename,
+            mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            max_age=MAX_AGE if fingerprinted else None)
+
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        if fingerprinted:
+            response.cache_control.public    = True
+            response.cache_control.immutable = True
+        response.vary.add("Accept-Encoding")
+
+        return response
+
+    if "static" in app.view_functions:
+        app.view_functions["static"] = serve_static
+
+    @app.after_request
+    def compress_response(response):
+        """Compresses large, text like responses with gzip."""
+        if response.direct_passthrough or response.is_streamed or response.status_code != 200:
+            return response
+
+        if ("Content-Encoding" in response.headers or not is_compressible(response.mimetype)
+                or request.accept_encodings["gzip"] <= 0):
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        response.set_data(gzip.compress(data, 6))
+        response.headers["Content-Encoding"] = "gzip"
+        response.vary.add("Accept-Encoding")
+
+        etag, _ = response.get_etag()
+        if etag:
+            response.set_etag(etag, weak=True)
+
+        return response
+
+    return assets
+
+if __name__ == "__main__":
+    import sys
+
+    for static_folder in sys.argv[1:]:
+        StaticAssets(static_folder).scan()
@@ -0,0 +1,173 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module serves the application natively on Tornado's asyncio loop.
+
+The service endpoints are implemented as asynchronous Tornado handlers. Every
+other route of the Flask application runs within a bounded thread pool, so a
+slow handler no longer blocks the IOLoop and concurrent requests are not
+serialized behind a single WSGI call. Concurrent requests for a cold sitemap
+share a single build of it. The handlers are admitted by the
+admission control of the Flask application, without waiting on the IOLoop.
+
+The native handlers bypass Flask's request hooks. Their responses are
+compressed by Tornado instead, with the same minimal size as the gzip hook of
+assets.init_app, so both modes serve the same encodings.
+"""
+
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from tornado.ioloop import IOLoop
+from tornado.web import (Application, FallbackHandler, GZipContentEncoding, HTTPError,
+                         RequestHandler)
+
+import admission
+import serialization
+import service
+from streaming import StreamingWSGIContainer
+
+class ServiceHandler(RequestHandler):
+    """Base class for asynchronous handlers of the service endpoints.
+
+    The handlers record their metrics into the metrics of the Flask application.
+    """
+
+    app               = None
+    executor          = None
+    metrics_start     = None
+    metrics_exception = None
+    admitted          = None
+
+    def initialize(self, app, executor):   # pylint: disable=arguments-differ
+        """Initiates the handler.
+
+        Args:
+            app (flask.Flask):                            The wrapped Flask application.
+            executor (concurrent.futures.ThreadPoolExecutor): Pool for blocking work.
+        """
+        self.app      = app
+        self.executor = executor
+
+    def prepare(self):
+        """Records the start of the request and admits it or rejects it with 503."""
+        if "metrics" in self.app.extensions:
+            self.metrics_start = self.app.extensions["metrics"].start()
+
+        if "admission" in self.app.extensions:
+            try:
+                limiter = self.app.extensions["admission"].admit(self.request.path, wait=False)
+            except admission.Overloaded as error:
+                self.set_status(503)
+                self.set_header("Retry-After", str(error.retry_after))
+                self.finish()
+                return
+
+            if limiter is not None:
+                self.admitted = (limiter, time.perf_counter())
+
+    def data_received(self, chunk):
+        """Ignores streamed request bodies, the handlers read the complete body only.
+
+        Args:
+            chunk (bytes): Chunk of the request body.
+        """
+
+    def on_finish(self):
+        """Records the end of the request and frees its slot."""
+        if self.admitted is not None:
+            self.admitted[0].release(time.perf_counter() - self.admitted[1])
+
+        if self.metrics_start is not None:
+            self.app.extensions["metrics"].finish(
+                self.request.path, self.metrics_start, self.metrics_exception)
+
+    def log_exception(self, typ, value, tb):
+        """Records the exception before logging it."""
+        if not isinstance(value, HTTPError):
+            self.metrics_exception = value
+        super(ServiceHandler, self).log_exception(typ, value, tb)
+
+    def run_blocking(self, function, *args):
+        """Runs a blocking function within the thread pool.
+
+        Args:
+            function (callable): Function to be called.
+            *args:               Arguments of the function.
+
+        Returns:
+            asyncio.Future: Returns a future resolving to the functions result.
+        """
+        return IOLoop.current().run_in_executor(self.executor, function, *args)
+
+class VersionHandler(ServiceHandler):
+    """Returns the version of the application."""
+
+    async def get(self):
+        """Handles GET requests."""
+        self.write(await self.run_blocking(service.get_version))
+
+class SitemapHandler(ServiceHandler):
+    """Returns the sitemap of the application."""
+
+    etag   = None
+    length = 0
+
+    async def get(self):
+        """Handles GET requests."""
+        mimetype = serialization.negotiate(self.request.headers.get("Accept"))
+        body, self.etag = await self.run_blocking(
+            service.get_sitemap_body, self.app, service.SITEMAP_EXCLUDES, mimetype)
+
+        self.set_header("Content-Type", mimetype)
+        self.set_header("Vary", "Accept")
+        self.write(body)
+        self.length = len(body)
+
+    def compute_etag(self):
+        """Returns the precomputed ETag of the sitemap, weak if the body gets compressed."""
+        compressed = (self.length >= GZipContentEncoding.MIN_LENGTH
+                      and "gzip" in self.request.headers.get("Accept-Encoding", ""))
+
+        return '%s"%s"' % ("W/" if compressed else "", self.etag)
+
+def make_async_app(app, threads=None):
+    """Wraps the Flask application into an asynchronous Tornado application.
+
+    Args:
+        app (flask.Flask): Application built by builder.make_app.
+        threads (int):     Size of the thread pool for blocking work.
+
+    Returns:
+        tornado.web.Application: Returns the Tornado application.
+    """
+    executor = ThreadPoolExecutor(max_workers=threads)
+    settings = {"app": app, "executor": executor}
+    fallback = StreamingWSGIContainer(app, executor=executor)
+
+    return Application([
+        (r"/get/version", VersionHandler, settings),
+        (r"/get/sitemap", SitemapHandler, settings),
+        (r".*",           FallbackHandler, {"fallback": fallback})
+    ], compress_response=True)
@@ -21,13 +21,26 @@
 # LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
-"""This module contains the the main method to build your Flask application."""
+"""This module contains the the main method to build your Flask application.
 
-import os
+Flask is imported on the first call of make_app, so importing this module
+stays cheap for the processes that never build an application.
+"""
 
-from flask import Flask
+import os
 
+import admission
+import assets
+import cache
+import metrics
+import profiler
+import serialization
 import service
+import warmup
+
+PACKAGE_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+
+APPS = {}
 
 def make_app(project):
     """Creates a Flask application and returns it.
@@ -35,19 +48,91 @@ def make_app(project):
     Returns:
         flask.Flask: Returns a Flask application.
     """
+    from flask import Flask, Response, abort, request
+
     app = Flask(
         import_name     = project,
-        static_folder   = "%s/static"    % os.path.dirname(os.path.realpath(__file__)),
-        template_folder = "%s/templates" % os.path.dirname(os.path.realpath(__file__)))
+        static_folder   = "%s/static"    % PACKAGE_DIRECTORY,
+        template_folder = "%s/templates" % PACKAGE_DIRECTORY)
+
+    app_metrics = metrics.instrument(app)
+    admission.init_app(app)
+    app.extensions["cache"] = cache.make_cache(os.environ.get("CACHE_DIRECTORY"))
+    assets.init_app(app)
+    app.extensions["profiler"] = app_profiler = profiler.SamplingProfiler()
+    app.extensions["warmup"] = app_warmup = warmup.WarmUp()
 
     @app.route("/get/version")
     def get_version():
         """Returns the version of the application."""
         return service.get_version()
 
+    @app.route("/get/ready")
+    def get_ready():
+        """Returns 200 once the application is warmed up and 503 before."""
+        response = serialization.make_response(
+            app_warmup.stats(), request.headers.get("Accept"), 200 if app_warmup.ready else 503)
+
+        response.cache_control.no_store = True
+        if not app_warmup.ready:
+            response.headers["Retry-After"] = "1"
+
+        return response
+
+    @app.route("/admin/profile", methods=["GET", "POST"])
+    def profile():
+        """Starts the sampling profiler of this worker or returns its state.
+
+        The route is disabled unless $ADMIN_TOKEN is set and requires the token
+        as bearer token. POST starts a window of ?seconds=<seconds>.
+        """
+        token = os.environ.get("ADMIN_TOKEN")
+        if not token:
+            abort(404)
+        if not profiler.is_authorized(request.headers.get("Authorization"), token):
+            abort(403)
+
+        status = 200
+        if request.method == "POST":
+            started = app_profiler.start(request.args.get("seconds", type=float))
+            status = 202 if started else 409
+
+        return serialization.make_response(
+            {"pid": os.getpid(), "running": app_profiler.running,
+             "last_profile": app_profiler.last_profile},
+            request.headers.get("Accept"), status)
+
     @app.route("/get/sitemap")
+    @cache.cached_route()
     def get_sitemap():
-        """Returns the sitemap of the application."""
-        return str(service.get_sitemap(app))
+        """Returns the sitemap of the application as JSON or as accepted by the client."""
+        mimetype = serialization.negotiate(request.headers.get("Accept"))
+        body, etag = service.get_sitemap_body(app, service.SITEMAP_EXCLUDES, mimetype)
+
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.vary.add("Accept")
+
+        return response.make_conditional(request)
+
+    @app.route("/get/metrics")
+    def get_metrics():
+        """Returns the metrics of the application in the Prometheus text format."""
+        return Response(
+            app_metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
     return app
+
+def get_app(project):
+    """Returns the application for project, building it on the first call only.
+
+    This is meant for tests, which would otherwise build a new application
+    in every setUp. Tests adding routes should use make_app instead.
+
+    Returns:
+        flask.Flask: Returns the cached Flask application.
+    """
+    if project not in APPS:
+        APPS[project] = make_app(project)
+
+    return APPS[project]
@@ -0,0 +1,463 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module contains a caching layer for service functions and routes.
+
+Two backends are available: a bounded in-memory LRU cache with a time to live
+per entry and a file backed cache, which is shared by all pre-forked workers on
+the same host. Both count their hits and misses.
+
+The file backed cache unpickles its entries, so its directory must be private
+to the user running the service.
+"""
+
+import collections
+import functools
+import hashlib
+import os
+import stat
+import threading
+import time
+
+from counters import ShardedCounter
+
+MISSING = object()
+
+# request headers every cached route varies on, besides the Vary of its responses
+ROUTE_VARY = ("Accept",)
+
+MAX_VARIANTS = 16
+
+# response headers, which are not cached, as they are set anew for every response
+UNCACHED_HEADERS = ("Content-Length", "Date")
+
+class LRUCache(object):
+    """A thread-safe, bounded in-memory cache with a time to live per entry."""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        """Initiates the LRUCache.
+
+        Args:
+            maxsize (int): Maximal number of entries.
+            ttl (float):   Default time to live in seconds, None for no expiry.
+        """
+        super(LRUCache, self).__init__()
+
+        self.maxsize = maxsize
+        self.ttl     = ttl
+        self.hits    = 0
+        self.misses  = 0
+
+        self._entries = collections.OrderedDict()
+        self._lock    = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        """Returns the cached value for key.
+
+        Args:
+            key (object):     Hashable key.
+            default (object): Value returned for missing or expired entries.
+
+        Returns:
+            object: Returns the cached value or default.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or (entry[0] is not None and entry[0] < time.time()):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """Stores value for key, evicting the least recently used entries.
+
+        Args:
+            key (object):   Hashable key.
+            value (object): Value to be cached.
+            ttl (float):    Time to live in seconds, defaults to the ttl of the cache.
+        """
+        ttl = self.ttl if ttl is None else ttl
+
+        with self._lock:
+            self._entries[key] = (time.time() + ttl if ttl is not None else None, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=MISSING):
+        """Removes a single entry or all entries.
+
+        Args:
+            key (object): Key of the entry, all entries if not given.
+        """
+        with self._lock:
+            if key is MISSING:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Returns the statistics of the cache.
+
+        Returns:
+            dict: Returns the number of "hits", "misses" and "entries".
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+class FileCache(object):
+    """A cache storing pickled entries in a directory, shared across processes.
+
+    Every entry is written to a temporary file and renamed, so readers never see
+    partially written entries. The least recently used files are removed, once
+    there are more than maxsize entries. The entries are counted in memory and
+    the directory is only scanned for the eviction, so entries written by other
+    processes may exceed maxsize until the next eviction. Hits and misses are
+    counted per process.
+    """
+
+    def __init__(self, directory, maxsize=1024, ttl=None):
+        """Initiates the FileCache.
+
+        Args:
+            directory (str): Directory to store the entries in.
+            maxsize (int):   Maximal number of entries.
+            ttl (float):     Default time to live in seconds, None for no expiry.
+
+        Raises:
+            PermissionError: Raised if the directory is accessible by other users.
+        """
+        super(FileCache, self).__init__()
+
+        self.directory = directory
+        self.maxsize   = maxsize
+        self.ttl       = ttl
+        self.counter   = ShardedCounter()
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+
+        # the entries are unpickled, nobody else may write them
+        status = os.stat(directory)
+        if status.st_uid != os.getuid() or stat.S_IMODE(status.st_mode) & 0o077:
+            raise PermissionError(
+                "%s must be owned by the current user and private to it" % directory)
+
+        self.entries = len(self.list_entries())
+
+    def get_path(self, key):
+        """Returns the file of the entry for key.
+
+        Args:
+            key (object): Key with a stable repr.
+
+        Returns:
+            str: Returns the path of the entry.
+        """
+        digest = hashlib.sha1(repr(key).encode("UTF-8")).hexdigest()
+        return os.path.join(self.directory, digest + ".cache")
+
+    def get(self, key, default=MISSING):
+        """Returns the cached value for key.
+
+        Args:
+            key (object):     Key with a stable repr.
+            default (object): Value returned for missing or expired entries.
+
+        Returns:
+            object: Returns the cached value or default.
+        """
+        import pickle
+
+        path = self.get_path(key)
+
+        try:
+            with open(path, "rb") as infile:
+                expires, stored_key, value = pickle.load(infile)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            self.counter.increment("misses")
+            return default
+
+        if stored_key != key or (expires is not None and expires < time.time()):
+            self.counter.increment("misses")
+            return default
+
+        try:
+            os.utime(path, None)
+        except OSError:                                         # pragma: no cover
+            pass
+
+        self.counter.increment("hits")
+        return value
+
+    def set(self, key, value, ttl=None):
+        """Stores value for key, evicting the least recently used entries.
+
+        Args:
+            key (object):   Key with a stable repr.
+            value (object): Picklable value to be cached.
+            ttl (float):    Time to live in seconds, defaults to the ttl of the cache.
+        """
+        import pickle
+        import tempfile
+
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl is not None else None
+
+        path = self.get_path(key)
+        if not os.path.exists(path):
+            self.entries += 1
+
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, "wb") as outfile:
+            pickle.dump((expires, key, value), outfile, pickle.HIGHEST_PROTOCOL)
+        os.rename(temporary, path)
+
+        if self.entries > self.maxsize:
+            self.evict()
+
+    def list_entries(self):
+        """Returns the paths of all entries.
+
+        Returns:
+            list: Returns the paths.
+        """
+        return [os.path.join(self.directory, name)
+                for name in os.listdir(self.directory) if name.endswith(".cache")]
+
+    def evict(self):
+        """Removes the least recently used entries above maxsize."""
+        entries = self.list_entries()
+        self.entries = min(len(entries), self.maxsize)
+        if len(entries) <= self.maxsize:
+            return
+
+        def get_mtime(path):
+            """Returns the modification time or 0 for vanished files."""
+            try:
+                return os.path.getmtime(path)
+            except OSError:                                     # pragma: no cover
+                return 0
+
+        for path in sorted(entries, key=get_mtime)[:len(entries) - self.maxsize]:
+            self.remove(path)
+
+    @classmethod
+    def remove(cls, path):
+        """Removes an entry, ignoring entries removed by other processes.
+
+        Args:
+            path (str): Path of the entry.
+        """
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def invalidate(self, key=MISSING):
+        """Removes a single entry or all entries.
+
+        Args:
+            key (object): Key of the entry, all entries if not given.
+        """
+        if key is not MISSING:
+            self.remove(self.get_path(key))
+            return
+
+        for path in self.list_entries():
+            self.remove(path)
+        self.entries = 0
+
+    def stats(self):
+        """Returns the statistics of the cache.
+
+        Returns:
+            dict: Returns the number of "hits", "misses" and "entries".
+        """
+        counts = self.counter.values()
+
+        return {"hits": counts.get("hits", 0), "misses": counts.get("misses", 0),
+                "entries": len(self.list_entries())}
+
+def make_cache(directory=None, maxsize=1024, ttl=None):
+    """Creates a cache backend.
+
+    Args:
+        directory (str): Directory for a cache shared between processes. An in-memory
+                         cache is created if no directory is given.
+        maxsize (int):   Maximal number of entries.
+        ttl (float):     Default time to live in seconds.
+
+    Returns:
+        object: Returns a LRUCache or a FileCache.
+    """
+    if directory:
+        return FileCache(directory, maxsize, ttl)
+
+    return LRUCache(maxsize, ttl)
+
+def make_key(function, args, kwargs):
+    """Creates the cache key for a function call.
+
+    Args:
+        function (callable): The called function.
+        args (tuple):        Positional arguments.
+        kwargs (dict):       Keyword arguments.
+
+    Returns:
+        tuple: Returns the key.
+    """
+    return (function.__module__, function.__name__, args, tuple(sorted(kwargs.items())))
+
+def cached(cache=None, ttl=None):
+    """Caches the results of a function.
+
+    The decorated function gets a "cache" attribute and an "invalidate" function,
+    which removes the entry for the given arguments or all entries without arguments.
+
+    Args:
+        cache (object): Cache backend, a new LRUCache by default.
+        ttl (float):    Time to live of the entries in seconds.
+
+    Returns:
+        callable: Returns the decorator.
+    """
+    cache = cache if cache is not None else LRUCache()
+
+    def decorator(function):
+        """Wraps the function."""
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            """Returns the cached result or calls the function."""
+            key = make_key(function, args, kwargs)
+
+            value = cache.get(key, MISSING)
+            if value is MISSING:
+                value = function(*args, **kwargs)
+                cache.set(key, value, ttl)
+
+            return value
+
+        def invalidate(*args, **kwargs):
+            """Removes cached results."""
+            if args or kwargs:
+                cache.invalidate(make_key(function, args, kwargs))
+            else:
+                cache.invalidate()
+
+        wrapper.cache = cache
+        wrapper.invalidate = invalidate
+
+        return wrapper
+
+    return decorator
+
+def cached_route(ttl=None):
+    """Caches successful GET responses of a Flask route in the cache of the application.
+
+    The cache is taken from app.extensions["cache"]. Responses are cached per
+    path and query string and, within that entry, per value of the request headers
+    in ROUTE_VARY and in the Vary header of the response, e.g. per Accept header
+    of a negotiated response. Every response gets an ETag and is made conditional,
+    so clients revalidating a cached response get a 304.
+
+    Args:
+        ttl (float): Time to live of the entries in seconds.
+
+    Returns:
+        callable: Returns the decorator.
+    """
+    def decorator(view):
+        """Wraps the view function."""
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            """Returns the cached response or calls the view function."""
+            from flask import current_app, request
+
+            app_cache = current_app.extensions.get("cache")
+            if app_cache is None or request.method != "GET":
+                return view(*args, **kwargs)
+
+            key = route_key(request.full_path)
+            entry = app_cache.get(key, None) or {"vary": ROUTE_VARY, "variants": {}}
+            cached_response = entry["variants"].get(get_variant(entry["vary"], request.headers))
+
+            if cached_response is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+
+                if response.get_etag()[0] is None:
+                    response.add_etag()
+
+                vary = tuple(sorted(set(ROUTE_VARY) | set(
+                    header.title() for header in response.vary)))
+                variants = dict(entry["variants"]) if vary == entry["vary"] else {}
+                while len(variants) >= MAX_VARIANTS:
+                    del variants[next(iter(variants))]
+
+                cached_response = (
+                    response.get_data(), response.status_code,
+                    [i for i in response.headers.items() if i[0] not in UNCACHED_HEADERS])
+                variants[get_variant(vary, request.headers)] = cached_response
+                app_cache.set(key, {"vary": vary, "variants": variants}, ttl)
+
+            response = current_app.response_class(
+                cached_response[0], status=cached_response[1], headers=cached_response[2])
+
+            return response.make_conditional(request)
+
+        return wrapper
+
+    return decorator
+
+def get_variant(vary, headers):
+    """Returns the key of a response variant within a cached route entry.
+
+    Args:
+        vary (tuple):                            Names of the request headers.
+        headers (werkzeug.datastructures.Headers): Headers of the request.
+
+    Returns:
+        tuple: Returns the values of the headers.
+    """
+    return tuple(headers.get(name, "") for name in vary)
+
+def route_key(full_path):
+    """Returns the cache key of a route response, e.g. to invalidate it.
+
+    Args:
+        full_path (str): Path and query string, as in flask.Request.full_path.
+
+    Returns:
+        tuple: Returns the key.
+    """
+    return ("route", full_path)
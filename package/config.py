@@ -0,0 +1,204 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module contains the configuration of the servers.
+
+Every option can be given as a command line flag or as an environment
+variable, prefixed with SERVER_. Command line flags take precedence, boolean
+options enabled in the environment are disabled by their --no- flag, or by
+--keep-alive for --no-keep-alive:
+
+    SERVER_BACKLOG=1024 python package 8080 --max-connections 2000
+    SERVER_REUSE_PORT=1 python package 8080 --no-reuse-port
+    python package --unix-socket /run/service/service.sock
+"""
+
+import argparse
+import os
+
+import listeners
+
+ENVIRONMENT_PREFIX = "SERVER_"
+
+def octal(value):
+    """Parses an octal number, e.g. file permissions.
+
+    Args:
+        value (str): The number in octal notation, e.g. "660".
+
+    Returns:
+        int: Returns the number.
+
+    Raises:
+        ValueError: Raised for values, which are no octal number.
+    """
+    return int(value, 8)
+
+# name, type, default, help
+OPTIONS = (
+    ("host",                    str,   "0.0.0.0", "Interface to listen on."),
+    ("unix_socket",             str,   "",
+     "Path of a Unix domain socket to listen on instead of the port."),
+    ("unix_socket_mode",        octal, 0o660,     "Octal permissions of the Unix domain socket."),
+    ("fd",                      int,   -1,
+     "Inherited listening socket to serve on instead of the port, -1 for none. Sockets "
+     "passed by systemd's socket activation are used automatically."),
+    ("workers",                 int,   0,         "Worker processes, 0 for one per CPU."),
+    ("threads",                 int,   0,
+     "Thread pool size per worker, 0 to serve one WSGI call at a time. The development "
+     "server uses a thread per connection for 0."),
+    ("accept_queue",            int,   64,
+     "Accepted connections waiting for a thread of the development server's pool."),
+    ("reuse_port",              bool,  False,     "Bind a socket per worker with SO_REUSEPORT."),
+    ("backlog",                 int,   128,       "Length of the accept queue."),
+    ("no_keep_alive",           bool,  False,     "Close every connection after one request."),
+    ("idle_connection_timeout", float, 60.0,
+     "Seconds to wait for the next request on an idle connection."),
+    ("body_timeout",            float, 0.0,       "Seconds to read a request body, 0 for none."),
+    ("max_header_size",         int,   65536,     "Maximal size of the request headers."),
+    ("max_body_size",           int,   104857600, "Maximal size of a request body."),
+    ("max_buffer_size",         int,   104857600, "Maximal size of a connection's buffer."),
+    ("max_connections",         int,   0,
+     "Concurrent connections per worker before accepting is paused, 0 for no limit."),
+    ("max_concurrency",         int,   32,
+     "Concurrent requests per route and worker, 0 for no limit. Excess requests wait for "
+     "the queue timeout and are rejected with 503 afterwards."),
+    ("queue_timeout",           float, 0.1,
+     "Seconds a request waits for admission, including the time queued in the worker."),
+    ("fixed_concurrency",       bool,  False,
+     "Keep the concurrency limits fixed instead of adapting them to the latency."),
+    ("warmup_requests",         int,   1,
+     "Requests per route to warm up the application before listening, 0 for none."),
+    ("x_sendfile",              bool,  False,
+     "Let the reverse proxy send static files with sendfile, via the X-Sendfile header.")
+)
+
+class ServerConfig(object):
+    """The configuration of the development and production servers."""
+
+    def __init__(self, port, **options):
+        """Initiates the ServerConfig.
+
+        Args:
+            port (int):  Port to listen on.
+            **options:   Values for the OPTIONS, all others keep their defaults.
+
+        Raises:
+            TypeError: Raised for unknown options.
+        """
+        super(ServerConfig, self).__init__()
+
+        self.port = port
+
+        for name, _, default, _ in OPTIONS:
+            setattr(self, name, options.pop(name, default))
+
+        if options:
+            raise TypeError("Unknown server options: %s" % ", ".join(sorted(options)))
+
+    @classmethod
+    def from_arguments(cls, arguments=None, environ=None):
+        """Creates the configuration from command line flags and environment variables.
+
+        Args:
+            arguments (list): Command line arguments, defaults to sys.argv.
+            environ (dict):   Environment variables, defaults to os.environ.
+
+        Returns:
+            config.ServerConfig: Returns the configuration.
+
+        Raises:
+            SystemExit: Raised by argparse for invalid flags or environment variables, or
+                if neither a port nor a socket to listen on is given.
+        """
+        environ = os.environ if environ is None else environ
+        parser = argparse.ArgumentParser(description="Starts the service.")
+        parser.add_argument("port", metavar="PORT", type=int, nargs="?",
+                            help="Port to listen on, unless a socket is given.")
+
+        for name, kind, default, description in OPTIONS:
+            flag = "--%s" % name.replace("_", "-")
+            variable = ENVIRONMENT_PREFIX + name.upper()
+            value = environ.get(variable)
+
+            try:
+                if value is not None:
+                    default = parse_bool(value) if kind is bool else kind(value)
+            except ValueError:
+                parser.error("invalid %s value for %s: %r" % (kind.__name__, variable, value))
+
+            if kind is bool:
+                negation = name[3:] if name.startswith("no_") else "no_" + name
+                group = parser.add_mutually_exclusive_group()
+                group.add_argument(flag, dest=name, action="store_true", help=description)
+                group.add_argument("--%s" % negation.replace("_", "-"), dest=name,
+                                   action="store_false", help="Negates %s." % flag)
+                parser.set_defaults(**{name: default})
+            else:
+                parser.add_argument(flag, dest=name, type=kind, default=default,
+                                    help="%s Default: %s" % (
+                                        description, "%o" % default if kind is octal else default))
+
+        options = vars(parser.parse_args(arguments))
+
+        if options["port"] is None and not options["unix_socket"] and options["fd"] < 0 \
+                and not listeners.get_systemd_fds(environ):
+            parser.error("a PORT, --unix-socket, --fd or a socket passed by systemd is required")
+
+        return cls(options.pop("port") or 0, **options)
+
+    def get_http_server_options(self):
+        """Returns the keyword arguments for tornado.httpserver.HTTPServer.
+
+        Returns:
+            dict: Returns the connection handling options.
+        """
+        return {
+            "no_keep_alive":           self.no_keep_alive,
+            "idle_connection_timeout": self.idle_connection_timeout,
+            "body_timeout":            self.body_timeout or None,
+            "max_header_size":         self.max_header_size,
+            "max_body_size":           self.max_body_size,
+            "max_buffer_size":         self.max_buffer_size
+        }
+
+def parse_bool(value):
+    """Parses a boolean environment variable.
+
+    Args:
+        value (str): Value of the variable.
+
+    Returns:
+        bool: Returns True for "1", "true", "yes" and "on", False for "0", "false",
+            "no", "off" and an empty value.
+
+    Raises:
+        ValueError: Raised for any other value.
+    """
+    value = value.strip().lower()
+    if value in ("1", "true", "yes", "on"):
+        return True
+    if value in ("", "0", "false", "no", "off"):
+        return False
+
+    raise ValueError("Invalid boolean: %r" % value)
@@ -0,0 +1,223 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module contains counters, which are safe to use from many threads.
+
+Every thread increments its own shard without any locking. The shards are
+summed up on read, which is rare compared to the increments. Shards of finished
+threads are folded into a single total, so a thread per request does not let
+the number of shards grow. Resetting subtracts a snapshot of the totals instead
+of clearing the shards of other threads, so it never races with their increments.
+"""
+
+import functools
+import threading
+import weakref
+
+class _ShardOwner(object):    # pylint: disable=too-few-public-methods
+    """Lives as long as its thread and retires the shard on garbage collection."""
+
+    __slots__ = ("__weakref__",)
+
+def _retire(counter_ref, shard):
+    """Retires the shard, unless its counter has been collected already.
+
+    The finalizer of a shard only holds a weak reference to the counter, so a
+    counter is collected with its owner instead of living as long as its threads.
+
+    Args:
+        counter_ref (weakref.ref): Weak reference to the ShardedCounter.
+        shard (dict):              Shard of the finished thread.
+    """
+    counter = counter_ref()
+    if counter is not None:
+        counter._retire(shard)      # pylint: disable=protected-access
+
+class ShardedCounter(object):
+    """A set of keyed counters, sharded per thread and aggregated on read."""
+
+    def __init__(self):
+        """Initiates the ShardedCounter."""
+        super(ShardedCounter, self).__init__()
+
+        self._local   = threading.local()
+        self._lock    = threading.Lock()
+        self._shards  = []
+        self._retired = {}
+        self._base    = {}
+
+    def _get_shard(self):
+        """Returns the shard of the current thread, creating it if required.
+
+        Returns:
+            dict: Returns the shard of the current thread.
+        """
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = {}
+            owner = _ShardOwner()
+            weakref.finalize(owner, _retire, weakref.ref(self), shard)
+
+            with self._lock:
+                self._shards.append(shard)
+
+            self._local.shard = shard
+            self._local.owner = owner
+
+            return shard
+
+    def _retire(self, shard):
+        """Folds the shard of a finished thread into the retired totals.
+
+        Args:
+            shard (dict): Shard of the finished thread.
+        """
+        with self._lock:
+            for key, value in shard.items():
+                self._retired[key] = self._retired.get(key, 0) + value
+
+            self._shards.remove(shard)
+
+    def increment(self, key=None, amount=1):
+        """Increments the counter identified by key.
+
+        Args:
+            key (object):   Hashable key of the counter.
+            amount (float): Amount to be added, may be negative.
+        """
+        shard = self._get_shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    def decrement(self, key=None, amount=1):
+        """Decrements the counter identified by key.
+
+        Args:
+            key (object):   Hashable key of the counter.
+            amount (float): Amount to be subtracted.
+        """
+        self.increment(key, -amount)
+
+    def values(self):
+        """Returns the aggregated value of every counter.
+
+        Returns:
+            dict: Returns a dictionary mapping each key to its total.
+        """
+        with self._lock:
+            totals = self._sum()
+
+            for key, value in self._base.items():
+                totals[key] = totals.get(key, 0) - value
+                if not totals[key]:
+                    del totals[key]
+
+        return totals
+
+    def _sum(self):
+        """Returns the sum of the retired totals and all shards, without the base.
+
+        The lock must be held by the caller.
+
+        Returns:
+            dict: Returns a dictionary mapping each key to its sum.
+        """
+        totals = dict(self._retired)
+
+        for shard in self._shards:
+            for key, value in list(shard.items()):
+                totals[key] = totals.get(key, 0) + value
+
+        return totals
+
+    def value(self, key=None):
+        """Returns the aggregated value of a single counter.
+
+        Args:
+            key (object): Hashable key of the counter.
+
+        Returns:
+            float: Returns the total of the counter.
+        """
+        return self.values().get(key, 0)
+
+    def reset(self):
+        """Resets all counters to zero.
+
+        Increments of other threads, which run concurrently, are either counted
+        before or after the reset, but never lost.
+        """
+        with self._lock:
+            self._base = self._sum()
+
+class CallCountingMixin(object):
+    """Counts the calls of the methods decorated with counted, per instance."""
+
+    def __init__(self, *args, **kwargs):
+        """Initiates the CallCountingMixin."""
+        super(CallCountingMixin, self).__init__(*args, **kwargs)
+
+        self.call_counter = ShardedCounter()
+
+    @property
+    def call_count(self):
+        """int: Number of calls of all counted methods."""
+        return sum(self.call_counter.values().values())
+
+    @call_count.setter
+    def call_count(self, value):
+        """Resets the call count to the given value.
+
+        Calls, which are counted concurrently, are counted before or after the reset.
+        """
+        self.call_counter.reset()
+        if value:
+            self.call_counter.increment(None, value)
+
+    def get_call_counts(self):
+        """Returns the number of calls per counted method.
+
+        Returns:
+            dict: Returns a dictionary mapping method names to their number of calls.
+        """
+        return dict((key, value) for key, value in self.call_counter.values().items()
+                    if key is not None)
+
+def counted(method):
+    """Counts the calls of a method of a CallCountingMixin.
+
+    Args:
+        method (callable): Method to be counted.
+
+    Returns:
+        callable: Returns the wrapped method.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        """Counts the call and calls the method."""
+        self.call_counter.increment(name)
+        return method(self, *args, **kwargs)
+
+    return wrapper
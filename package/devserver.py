@@ -0,0 +1,170 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module contains a development server with a bounded thread pool.
+
+Flask's threaded development server starts a new thread for every connection,
+without any limit. The PooledWSGIServer hands the accepted connections to a
+fixed number of threads through a bounded queue instead. While the queue is
+full, the server stops accepting and new connections wait in the backlog of the
+listening socket.
+
+Every connection serves a single request, so an idle client never holds one of
+the threads. The depth of the queue and the time the connections waited in it
+are counted.
+"""
+
+import queue
+import threading
+import time
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from counters import ShardedCounter
+
+class PooledRequestHandler(WSGIRequestHandler):
+    """Serves a single request per connection."""
+
+    protocol_version = "HTTP/1.0"
+
+class PooledWSGIServer(BaseWSGIServer):
+    """A WSGI server handling the connections within a fixed size thread pool."""
+
+    multithread = True
+
+    def __init__(self, host, port, app, threads=8, queue_size=64, **kwargs):
+        """Initiates the PooledWSGIServer and starts its threads.
+
+        Args:
+            host (str):       Interface to listen on.
+            port (int):       Port to listen on.
+            app (callable):   The WSGI application.
+            threads (int):    Number of threads handling the requests.
+            queue_size (int): Maximal number of accepted connections waiting for a thread.
+            **kwargs:         Keyword arguments of werkzeug.serving.BaseWSGIServer.
+        """
+        # the base class calls server_close, when it serves on an inherited socket
+        self.queue    = queue.Queue(queue_size)
+        self.counter  = ShardedCounter()
+        self.stopping = False
+        self.threads  = []
+
+        kwargs.setdefault("handler", PooledRequestHandler)
+        super(PooledWSGIServer, self).__init__(host, port, app, **kwargs)
+
+        self.stopping = False
+        self.threads  = [
+            threading.Thread(target=self.work, name="wsgi-worker-%d" % index)
+            for index in range(threads)]
+
+        for thread in self.threads:
+            thread.daemon = True
+            thread.start()
+
+    def process_request(self, request, client_address):
+        """Queues an accepted connection, waiting while the queue is full."""
+        item = (request, client_address, time.perf_counter())
+
+        try:
+            self.queue.put_nowait(item)
+            return
+        except queue.Full:
+            self.counter.increment("queue_full")
+
+        while not self.stopping:
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+        self.shutdown_request(request)
+
+    def work(self):
+        """Handles queued connections until it receives None."""
+        for request, client_address, queued in iter(self.queue.get, None):
+            self.counter.increment("wait_seconds", time.perf_counter() - queued)
+            self.counter.increment("requests")
+
+            try:
+                self.finish_request(request, client_address)
+            except Exception:   # pylint: disable=broad-except
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def shutdown(self):
+        """Stops the server loop, even while it waits for the queue."""
+        self.stopping = True
+        super(PooledWSGIServer, self).shutdown()
+
+    def server_close(self):
+        """Lets the threads handle the queued connections and closes the socket."""
+        self.stopping = True
+
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+        super(PooledWSGIServer, self).server_close()
+
+    def stats(self):
+        """Returns the state of the pool.
+
+        Returns:
+            dict: Returns a dictionary containing the number of "threads", the
+                "queue_depth", the handled "requests", the total "wait_seconds"
+                and how often the queue was full ("queue_full").
+        """
+        values = self.counter.values()
+
+        return {
+            "threads":      len(self.threads),
+            "queue_depth":  self.queue.qsize(),
+            "requests":     values.get("requests", 0),
+            "wait_seconds": float(values.get("wait_seconds", 0)),
+            "queue_full":   values.get("queue_full", 0)
+        }
+
+    def register_metrics(self, metrics):
+        """Reports the state of the pool with the metrics of the application.
+
+        Args:
+            metrics (metrics.Metrics): The metrics of the application.
+        """
+        metrics.register("dev_server_threads", "gauge",
+                         "Threads of the development server.",
+                         lambda: len(self.threads))
+        metrics.register("dev_server_queue_depth", "gauge",
+                         "Accepted connections waiting for a thread.",
+                         self.queue.qsize)
+        metrics.register("dev_server_queue_wait_seconds_total", "counter",
+                         "Time the connections waited for a thread.",
+                         lambda: self.stats()["wait_seconds"])
+        metrics.register("dev_server_requests_total", "counter",
+                         "Connections handled by the threads.",
+                         lambda: self.stats()["requests"])
+        metrics.register("dev_server_queue_full_total", "counter",
+                         "Connections which found the queue full.",
+                         lambda: self.stats()["queue_full"])
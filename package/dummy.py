@@ -26,15 +26,27 @@
 This file will be removed during initialization.
 """
 
-class Dummy(object):
-    """A dummy class for the project."""
+import operator
+
+try:
+    import numpy
+except ImportError:                                                             # pragma: no cover
+    numpy = None                                                                # pragma: no cover
+
+from counters import CallCountingMixin, counted
+
+class Dummy(CallCountingMixin):
+    """A dummy class for the project.
+
+    Calls are counted per thread and aggregated in call_count, so no call gets
+    lost under concurrent use.
+    """
 
     def __init__(self):
         """Initialized the Dummy."""
         super(Dummy, self).__init__()
 
-        self.call_count = 0
-
+    @counted
     def add_some_values(self, val_a, val_b):
         """Adds the values a and b.
 
@@ -45,11 +57,10 @@ class Dummy(object):
         Returns:
             object: Returns the addition of a and b.
         """
-        self.call_count += 1
-
         result = val_a + val_b
         return result
 
+    @counted
     def concatenate_some_values(self, val_a,  val_b):
         """Concatenated the values and returns the result.
     
@@ -60,6 +71,74 @@ class Dummy(object):
         Returns:
             str: Returns the concatenation of val_a and val_b.
         """
-        self.call_count += 1
-
         return "%s%s" % (val_a, val_b)
+
+    def add_many_values(self, values_a, values_b):
+        """Adds the values of both sequences pairwise.
+
+        NumPy arrays are added with a single vectorized operation, all other
+        sequences element by element like add_some_values.
+
+        Args:
+            values_a (list|numpy.ndarray): First values.
+            values_b (list|numpy.ndarray): Second values.
+
+        Returns:
+            list|numpy.ndarray: Returns the pairwise additions, as an array for array input.
+        """
+        count = check_batch(values_a, values_b)
+        self.call_counter.increment("add_many_values", count)
+
+        if is_array(values_a) or is_array(values_b):
+            return numpy.add(values_a, values_b)
+
+        return list(map(operator.add, values_a, values_b))
+
+    def concatenate_many_values(self, values_a, values_b):
+        """Concatenates the values of both sequences pairwise.
+
+        Args:
+            values_a (list|numpy.ndarray): First values.
+            values_b (list|numpy.ndarray): Second values.
+
+        Returns:
+            list|numpy.ndarray: Returns the pairwise concatenations, as an array of
+                strings for array input.
+        """
+        count = check_batch(values_a, values_b)
+        self.call_counter.increment("concatenate_many_values", count)
+
+        if is_array(values_a) or is_array(values_b):
+            return numpy.char.add(
+                numpy.asarray(values_a).astype(str), numpy.asarray(values_b).astype(str))
+
+        return ["%s%s" % pair for pair in zip(values_a, values_b)]
+
+def is_array(value):
+    """Checks, if value is a NumPy array.
+
+    Args:
+        value (object): Value to be checked.
+
+    Returns:
+        bool: Returns True for NumPy arrays, False without NumPy.
+    """
+    return numpy is not None and isinstance(value, numpy.ndarray)
+
+def check_batch(values_a, values_b):
+    """Checks both sequences to be of the same length.
+
+    Args:
+        values_a (list|numpy.ndarray): First values.
+        values_b (list|numpy.ndarray): Second values.
+
+    Returns:
+        int: Returns the number of pairs.
+
+    Raises:
+        ValueError: Raised if the lengths differ.
+    """
+    if len(values_a) != len(values_b):
+        raise ValueError("Both sequences must be of the same length.")
+
+    return len(values_a)
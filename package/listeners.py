@@ -0,0 +1,201 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module opens the listening sockets, which are not bound to a TCP port.
+
+Behind a reverse proxy on the same host, the servers listen on a Unix domain
+socket instead, which saves the TCP loopback overhead. They can also serve on a
+socket inherited from their parent, either given by its file descriptor or
+passed by systemd's socket activation (LISTEN_PID and LISTEN_FDS).
+"""
+
+import errno
+import os
+import socket
+import stat
+import weakref
+
+# first file descriptor passed by systemd, see sd_listen_fds(3)
+LISTEN_FDS_START = 3
+
+# socket -> (path, identity of the socket file)
+_UNIX_SOCKETS = weakref.WeakKeyDictionary()
+
+def get_systemd_fds(environ=None):
+    """Returns the file descriptors passed by systemd's socket activation.
+
+    Args:
+        environ (dict): Environment variables, defaults to os.environ.
+
+    Returns:
+        list: Returns the file descriptors, empty if they are meant for another process.
+    """
+    environ = os.environ if environ is None else environ
+
+    try:
+        if int(environ.get("LISTEN_PID", "")) != os.getpid():
+            return []
+        count = int(environ.get("LISTEN_FDS", ""))
+    except ValueError:
+        return []
+
+    return list(range(LISTEN_FDS_START, LISTEN_FDS_START + count))
+
+def inherit_socket(descriptor):
+    """Wraps an inherited listening socket.
+
+    Args:
+        descriptor (int): File descriptor of the socket.
+
+    Returns:
+        socket.socket: Returns the socket, its family detected from the descriptor.
+    """
+    return socket.socket(fileno=descriptor)
+
+def bind_unix_socket(path, mode=0o660, backlog=128):
+    """Binds a Unix domain socket and listens on it.
+
+    A stale socket file of a previous run is replaced, but a socket which still
+    accepts connections is not.
+
+    Args:
+        path (str):    Path of the socket file.
+        mode (int):    Permissions of the socket file.
+        backlog (int): Length of the accept queue.
+
+    Returns:
+        socket.socket: Returns the listening socket.
+
+    Raises:
+        OSError: Raised if the path exists and is no stale socket.
+    """
+    try:
+        status = os.stat(path)
+    except FileNotFoundError:
+        pass
+    else:
+        if not stat.S_ISSOCK(status.st_mode):
+            raise OSError(errno.EEXIST, "%s exists and is no socket" % path)
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except OSError:
+            os.remove(path)
+        else:
+            raise OSError(errno.EADDRINUSE, "%s is in use" % path)
+        finally:
+            probe.close()
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    # no other user may connect between bind and chmod
+    umask = os.umask(0o777)
+    try:
+        sock.bind(path)
+    except OSError:
+        sock.close()
+        raise
+    finally:
+        os.umask(umask)
+
+    os.chmod(path, mode)
+    sock.listen(backlog)
+    _UNIX_SOCKETS[sock] = (path, get_identity(path))
+
+    return sock
+
+def get_identity(path):
+    """Identifies a file, even if it was replaced by a file of the same inode.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        tuple: Returns a tuple, containing (device, inode, ctime_ns).
+    """
+    status = os.stat(path)
+    return status.st_dev, status.st_ino, status.st_ctime_ns
+
+def open_listener(config, environ=None):
+    """Opens the socket configured instead of the TCP port.
+
+    Args:
+        config (config.ServerConfig): Configuration of the server.
+        environ (dict):               Environment variables, defaults to os.environ.
+
+    Returns:
+        socket.socket: Returns the inherited or the Unix domain socket, None to
+            listen on the TCP port.
+    """
+    if config.fd >= 0:
+        return inherit_socket(config.fd)
+
+    fds = get_systemd_fds(environ)
+    if fds:
+        return inherit_socket(fds[0])
+
+    if config.unix_socket:
+        return bind_unix_socket(config.unix_socket, config.unix_socket_mode, config.backlog)
+
+    return None
+
+def close_listener(sock):
+    """Closes a socket opened by open_listener and removes its socket file.
+
+    The file is removed only if it was bound by this process and was not replaced
+    in the meantime.
+
+    Args:
+        sock (socket.socket): The socket, may be None.
+    """
+    if sock is None:
+        return
+
+    path, identity = _UNIX_SOCKETS.pop(sock, (None, None))
+    sock.close()
+
+    if path is None:
+        return
+
+    try:
+        if get_identity(path) == identity:
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def get_server_address(sock):
+    """Returns the address of a listening socket in the form werkzeug expects.
+
+    Args:
+        sock (socket.socket): The listening socket.
+
+    Returns:
+        tuple: Returns a tuple, containing (host, port). The host of a Unix domain
+            socket is "unix://<path>".
+    """
+    if sock.family == socket.AF_UNIX:
+        return "unix://%s" % sock.getsockname(), 0
+
+    address = sock.getsockname()
+    return address[0], address[1]
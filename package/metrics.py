@@ -0,0 +1,185 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module records request metrics and renders them for Prometheus.
+
+The metrics are recorded per process in sharded counters, so recording a
+request does not take any lock. Pre-forked workers report their own metrics.
+"""
+
+import bisect
+import time
+
+from counters import ShardedCounter
+from warmup import WARMUP_REQUEST
+
+UNMATCHED = "<unmatched>"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Metrics(object):
+    """Records per route latency histograms, in-flight requests and exceptions."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """Initiates the Metrics.
+
+        Args:
+            buckets (tuple): Sorted upper bounds of the latency histogram in seconds.
+        """
+        super(Metrics, self).__init__()
+
+        self.buckets    = tuple(buckets)
+        self.latencies  = ShardedCounter()
+        self.in_flight  = ShardedCounter()
+        self.exceptions = ShardedCounter()
+        self.collectors = []
+
+    def start(self):
+        """Records the start of a request.
+
+        Returns:
+            float: Returns the start time, to be passed to finish.
+        """
+        self.in_flight.increment()
+        return time.perf_counter()
+
+    def finish(self, route, start, exception=None):
+        """Records the end of a request.
+
+        Args:
+            route (str):          Rule of the route, e.g. "/get/version".
+            start (float):        Start time returned by start.
+            exception (Exception): Exception raised by the handler, if any.
+        """
+        duration = time.perf_counter() - start
+
+        self.in_flight.decrement()
+        self.latencies.increment(("bucket", route, bisect.bisect_left(self.buckets, duration)))
+        self.latencies.increment(("sum", route), duration)
+        self.latencies.increment(("count", route))
+
+        if exception is not None:
+            self.exceptions.increment((route, type(exception).__name__))
+
+    def register(self, name, kind, description, collect):
+        """Registers a value, which is collected whenever the metrics are rendered.
+
+        Args:
+            name (str):         Name of the metric.
+            kind (str):         Prometheus type of the metric, e.g. "gauge".
+            description (str):  Help text of the metric.
+            collect (callable): Function returning the current value.
+        """
+        self.collectors.append((name, kind, description, collect))
+
+    def render(self):
+        """Renders all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Returns the metrics.
+        """
+        latencies = self.latencies.values()
+        routes = sorted(set(key[1] for key in latencies))
+
+        lines = [
+            "# HELP http_request_duration_seconds Latency of the requests per route.",
+            "# TYPE http_request_duration_seconds histogram"
+        ]
+
+        for route in routes:
+            cumulative = 0
+            for index, bound in enumerate(self.buckets + (float("inf"),)):
+                cumulative += latencies.get(("bucket", route, index), 0)
+                lines.append('http_request_duration_seconds_bucket{route="%s",le="%s"} %d' % (
+                    escape(route), "+Inf" if index == len(self.buckets) else repr(bound),
+                    cumulative))
+
+            lines.append('http_request_duration_seconds_sum{route="%s"} %r' % (
+                escape(route), float(latencies.get(("sum", route), 0))))
+            lines.append('http_request_duration_seconds_count{route="%s"} %d' % (
+                escape(route), latencies.get(("count", route), 0)))
+
+        lines.extend([
+            "# HELP http_requests_in_flight Number of requests currently being handled.",
+            "# TYPE http_requests_in_flight gauge",
+            "http_requests_in_flight %d" % self.in_flight.value(),
+            "# HELP http_request_exceptions_total Exceptions raised by the handlers.",
+            "# TYPE http_request_exceptions_total counter"
+        ])
+
+        for (route, exception), count in sorted(self.exceptions.values().items()):
+            lines.append('http_request_exceptions_total{route="%s",exception="%s"} %d' % (
+                escape(route), escape(exception), count))
+
+        for name, kind, description, collect in self.collectors:
+            lines.extend([
+                "# HELP %s %s" % (name, description),
+                "# TYPE %s %s" % (name, kind),
+                "%s %s" % (name, collect())
+            ])
+
+        return "\n".join(lines) + "\n"
+
+def escape(value):
+    """Escapes a Prometheus label value.
+
+    Args:
+        value (str): Label value.
+
+    Returns:
+        str: Returns the escaped value.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def instrument(app, metrics=None):
+    """Records the metrics of every request handled by the Flask application.
+
+    Args:
+        app (flask.Flask):        Application to be instrumented.
+        metrics (metrics.Metrics): Metrics to record into, a new instance by default.
+
+    Returns:
+        metrics.Metrics: Returns the metrics of the application.
+    """
+    from flask import g, request
+
+    metrics = metrics or Metrics()
+    app.extensions["metrics"] = metrics
+
+    @app.before_request
+    def start_request_timer():
+        """Records the start of the request, unless it warms up the application."""
+        if not request.environ.get(WARMUP_REQUEST):
+            g.metrics_start = metrics.start()
+
+    @app.teardown_request
+    def finish_request_timer(exception):
+        """Records the end of the request."""
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return
+
+        route = request.url_rule.rule if request.url_rule is not None else UNMATCHED
+        metrics.finish(route, start, exception)
+
+    return metrics
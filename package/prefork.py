@@ -0,0 +1,289 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module pre-forks worker processes and supervises them.
+
+The supervisor respawns crashed workers, replaces all workers one by one on
+SIGHUP and forwards SIGTERM/SIGINT to its workers for a graceful shutdown.
+SIGUSR2 is forwarded as is, e.g. to toggle the profiler of every worker.
+
+Workers ignore SIGINT until they install a handler of their own, so Ctrl-C in
+a terminal, which signals the whole process group, does not kill them in the
+middle of a request. Crashed workers are respawned with an exponential backoff
+and the supervisor gives up, once too many crashes happened within a sliding
+window.
+"""
+
+import collections
+import multiprocessing
+import os
+import signal
+import sys
+import time
+import traceback
+
+class RestartPolicy(object):
+    """Counts the crashes within a sliding window and backs off the respawns."""
+
+    def __init__(self, max_restarts=10, window=60.0, backoff=0.1, max_backoff=10.0):
+        """Initiates the RestartPolicy.
+
+        Args:
+            max_restarts (int):  Number of crashes tolerated within the window.
+            window (float):      Length of the sliding window in seconds.
+            backoff (float):     Delay of the respawn after the first crash in seconds,
+                                 doubled with every further crash within the window.
+            max_backoff (float): Upper bound of the delay in seconds.
+        """
+        super(RestartPolicy, self).__init__()
+
+        self.max_restarts = max_restarts
+        self.window       = window
+        self.backoff      = backoff
+        self.max_backoff  = max_backoff
+        self.crashes      = collections.deque()
+
+    def count(self, now=None):
+        """Returns the number of crashes within the window.
+
+        Args:
+            now (float): Current time.monotonic(), defaults to now.
+
+        Returns:
+            int: Returns the number of crashes.
+        """
+        now = time.monotonic() if now is None else now
+
+        while self.crashes and self.crashes[0] <= now - self.window:
+            self.crashes.popleft()
+
+        return len(self.crashes)
+
+    def record_crash(self, now=None):
+        """Records a crash and returns the delay before the respawn.
+
+        Args:
+            now (float): Current time.monotonic(), defaults to now.
+
+        Returns:
+            float: Returns the delay in seconds or None, if there were too many crashes.
+        """
+        now = time.monotonic() if now is None else now
+        self.crashes.append(now)
+
+        crashes = self.count(now)
+        if crashes > self.max_restarts:
+            return None
+
+        return min(self.max_backoff, self.backoff * 2 ** (crashes - 1))
+
+class Supervisor(object):  # pylint: disable=too-many-instance-attributes
+    """Forks a number of workers and keeps them alive."""
+
+    poll_interval = 0.1
+
+    def __init__(self, worker, workers=None, policy=None, grace_period=30.0):
+        """Initiates the Supervisor.
+
+        Args:
+            worker (callable):              Function executed by each worker. It
+                                            receives the id of the worker and should
+                                            serve until SIGTERM.
+            workers (int):                  Number of workers, defaults to the number
+                                            of CPUs.
+            policy (prefork.RestartPolicy): Policy for crashed workers, a new instance
+                                            by default.
+            grace_period (float):           Seconds to wait for workers before killing
+                                            them.
+        """
+        super(Supervisor, self).__init__()
+
+        self.worker       = worker
+        self.workers      = workers or multiprocessing.cpu_count()
+        self.policy       = policy or RestartPolicy()
+        self.grace_period = grace_period
+
+        self.children     = {}
+        self.retiring     = set()
+        self.pending      = {}
+        self.stopping     = False
+        self.reloading    = False
+
+    def spawn(self, worker_id):
+        """Forks a new worker.
+
+        Args:
+            worker_id (int): Id of the worker, between 0 and workers - 1.
+
+        Returns:
+            int: Returns the process id of the worker.
+        """
+        pid = os.fork()
+
+        if pid == 0:                                                # pragma: no cover
+            for signum in (signal.SIGHUP, signal.SIGTERM):
+                signal.signal(signum, signal.SIG_DFL)
+            # ignored until the worker installs its own handler, the supervisor
+            # sends SIGTERM on SIGINT anyway
+            for signum in (signal.SIGINT, signal.SIGUSR2):
+                signal.signal(signum, signal.SIG_IGN)
+
+            exit_code = 0
+            try:
+                self.worker(worker_id)
+            except BaseException:   # pylint: disable=broad-except
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(exit_code)     # pylint: disable=protected-access
+
+        self.children[pid] = worker_id
+        return pid
+
+    def stop(self, *_):
+        """Requests a graceful shutdown of all workers."""
+        self.stopping = True
+
+    def reload(self, *_):
+        """Requests a graceful restart of all workers."""
+        self.reloading = True
+
+    def forward(self, signum, _):
+        """Forwards a received signal to all workers."""
+        self.signal_children(signum)
+
+    def signal_children(self, signum, pids=None):
+        """Sends a signal to the given or all workers.
+
+        Args:
+            signum (int): Signal to be sent.
+            pids (list):  Process ids to signal, defaults to all workers.
+        """
+        for pid in list(self.children if pids is None else pids):
+            try:
+                os.kill(pid, signum)
+            except OSError:                                         # pragma: no cover
+                pass
+
+    def restart_workers(self):
+        """Replaces every worker by a new one, before stopping the old one."""
+        self.reloading = False
+
+        for pid, worker_id in list(self.children.items()):
+            if pid in self.retiring:
+                continue
+
+            self.spawn(worker_id)
+            self.retiring.add(pid)
+            self.signal_children(signal.SIGTERM, [pid])
+
+    def reap(self, pid, status):
+        """Handles the exit of a worker and schedules its respawn, if required.
+
+        Args:
+            pid (int):    Process id of the worker.
+            status (int): Exit status as returned by os.waitpid.
+
+        Raises:
+            RuntimeError: Raised if workers crashed too often within the window of
+                the restart policy.
+        """
+        worker_id = self.children.pop(pid, None)
+        if worker_id is None:
+            return
+
+        if pid in self.retiring:
+            self.retiring.discard(pid)
+            return
+
+        if self.stopping:
+            return
+
+        delay = 0.0
+        if os.WIFSIGNALED(status) or os.WEXITSTATUS(status) != 0:
+            delay = self.policy.record_crash()
+            if delay is None:
+                self.stopping = True
+                self.signal_children(signal.SIGTERM)
+                self.wait_for_children()
+                raise RuntimeError("Too many worker crashes, giving up.")
+
+        self.pending[worker_id] = time.monotonic() + delay
+
+    def spawn_pending(self):
+        """Respawns the workers, whose backoff elapsed."""
+        now = time.monotonic()
+
+        for worker_id, due in list(self.pending.items()):
+            if due <= now:
+                del self.pending[worker_id]
+                self.spawn(worker_id)
+
+    def wait_for_children(self):
+        """Waits grace_period seconds for all workers, killing the remaining ones."""
+        deadline = time.time() + self.grace_period
+
+        while self.children:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                self.children.pop(pid, None)
+                continue
+
+            if time.time() > deadline:
+                self.signal_children(signal.SIGKILL)
+                deadline = float("inf")
+
+            time.sleep(self.poll_interval)
+
+    def run(self):
+        """Starts the workers and supervises them until a shutdown is requested."""
+        handlers = {
+            signal.SIGTERM: signal.signal(signal.SIGTERM, self.stop),
+            signal.SIGINT:  signal.signal(signal.SIGINT, self.stop),
+            signal.SIGHUP:  signal.signal(signal.SIGHUP, self.reload),
+            signal.SIGUSR2: signal.signal(signal.SIGUSR2, self.forward)
+        }
+
+        try:
+            for worker_id in range(self.workers):
+                self.spawn(worker_id)
+
+            while not self.stopping:
+                if self.reloading:
+                    self.restart_workers()
+                self.spawn_pending()
+
+                # all workers may be waiting for their backoff
+                pid, status = os.waitpid(-1, os.WNOHANG) if self.children else (0, 0)
+                if pid:
+                    self.reap(pid, status)
+                else:
+                    time.sleep(self.poll_interval)
+
+            self.signal_children(signal.SIGTERM)
+            self.wait_for_children()
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
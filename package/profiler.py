@@ -0,0 +1,218 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module contains a sampling profiler for live workers.
+
+The profiler is idle until it is started for a bounded window, by SIGUSR2 or by
+the /admin/profile route. While running, a background thread samples the stacks
+of all other threads and, at the end of the window, writes them in the collapsed
+stack format of flamegraph.pl to profile-<pid>-<time>.folded, one file per worker.
+"""
+
+import collections
+import hmac
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+
+class SamplingProfiler(object):
+    """Samples the stacks of all threads of the process for a bounded window."""
+
+    def __init__(self, directory=None, interval=0.005, max_duration=60.0):
+        """Initiates the SamplingProfiler.
+
+        Args:
+            directory (str):      Directory for the profiles, defaults to
+                                  $PROFILE_DIRECTORY or the temporary directory.
+            interval (float):     Seconds between two samples.
+            max_duration (float): Maximal length of a window in seconds.
+        """
+        super(SamplingProfiler, self).__init__()
+
+        self.directory    = directory or os.environ.get("PROFILE_DIRECTORY") or \
+                            tempfile.gettempdir()
+        self.interval     = interval
+        self.max_duration = max_duration
+        self.last_profile = None
+
+        self._lock    = threading.Lock()
+        self._thread  = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self):
+        """bool: Whether a window is currently sampled."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration=None):
+        """Starts a sampling window, unless one is running already.
+
+        Args:
+            duration (float): Length of the window in seconds, at most max_duration.
+
+        Returns:
+            bool: Returns True, if a new window was started.
+        """
+        duration = min(duration or self.max_duration, self.max_duration)
+
+        with self._lock:
+            if self.running:
+                return False
+
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(
+                target=self.sample, args=(duration, self._stopped), name="sampling-profiler")
+            self._thread.daemon = True
+            self._thread.start()
+
+        return True
+
+    def stop(self):
+        """Ends the running window early. Its profile is written nevertheless."""
+        self._stopped.set()
+
+    def toggle(self):
+        """Starts a window or ends the running one."""
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+    def join(self, timeout=None):
+        """Waits for the running window to end.
+
+        Args:
+            timeout (float): Seconds to wait at most.
+        """
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def sample(self, duration, stopped):
+        """Samples the stacks until the window ends and writes the profile.
+
+        Args:
+            duration (float):          Length of the window in seconds.
+            stopped (threading.Event): Event ending the window early.
+        """
+        stacks = collections.Counter()
+        own = threading.current_thread().ident
+        deadline = time.time() + duration
+
+        while not stopped.wait(self.interval) and time.time() < deadline:
+            for ident, frame in sys._current_frames().items():   # pylint: disable=protected-access
+                if ident != own:
+                    stacks[collapse(frame)] += 1
+
+        self.last_profile = self.dump(stacks)
+
+    def dump(self, stacks):
+        """Writes the sampled stacks in the collapsed stack format.
+
+        Args:
+            stacks (collections.Counter): Number of samples per collapsed stack.
+
+        Returns:
+            str: Returns the path of the profile.
+        """
+        path = os.path.join(self.directory, "profile-%d-%s.folded" % (
+            os.getpid(), time.strftime("%Y%m%d-%H%M%S")))
+
+        with open(path, "w") as outfile:
+            outfile.writelines("%s %d\n" % item for item in sorted(stacks.items()))
+
+        return path
+
+def collapse(frame):
+    """Collapses a stack into a single line, from the outermost to the innermost frame.
+
+    Args:
+        frame (frame): Innermost frame of the stack.
+
+    Returns:
+        str: Returns the functions of the stack, separated by semicolons.
+    """
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append("%s (%s:%d)" % (
+            code.co_name, os.path.basename(code.co_filename), code.co_firstlineno))
+        frame = frame.f_back
+
+    return ";".join(reversed(names))
+
+def install_signal_handler(profiler, signum=signal.SIGUSR2):
+    """Toggles the profiler, whenever the process receives signum.
+
+    The signal handler only writes a byte to a pipe, a thread reading the pipe
+    toggles the profiler. The handler runs in the main thread, which may hold
+    the lock of the profiler when it is interrupted, so taking it there could
+    deadlock.
+
+    Args:
+        profiler (profiler.SamplingProfiler): The profiler to be toggled.
+        signum (int):                         The signal, SIGUSR2 by default.
+
+    Returns:
+        threading.Thread: Returns the thread toggling the profiler.
+    """
+    reader, writer = os.pipe()
+    os.set_blocking(writer, False)
+
+    def toggle_on_signal():
+        """Toggles the profiler for every byte written by the signal handler."""
+        while os.read(reader, 1):
+            profiler.toggle()
+
+    def handle_signal(*_):
+        """Wakes up the toggling thread."""
+        try:
+            os.write(writer, b"\0")
+        except BlockingIOError:
+            pass
+
+    thread = threading.Thread(target=toggle_on_signal, name="profiler-signal")
+    thread.daemon = True
+    thread.start()
+
+    signal.signal(signum, handle_signal)
+
+    return thread
+
+def is_authorized(authorization, token):
+    """Checks the Authorization header of a request to an admin route.
+
+    Args:
+        authorization (str): Value of the Authorization header.
+        token (str):         The admin token.
+
+    Returns:
+        bool: Returns True, if the header contains the bearer token.
+    """
+    if not token or not authorization:
+        return False
+
+    return hmac.compare_digest(authorization.encode("utf-8"), ("Bearer %s" % token).encode("utf-8"))
@@ -0,0 +1,148 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module encodes the payloads of the service routes.
+
+JSON is encoded by orjson, if it is installed, and by the json module of the
+standard library otherwise. Internal callers may ask for MessagePack with
+"Accept: application/msgpack", if msgpack is installed. Further encoders are
+plugged in with register_encoder.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON    = "application/json"
+MSGPACK = "application/msgpack"
+
+ENCODERS = {}
+
+def encode_json(data):
+    """Encodes data as compact JSON with sorted keys, using the standard library.
+
+    Args:
+        data (object): Data to be encoded.
+
+    Returns:
+        bytes: Returns the UTF-8 encoded JSON.
+    """
+    return json.dumps(
+        data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("UTF-8")
+
+def encode_orjson(data):
+    """Encodes data as compact JSON with sorted keys, using orjson.
+
+    Args:
+        data (object): Data to be encoded.
+
+    Returns:
+        bytes: Returns the UTF-8 encoded JSON.
+    """
+    return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+
+def encode_msgpack(data):
+    """Encodes data as MessagePack.
+
+    Args:
+        data (object): Data to be encoded.
+
+    Returns:
+        bytes: Returns the packed data.
+    """
+    return msgpack.packb(data, use_bin_type=True)
+
+def register_encoder(mimetype, encoder):
+    """Registers the encoder of a mimetype, replacing the current one.
+
+    Args:
+        mimetype (str):     The mimetype, e.g. "application/json".
+        encoder (callable): Function encoding data to bytes.
+    """
+    ENCODERS[mimetype] = encoder
+
+def encode(data, mimetype=JSON):
+    """Encodes data with the encoder of the mimetype.
+
+    Args:
+        data (object):  Data to be encoded.
+        mimetype (str): The mimetype, JSON by default.
+
+    Returns:
+        bytes: Returns the encoded data.
+
+    Raises:
+        KeyError: Raised if there is no encoder for the mimetype.
+    """
+    return ENCODERS[mimetype](data)
+
+def negotiate(accept):
+    """Chooses the mimetype of a response.
+
+    Args:
+        accept (str): Accept header of the request.
+
+    Returns:
+        str: Returns the best registered mimetype accepted by the client, JSON
+            if there is none or the client accepts anything.
+    """
+    if not accept:
+        return JSON
+
+    from werkzeug.datastructures import MIMEAccept
+    from werkzeug.http import parse_accept_header
+
+    mimetypes = [JSON] + sorted(mimetype for mimetype in ENCODERS if mimetype != JSON)
+    return parse_accept_header(accept, MIMEAccept).best_match(mimetypes, default=JSON)
+
+def make_response(data, accept=None, status=200):
+    """Creates a Flask response, encoded as accepted by the client.
+
+    Args:
+        data (object): Data to be encoded.
+        accept (str):  Accept header of the request.
+        status (int):  Status code of the response.
+
+    Returns:
+        flask.Response: Returns the response.
+    """
+    from flask import Response
+
+    mimetype = negotiate(accept)
+    response = Response(encode(data, mimetype), status=status, mimetype=mimetype)
+    response.vary.add("Accept")
+
+    return response
+
+register_encoder(JSON, encode_orjson if orjson is not None else encode_json)
+
+if msgpack is not None:
+    register_encoder(MSGPACK, encode_msgpack)
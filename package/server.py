@@ -0,0 +1,138 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module contains the Tornado HTTP server used in production mode."""
+
+from tornado.httpserver import HTTPServer
+from tornado.iostream import IOStream
+from tornado.netutil import add_accept_handler
+
+class BoundedHTTPServer(HTTPServer):
+    """An HTTPServer, which stops accepting at a maximal number of connections.
+
+    While the limit is reached, new connections wait in the accept queue of the
+    listening socket instead of being accepted, which applies backpressure to
+    the clients and the load balancer.
+
+    The server registers its own accept handlers and counts its connections
+    itself, so it only relies on the public interface of Tornado. TLS is not
+    supported, it is terminated by the load balancer.
+    """
+
+    max_connections = 0
+    connections     = 0
+    accepting       = False
+    stopped         = False
+    listening       = None
+    remove_handlers = None
+
+    def initialize(self, *args, **kwargs):   # pylint: disable=arguments-differ
+        """Initiates the BoundedHTTPServer.
+
+        Args:
+            max_connections (int): Maximal number of open connections, 0 for no limit.
+            *args:                 Arguments of tornado.httpserver.HTTPServer.
+            **kwargs:              Keyword arguments of tornado.httpserver.HTTPServer.
+
+        Raises:
+            ValueError: Raised if ssl_options are given.
+        """
+        if kwargs.get("ssl_options") is not None:
+            raise ValueError("BoundedHTTPServer does not support TLS")
+
+        self.max_connections = kwargs.pop("max_connections", 0)
+        self.connections     = 0
+        self.accepting       = True
+        self.stopped         = False
+        self.listening       = []
+        self.remove_handlers = []
+
+        super(BoundedHTTPServer, self).initialize(*args, **kwargs)
+
+    def add_sockets(self, sockets):
+        """Starts accepting connections on the given sockets.
+
+        Args:
+            sockets (list): Listening sockets.
+        """
+        sockets = list(sockets)
+        self.listening.extend(sockets)
+
+        if self.accepting:
+            for sock in sockets:
+                self.remove_handlers.append(add_accept_handler(sock, self.accept))
+
+    def accept(self, connection, address):
+        """Serves an accepted connection.
+
+        Args:
+            connection (socket.socket): Accepted connection.
+            address (tuple):            Address of the client.
+        """
+        stream = IOStream(connection, max_buffer_size=self.max_buffer_size,
+                          read_chunk_size=self.read_chunk_size)
+        self.handle_stream(stream, address)
+
+    def handle_stream(self, stream, address):
+        """Serves a new connection and pauses accepting at the limit."""
+        super(BoundedHTTPServer, self).handle_stream(stream, address)
+        self.connections += 1
+
+        if self.max_connections and self.connections >= self.max_connections:
+            self.pause_accepting()
+
+    def on_close(self, server_conn):
+        """Forgets a closed connection and resumes accepting below the limit."""
+        super(BoundedHTTPServer, self).on_close(server_conn)
+        self.connections -= 1
+
+        if (not self.accepting and not self.stopped
+                and self.connections < self.max_connections):
+            self.resume_accepting()
+
+    def pause_accepting(self):
+        """Stops accepting new connections on all sockets."""
+        self.accepting = False
+
+        for remove_handler in self.remove_handlers:
+            remove_handler()
+        del self.remove_handlers[:]
+
+    def resume_accepting(self):
+        """Accepts new connections on all sockets again."""
+        self.accepting = True
+
+        for sock in self.listening:
+            self.remove_handlers.append(add_accept_handler(sock, self.accept))
+
+    def stop(self):
+        """Stops listening and closes the sockets, also while accepting is paused."""
+        if self.stopped:
+            return
+        self.stopped = True
+
+        self.pause_accepting()
+        for sock in self.listening:
+            sock.close()
+
+        super(BoundedHTTPServer, self).stop()
@@ -26,36 +26,33 @@
 These endpoints are wrapped as functions for reusability.
 """
 
-import datetime
-import sys
+import hashlib
+
+import serialization
+import version
+from singleflight import SingleFlight
+
+SITEMAP_EXCLUDES = ("/", "/static/<path:filename>", "/admin/profile")
+
+# concurrent requests for a sitemap, which is not built yet, share a single build
+sitemap_flight = SingleFlight()
 
 def get_version():
     """Returns a readable version of the application.
 
+    The version metadata is read from the git checkout once per process.
+
     Returns:
         str: Returns the version of the application.
     """
-    if sys.version_info >= (3, 0):
-        import subprocess
-        getoutput = subprocess.getstatusoutput
-    else:                                       # pragma: no cover
-        import commands                         # pragma: no cover
-        getoutput = commands.getstatusoutput    # pragma: no cover
-
-    data = {
-        "branch": getoutput("git rev-parse --abbrev-ref HEAD")[1],
-        "hash":   getoutput("git rev-parse --short HEAD")[1],
-        "date":   datetime.datetime.fromtimestamp(
-            int(
-                getoutput("git show -s --format=%ct HEAD")[1]
-            )).strftime("%Y%m%d.%H%M%S")
-    }
-
-    return """v0.%(date)s (%(hash)s-%(branch)s)""" % data
-
-def get_sitemap(app, excludes=("/", "/static/<path:filename>")):
+    return """v0.%(date)s (%(hash)s-%(branch)s)""" % version.get_version_info()
+
+def get_sitemap(app, excludes=SITEMAP_EXCLUDES):
     """Returns a sitemap for the given application.
 
+    The sitemap is computed once per application and excludes and is invalidated
+    automatically, whenever a new rule is added to the application's url_map.
+
     Args:
         app (flask.Flask): Application to be scanned.
         excludes (tuple):  Tuple of endpoints to be hidden.
@@ -68,17 +65,123 @@ def get_sitemap(app, excludes=("/", "/static/<path:filename>")):
                 {"url": "/username", "methods": ["GET", "POST"]}
             ]
     """
+    return list(get_sitemap_document(app, excludes)["sitemap"])
+
+def get_sitemap_json(app, excludes=SITEMAP_EXCLUDES):
+    """Returns the sitemap for the given application, encoded as JSON.
+
+    Args:
+        app (flask.Flask): Application to be scanned.
+        excludes (tuple):  Tuple of endpoints to be hidden.
+
+    Returns:
+        tuple: Returns a tuple, containing (json_bytes, etag).
+    """
+    return get_sitemap_body(app, excludes, serialization.JSON)
+
+def get_sitemap_body(app, excludes=SITEMAP_EXCLUDES, mimetype=serialization.JSON):
+    """Returns the sitemap for the given application, encoded as mimetype.
+
+    Every encoding is computed once per sitemap.
+
+    Args:
+        app (flask.Flask): Application to be scanned.
+        excludes (tuple):  Tuple of endpoints to be hidden.
+        mimetype (str):    Mimetype of a registered encoder, see serialization.
+
+    Returns:
+        tuple: Returns a tuple, containing (body, etag).
+    """
+    document = get_sitemap_document(app, excludes)
+    bodies = document["bodies"]
+
+    if mimetype not in bodies:
+        body = serialization.encode(document["sitemap"], mimetype)
+        bodies[mimetype] = (body, hashlib.sha1(body).hexdigest())
+
+    return bodies[mimetype]
+
+def get_sitemap_document(app, excludes):
+    """Returns the cached sitemap document, building it if required.
+
+    Concurrent calls, which miss the cache, share a single build.
+
+    Args:
+        app (flask.Flask): Application to be scanned.
+        excludes (tuple):  Tuple of endpoints to be hidden.
+
+    Returns:
+        dict: Returns a dictionary containing the "sitemap" and its encoded "bodies".
+    """
+    watch_url_map(app)
+
+    cache = app.extensions.setdefault("sitemap", {})
+    key = tuple(excludes)
+
+    document = cache.get(key)
+    if document is None:
+        document = sitemap_flight.call((id(app), key), build_sitemap_document, app, excludes)
+        cache[key] = document
+
+    return document
+
+def build_sitemap_document(app, excludes):
+    """Builds a sitemap document without encoded bodies.
+
+    Args:
+        app (flask.Flask): Application to be scanned.
+        excludes (tuple):  Tuple of endpoints to be hidden.
+
+    Returns:
+        dict: Returns a dictionary containing the "sitemap" and its encoded "bodies".
+    """
+    return {"sitemap": build_sitemap(app, frozenset(excludes)), "bodies": {}}
+
+def build_sitemap(app, excludes):
+    """Scans the rules of the given application.
+
+    Args:
+        app (flask.Flask):    Application to be scanned.
+        excludes (frozenset): Endpoints to be hidden.
+
+    Returns:
+        list: Returns the sitemap, sorted by url.
+    """
     endpoints = []
     for rule in app.url_map.iter_rules():
-        if str(rule) in excludes:
+        url = str(rule)
+        if url in excludes:
             continue
 
-        endpoint = {}
-        endpoint["url"]     = str(rule)
-        endpoint["methods"] = ",".join(rule.methods)
-
-        endpoints.append(endpoint)
+        endpoints.append({
+            "url":     url,
+            "methods": sorted(rule.methods)
+        })
 
     endpoints.sort(key= lambda i: i["url"])
 
     return endpoints
+
+def watch_url_map(app):
+    """Invalidates the cached sitemaps and routes of app whenever a rule is added.
+
+    Args:
+        app (flask.Flask): Application to be watched.
+    """
+    url_map = app.url_map
+    if getattr(url_map, "sitemap_watched", False):
+        return
+
+    add_rule = url_map.add
+
+    def add_and_invalidate(rulefactory):
+        """Adds the rule and drops all cached sitemaps and routes."""
+        add_rule(rulefactory)
+        app.extensions.pop("sitemap", None)
+
+        app_cache = app.extensions.get("cache")
+        if app_cache is not None:
+            app_cache.invalidate()
+
+    url_map.add = add_and_invalidate
+    url_map.sitemap_watched = True
@@ -0,0 +1,194 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module coalesces concurrent calls of expensive functions.
+
+While a call is in flight, every other caller with the same key waits for its
+result instead of repeating the work. Nothing is cached: once the call returns,
+the next caller starts a new one.
+
+Threads, like the ones of the development server and the WSGI thread pools,
+use SingleFlight.call. Coroutines on an asyncio loop, like the Tornado handlers,
+use SingleFlight.call_async, which runs the function once within an executor and
+lets all other coroutines await the same future without blocking the loop.
+
+Waiting threads give up on a call, which takes longer than the timeout of the
+SingleFlight, and call the function themselves, so a hanging call can't hang
+all of its followers.
+"""
+
+import functools
+import threading
+
+from cache import make_key
+from counters import ShardedCounter
+
+class _Call(object):     # pylint: disable=too-few-public-methods
+    """A call in flight."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        """Initiates the _Call."""
+        self.done   = threading.Event()
+        self.result = None
+        self.error  = None
+
+class SingleFlight(object):
+    """Executes concurrent calls with the same key only once."""
+
+    def __init__(self, timeout=30.0):
+        """Initiates the SingleFlight.
+
+        Args:
+            timeout (float): Seconds a thread waits for the call in flight, before
+                             it calls the function itself, None to wait forever.
+        """
+        super(SingleFlight, self).__init__()
+
+        self.timeout  = timeout
+        self.counter  = ShardedCounter()
+
+        self._lock    = threading.Lock()
+        self._calls   = {}
+        self._futures = {}
+
+    def call(self, key, function, *args, **kwargs):
+        """Calls the function, unless a call with the same key is in flight.
+
+        Args:
+            key (object):        Hashable key of the call.
+            function (callable): Function to be called.
+            *args:               Positional arguments of the function.
+            **kwargs:            Keyword arguments of the function.
+
+        Returns:
+            object: Returns the result of the call in flight.
+
+        Raises:
+            Exception: Raises the exception of the call in flight.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                self.counter.increment("timeouts")
+                return function(*args, **kwargs)
+
+            self.counter.increment("coalesced")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        self.counter.increment("calls")
+        try:
+            call.result = function(*args, **kwargs)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    async def call_async(self, key, function, *args, executor=None):
+        """Runs the function within the executor, unless a call with the same key is in flight.
+
+        The call is coalesced with the other coroutines on the running loop and,
+        through call, with the threads calling the function.
+
+        Args:
+            key (object):        Hashable key of the call.
+            function (callable): Blocking function to be called.
+            *args:               Positional arguments of the function.
+            executor (concurrent.futures.Executor): Executor, the loop's default by default.
+
+        Returns:
+            object: Returns the result of the call in flight.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        future_key = (loop, key)
+
+        future = self._futures.get(future_key)
+        if future is None:
+            future = loop.run_in_executor(
+                executor, functools.partial(self.call, key, function, *args))
+            self._futures[future_key] = future
+            future.add_done_callback(lambda _: self._futures.pop(future_key, None))
+        else:
+            self.counter.increment("coalesced")
+
+        # a cancelled caller must not cancel the call of the others
+        return await asyncio.shield(future)
+
+    def stats(self):
+        """Returns the number of executed and coalesced calls.
+
+        Returns:
+            dict: Returns a dictionary containing "calls", "coalesced" and the
+                "timeouts" of the threads, which called the function themselves.
+        """
+        values = self.counter.values()
+        return dict((key, values.get(key, 0)) for key in ("calls", "coalesced", "timeouts"))
+
+def coalesced(flight=None):
+    """Coalesces concurrent calls of a function with equal arguments.
+
+    The decorated function gets a "flight" attribute and a coroutine function
+    "call_async", which takes the executor followed by the arguments.
+
+    Args:
+        flight (singleflight.SingleFlight): Shared SingleFlight, a new one by default.
+
+    Returns:
+        callable: Returns the decorator.
+    """
+    flight = flight if flight is not None else SingleFlight()
+
+    def decorator(function):
+        """Wraps the function."""
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            """Joins the call in flight or calls the function."""
+            return flight.call(make_key(function, args, kwargs), function, *args, **kwargs)
+
+        async def call_async(executor, *args):
+            """Joins the call in flight or runs the function within executor."""
+            return await flight.call_async(
+                make_key(function, args, {}), function, *args, executor=executor)
+
+        wrapper.flight = flight
+        wrapper.call_async = call_async
+
+        return wrapper
+
+    return decorator
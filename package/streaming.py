@@ -0,0 +1,190 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module streams WSGI responses in production mode.
+
+Tornado's WSGIContainer joins the whole response of the application before it
+writes anything. The StreamingWSGIContainer writes the headers with the first
+chunk instead and every further chunk as soon as the application yields it,
+using chunked transfer encoding unless the application set a Content-Length.
+The next chunk is requested only once the previous one was flushed to the
+socket, so a slow client holds back the application instead of letting the
+response pile up in memory.
+
+Responses consisting of a single chunk are written at once, with a
+Content-Length, just like by the WSGIContainer.
+
+If the application fails before the headers were written, a 500 response is
+written instead. If it fails while its response is streamed, the connection is
+closed, so the client learns the response is incomplete.
+
+The time a request waits for the IOLoop or the thread pool is passed to the
+admission control of the application.
+"""
+
+import time
+
+import tornado
+from tornado import escape, httputil
+from tornado.ioloop import IOLoop
+from tornado.iostream import StreamClosedError
+from tornado.log import app_log
+from tornado.wsgi import WSGIContainer
+
+from admission import QUEUED_SINCE
+
+class StreamingWSGIContainer(WSGIContainer):
+    """A WSGIContainer, which streams the responses chunk by chunk."""
+
+    def __call__(self, request):
+        """Queues the request for the application.
+
+        Args:
+            request (tornado.httputil.HTTPServerRequest): The complete request.
+        """
+        request.queued_since = time.monotonic()
+        super(StreamingWSGIContainer, self).__call__(request)
+
+    def environ(self, request):
+        """Converts the request to a WSGI environment.
+
+        Args:
+            request (tornado.httputil.HTTPServerRequest): The request.
+
+        Returns:
+            dict: Returns the WSGI environment, including the time the request was
+                queued at.
+        """
+        environ = super(StreamingWSGIContainer, self).environ(request)
+        environ[QUEUED_SINCE] = getattr(request, "queued_since", time.monotonic())
+
+        return environ
+
+    async def handle_request(self, request):
+        """Runs the application and streams its response.
+
+        Args:
+            request (tornado.httputil.HTTPServerRequest): The request.
+        """
+        data = {}
+        pending = []
+
+        def start_response(status, headers, exc_info=None):
+            """Records the status and the headers of the response."""
+            if exc_info is not None and data.get("sent"):
+                raise exc_info[1].with_traceback(exc_info[2])
+
+            data["status"]  = status
+            data["headers"] = headers
+            return pending.append
+
+        loop = IOLoop.current()
+        app_response = None
+
+        try:
+            app_response = await loop.run_in_executor(
+                self.executor, self.wsgi_application, self.environ(request), start_response)
+            iterator = iter(app_response)
+
+            def next_chunks():
+                """Returns the chunks written or yielded until the next non-empty one."""
+                for chunk in iterator:
+                    if chunk:
+                        pending.append(chunk)
+                        break
+                    if pending:
+                        break
+
+                chunks = list(pending)
+                del pending[:]
+                return chunks
+
+            chunks = await loop.run_in_executor(self.executor, next_chunks)
+            following = await loop.run_in_executor(self.executor, next_chunks) if chunks else []
+
+            if not data:
+                raise RuntimeError("WSGI app did not call start_response")
+
+            status_code = self.write_headers(request, data, chunks, following)
+            data["sent"] = True
+
+            while following:
+                for chunk in following:
+                    await request.connection.write(escape.utf8(chunk))
+                following = await loop.run_in_executor(self.executor, next_chunks)
+
+            request.connection.finish()
+        except StreamClosedError:
+            return
+        except Exception:   # pylint: disable=broad-except
+            app_log.exception("Uncaught exception in %s %s", request.method, request.uri)
+
+            if data.get("sent"):
+                request.connection.close()
+                return
+
+            status_code = self.write_headers(
+                request, {"status": "500 Internal Server Error", "headers": []},
+                [b"Internal Server Error"], [])
+            request.connection.finish()
+        finally:
+            if hasattr(app_response, "close"):
+                app_response.close()
+
+        self._log(status_code, request)
+
+    def write_headers(self, request, data, chunks, following):
+        """Writes the status line, the headers and the first chunks.
+
+        Args:
+            request (tornado.httputil.HTTPServerRequest): The request.
+            data (dict):       Status and headers given to start_response.
+            chunks (list):     The first chunks of the body.
+            following (list):  The next chunks, empty if the body is complete.
+
+        Returns:
+            int: Returns the status code of the response.
+        """
+        status_code, reason = data["status"].split(" ", 1)
+        status_code = int(status_code)
+        headers = data["headers"]
+        header_set = set(key.lower() for key, _ in headers)
+        body = b"".join(escape.utf8(chunk) for chunk in chunks)
+
+        if status_code != 304:
+            # without a Content-Length, Tornado uses chunked transfer encoding
+            if not following and "content-length" not in header_set:
+                headers.append(("Content-Length", str(len(body))))
+            if "content-type" not in header_set:
+                headers.append(("Content-Type", "text/html; charset=UTF-8"))
+        if "server" not in header_set:
+            headers.append(("Server", "TornadoServer/%s" % tornado.version))
+
+        header_obj = httputil.HTTPHeaders()
+        for key, value in headers:
+            header_obj.add(key, value)
+
+        request.connection.write_headers(
+            httputil.ResponseStartLine("HTTP/1.1", status_code, reason), header_obj, chunk=body)
+
+        return status_code
@@ -0,0 +1,343 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module resolves the version metadata of the application.
+
+The metadata is read directly from the git directory, without spawning
+any git processes, and is cached for the lifetime of the process.
+"""
+
+import binascii
+import datetime
+import os
+import struct
+import threading
+import zlib
+
+UNKNOWN = "unknown"
+
+_LOCK         = threading.Lock()
+_VERSION_INFO = {}
+
+def find_git_dir(path):
+    """Searches the given path and all of its parents for a git directory.
+
+    Args:
+        path (str): Directory to start the search in.
+
+    Returns:
+        str: Returns the path of the git directory or None, if there is none.
+    """
+    path = os.path.abspath(path)
+
+    while True:
+        candidate = os.path.join(path, ".git")
+
+        if os.path.isdir(candidate):
+            return candidate
+
+        # worktrees and submodules use a file pointing to the real directory
+        if os.path.isfile(candidate):
+            content = read_file(candidate)
+            if content.startswith("gitdir:"):
+                return os.path.normpath(os.path.join(path, content[len("gitdir:"):].strip()))
+
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+def read_file(path):
+    """Reads a small text file from the git directory.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        str: Returns the stripped content of the file.
+    """
+    with open(path, "r") as infile:
+        return infile.read().strip()
+
+def get_common_dir(git_dir):
+    """Returns the directory containing the refs and objects of a git directory.
+
+    Args:
+        git_dir (str): Path of the git directory.
+
+    Returns:
+        str: Returns the common directory, which differs for worktrees only.
+    """
+    commondir = os.path.join(git_dir, "commondir")
+    if os.path.isfile(commondir):
+        return os.path.normpath(os.path.join(git_dir, read_file(commondir)))
+
+    return git_dir
+
+def resolve_ref(git_dir, ref):
+    """Resolves a reference like refs/heads/master to its commit hash.
+
+    Loose references take precedence over the ones in packed-refs.
+
+    Args:
+        git_dir (str): Path of the git directory.
+        ref (str):     Name of the reference.
+
+    Returns:
+        str: Returns the full commit hash or None, if the reference does not exist.
+    """
+    for directory in (git_dir, get_common_dir(git_dir)):
+        loose = os.path.join(directory, ref)
+        if os.path.isfile(loose):
+            return read_file(loose)
+
+    packed = os.path.join(get_common_dir(git_dir), "packed-refs")
+    if not os.path.isfile(packed):
+        return None
+
+    with open(packed, "r") as infile:
+        for line in infile:
+            if line.startswith("#") or line.startswith("^"):
+                continue
+
+            parts = line.split()
+            if len(parts) == 2 and parts[1] == ref:
+                return parts[0]
+
+    return None
+
+def read_head(git_dir):
+    """Reads the current branch and commit hash from HEAD.
+
+    Args:
+        git_dir (str): Path of the git directory.
+
+    Returns:
+        tuple: Returns a tuple, containing (branch, commit_hash). The branch is
+            "HEAD" for a detached HEAD, just like "git rev-parse --abbrev-ref HEAD".
+    """
+    head = read_file(os.path.join(git_dir, "HEAD"))
+
+    if not head.startswith("ref:"):
+        return "HEAD", head
+
+    ref = head[len("ref:"):].strip()
+    branch = ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+
+    return branch, resolve_ref(git_dir, ref)
+
+def read_loose_object(git_dir, commit_hash):
+    """Reads a loose object from the object database.
+
+    Args:
+        git_dir (str):     Path of the git directory.
+        commit_hash (str): Full hash of the object.
+
+    Returns:
+        bytes: Returns the object content without its header or None, if the
+            object is not stored as a loose object.
+    """
+    path = os.path.join(
+        get_common_dir(git_dir), "objects", commit_hash[:2], commit_hash[2:])
+
+    if not os.path.isfile(path):
+        return None
+
+    with open(path, "rb") as infile:
+        data = zlib.decompress(infile.read())
+
+    return data[data.index(b"\0") + 1:]
+
+def find_pack_offset(index_path, binary_hash):
+    """Looks up the offset of an object within a version 2 pack index.
+
+    Args:
+        index_path (str):    Path of the .idx file.
+        binary_hash (bytes): Binary hash of the object.
+
+    Returns:
+        int: Returns the offset within the pack or None, if the object is not in the pack.
+    """
+    with open(index_path, "rb") as infile:
+        index = infile.read()
+
+    if index[:8] != b"\377tOc\0\0\0\2":
+        return None
+
+    fanout = struct.unpack(">256I", index[8:8 + 1024])
+    count  = fanout[255]
+    first  = binary_hash[0] if isinstance(binary_hash[0], int) else ord(binary_hash[0])
+
+    low  = fanout[first - 1] if first > 0 else 0
+    high = fanout[first]
+    hashes = 8 + 1024
+
+    while low < high:
+        middle = (low + high) // 2
+        current = index[hashes + middle * 20 : hashes + middle * 20 + 20]
+
+        if current < binary_hash:
+            low = middle + 1
+        elif current > binary_hash:
+            high = middle
+        else:
+            offsets = hashes + count * 24
+            offset = struct.unpack(">I", index[offsets + middle * 4 : offsets + middle * 4 + 4])[0]
+
+            if offset & 0x80000000:
+                large = offsets + count * 4 + (offset & 0x7fffffff) * 8
+                offset = struct.unpack(">Q", index[large : large + 8])[0]
+
+            return offset
+
+    return None
+
+def read_packed_object(git_dir, commit_hash):
+    """Reads a non-deltified commit from the pack files.
+
+    Args:
+        git_dir (str):     Path of the git directory.
+        commit_hash (str): Full hash of the object.
+
+    Returns:
+        bytes: Returns the object content or None, if it cannot be found.
+    """
+    pack_dir = os.path.join(get_common_dir(git_dir), "objects", "pack")
+    if not os.path.isdir(pack_dir):
+        return None
+
+    binary_hash = binascii.unhexlify(commit_hash)
+
+    for name in os.listdir(pack_dir):
+        if not name.endswith(".idx"):
+            continue
+
+        offset = find_pack_offset(os.path.join(pack_dir, name), binary_hash)
+        if offset is None:
+            continue
+
+        with open(os.path.join(pack_dir, name[:-len(".idx")] + ".pack"), "rb") as infile:
+            infile.seek(offset)
+
+            byte = ord(infile.read(1))
+            object_type = (byte >> 4) & 7
+            while byte & 0x80:
+                byte = ord(infile.read(1))
+
+            # deltified commits are rare and would require the base object
+            if object_type != 1:
+                return None
+
+            decompressor = zlib.decompressobj()
+            data = b""
+            while not decompressor.eof:
+                chunk = infile.read(4096)
+                if not chunk:
+                    break
+                data += decompressor.decompress(chunk)
+
+            return data
+
+    return None
+
+def read_commit_timestamp(git_dir, commit_hash):
+    """Reads the committer timestamp of the given commit.
+
+    Args:
+        git_dir (str):     Path of the git directory.
+        commit_hash (str): Full hash of the commit.
+
+    Returns:
+        int: Returns the unix timestamp of the commit or None, if it cannot be read.
+    """
+    commit = read_loose_object(git_dir, commit_hash)
+    if commit is None:
+        commit = read_packed_object(git_dir, commit_hash)
+    if commit is None:
+        return None
+
+    for line in commit.split(b"\n"):
+        if not line:
+            break
+        if line.startswith(b"committer "):
+            return int(line.rsplit(b" ", 2)[1])
+
+    return None
+
+def read_version_info(path):
+    """Reads the version metadata from the git checkout containing path.
+
+    Args:
+        path (str): Directory inside of the git checkout.
+
+    Returns:
+        dict: Returns a dictionary containing "branch", "hash" and "date". All values
+            are "unknown" if there is no readable git checkout.
+    """
+    info = {"branch": UNKNOWN, "hash": UNKNOWN, "date": UNKNOWN}
+
+    try:
+        git_dir = find_git_dir(path)
+        if git_dir is None:
+            return info
+
+        branch, commit_hash = read_head(git_dir)
+        info["branch"] = branch
+
+        if not commit_hash:
+            return info
+        info["hash"] = commit_hash[:7]
+
+        timestamp = read_commit_timestamp(git_dir, commit_hash)
+        if timestamp is not None:
+            info["date"] = datetime.datetime.fromtimestamp(timestamp).strftime("%Y%m%d.%H%M%S")
+    except (IOError, OSError, ValueError, IndexError, zlib.error, struct.error):
+        pass
+
+    return info
+
+def get_version_info(path=None):
+    """Returns the cached version metadata of the application.
+
+    The metadata is resolved on the first call only.
+
+    Args:
+        path (str): Directory inside of the git checkout. Defaults to the directory
+            containing this module.
+
+    Returns:
+        dict: Returns a dictionary containing "branch", "hash" and "date".
+    """
+    path = path or os.path.dirname(os.path.abspath(__file__))
+
+    if path not in _VERSION_INFO:
+        with _LOCK:
+            if path not in _VERSION_INFO:
+                _VERSION_INFO[path] = read_version_info(path)
+
+    return _VERSION_INFO[path]
+
+def clear_cache():
+    """Forgets the cached version metadata, e.g. after a deployment in place."""
+    with _LOCK:
+        _VERSION_INFO.clear()
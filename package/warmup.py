@@ -0,0 +1,124 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""This module warms up the application before its listener opens.
+
+The first requests of a fresh worker pay for the lazy imports, the compilation
+of the URL map, the first calls of the service functions and the loading of the
+templates. The warm-up pays for them in advance: it loads every template and
+requests every GET route without arguments through the test client. In
+production mode, the warm-up runs before the workers are forked, so every worker
+starts warm.
+
+Until the warm-up finished, /get/ready answers with 503, so load balancers do
+not send traffic to cold workers.
+
+The warm-up requests are marked in their WSGI environ. The metrics and the
+admission control skip them, so the workers neither report them as traffic nor
+adapt their limits to the latency of cold requests.
+"""
+
+import time
+
+WARMUP_EXCLUDES = ("/admin/profile", "/get/ready")
+
+# WSGI environ key marking the requests of the warm-up
+WARMUP_REQUEST = "warmup.request"
+
+class WarmUp(object):
+    """Exercises the routes of an application and tracks its readiness."""
+
+    def __init__(self, excludes=WARMUP_EXCLUDES):
+        """Initiates the WarmUp.
+
+        Args:
+            excludes (tuple): Rules of the routes, which must not be requested.
+        """
+        super(WarmUp, self).__init__()
+
+        self.excludes = excludes
+        self.ready    = False
+        self.seconds  = 0.0
+        self.results  = {}
+
+    def get_routes(self, app):
+        """Returns the routes to be requested.
+
+        Args:
+            app (flask.Flask): The application.
+
+        Returns:
+            list: Returns the sorted rules of all GET routes without arguments.
+        """
+        return sorted(
+            rule.rule for rule in app.url_map.iter_rules()
+            if "GET" in rule.methods and not rule.arguments and rule.rule not in self.excludes)
+
+    def run(self, app, requests=1):
+        """Warms up the application and marks it as ready afterwards.
+
+        Failing routes are logged, but do not keep the application from being ready.
+
+        Args:
+            app (flask.Flask): The application.
+            requests (int):    Requests per route, 0 to mark the application as
+                               ready right away.
+
+        Returns:
+            dict: Returns the "status" and the "seconds" of the first request per rule.
+        """
+        start = time.perf_counter()
+
+        if requests > 0:
+            for template in app.jinja_env.list_templates():
+                app.jinja_env.get_template(template)
+
+            client = app.test_client()
+
+            for route in self.get_routes(app):
+                for index in range(requests):
+                    request_start = time.perf_counter()
+                    try:
+                        status = client.get(
+                            route, environ_overrides={WARMUP_REQUEST: True}).status_code
+                    except Exception:   # pylint: disable=broad-except
+                        app.logger.exception("Warming up %s failed.", route)
+                        status = 500
+
+                    if index == 0:
+                        self.results[route] = {
+                            "status": status, "seconds": time.perf_counter() - request_start}
+
+        self.seconds = time.perf_counter() - start
+        self.ready   = True
+
+        return self.results
+
+    def stats(self):
+        """Returns the state of the warm-up.
+
+        Returns:
+            dict: Returns whether the application is "ready", the "seconds" the
+                warm-up took and the results per "routes".
+        """
+        return {"ready": self.ready, "seconds": self.seconds, "routes": self.results}
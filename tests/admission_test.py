@@ -0,0 +1,152 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the admission submodule."""
+import threading
+import time
+import unittest
+
+from flask import Flask
+
+from package import admission
+from package.metrics import Metrics
+
+class LimiterTest(unittest.TestCase):
+    """Executes tests for the Limiter."""
+
+    def test_limit(self):
+        """Test requests beyond the limit to wait for a free slot."""
+        limiter = admission.Limiter(1, adaptive=False)
+
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.acquire())
+
+        timer = threading.Timer(0.05, limiter.release, (0.05,))
+        timer.start()
+        self.assertTrue(limiter.acquire(5.0))
+        timer.join()
+
+        start = time.monotonic()
+        self.assertFalse(limiter.acquire(0.05))
+        self.assertTrue(time.monotonic() - start >= 0.05)
+
+        self.assertEqual(limiter.stats(), {"limit": 1, "in_flight": 1, "waiting": 0,
+                                           "admitted": 2, "rejected": 2})
+
+    def test_adaptive_limit(self):
+        """Test the limit to shrink with growing latency and to recover afterwards."""
+        limiter = admission.Limiter(20, min_limit=2)
+
+        def run(latency, count):
+            """Runs requests at the current limit with the given latency."""
+            for _ in range(count):
+                admitted = 0
+                while limiter.acquire():
+                    admitted += 1
+                for _ in range(admitted):
+                    limiter.release(latency)
+
+        run(0.01, 50)
+        self.assertEqual(limiter.stats()["limit"], 20)
+
+        run(0.1, 5)
+        self.assertTrue(limiter.stats()["limit"] < 10)
+        self.assertTrue(limiter.stats()["limit"] >= 2)
+
+        run(0.01, 10)
+        self.assertEqual(limiter.stats()["limit"], 20)
+
+    def test_fixed_limit(self):
+        """Test the limit not to change, unless it is adaptive."""
+        limiter = admission.Limiter(4, adaptive=False)
+
+        for latency in (0.01, 1.0, 10.0):
+            limiter.acquire()
+            limiter.release(latency)
+
+        self.assertEqual(limiter.limit, 4)
+
+class AdmissionControlTest(unittest.TestCase):
+    """Executes tests for the AdmissionControl."""
+
+    def setUp(self):
+        """Creates an application with a single slot per route."""
+        self.app = Flask("admission_app")
+        self.metrics = Metrics()
+        self.app.extensions["metrics"] = self.metrics
+        self.control = admission.init_app(
+            self.app, admission.AdmissionControl(limit=1, queue_timeout=0.0, retry_after=2))
+
+        @self.app.route("/work")
+        def work():
+            """A limited route."""
+            return "work"
+
+        @self.app.route("/get/version")
+        def version():
+            """A health route."""
+            return "version"
+
+        self.client = self.app.test_client()
+
+    def test_admission(self):
+        """Test requests to be admitted and their slots to be freed."""
+        for _ in range(3):
+            self.assertEqual(self.client.get("/work").status_code, 200)
+
+        self.assertEqual(self.control.stats()["/work"]["in_flight"], 0)
+        self.assertEqual(self.control.stats()["/work"]["admitted"], 3)
+
+    def test_overload(self):
+        """Test excess requests to be rejected, but health routes to bypass the limit."""
+        self.assertTrue(self.control.get_limiter("/work").acquire())
+
+        response = self.client.get("/work")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "2")
+
+        self.assertEqual(self.client.get("/get/version").status_code, 200)
+        self.assertFalse("/get/version" in self.control.stats())
+        self.assertTrue("admission_rejected_total 1\n" in self.metrics.render())
+
+    def test_queued_requests(self):
+        """Test the time queued within the server to count towards the timeout."""
+        self.control.configure(1, 0.5)
+
+        environ = {admission.QUEUED_SINCE: time.monotonic() - 1.0}
+        self.assertEqual(self.client.get("/work", environ_base=environ).status_code, 200)
+
+        self.assertTrue(self.control.get_limiter("/work").acquire())
+        start = time.monotonic()
+        self.assertEqual(self.client.get("/work", environ_base=environ).status_code, 503)
+        self.assertTrue(time.monotonic() - start < 0.5)
+
+    def test_configure_route(self):
+        """Test the defaults to be overridden per route."""
+        self.control.configure_route("/work", limit=0)
+        self.assertEqual(self.control.admit("/work"), None)
+
+        self.control.configure_route("/other", limit=2, queue_timeout=0.0)
+        self.control.admit("/other")
+        self.control.admit("/other")
+        self.assertRaises(admission.Overloaded, self.control.admit, "/other")
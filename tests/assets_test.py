@@ -0,0 +1,122 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the assets submodule."""
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask
+
+from package import assets
+
+CONTENT = b"body { color: black; }\n" * 100
+
+class AssetsTest(unittest.TestCase):
+    """Executes tests for the static asset serving."""
+
+    def setUp(self):
+        """Creates an application serving a temporary static folder."""
+        self.directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.directory, "css"))
+        with open(os.path.join(self.directory, "css", "app.css"), "wb") as outfile:
+            outfile.write(CONTENT)
+
+        self.app = Flask("assets_test", static_folder=self.directory, static_url_path="/static")
+        self.assets = assets.init_app(self.app, min_size=100)
+
+        @self.app.route("/large")
+        def large():
+            """Returns a large text response."""
+            return "x" * 1000
+
+        @self.app.route("/small")
+        def small():
+            """Returns a small text response."""
+            return "x"
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """Removes the temporary static folder."""
+        shutil.rmtree(self.directory)
+
+    def test_precompress(self):
+        """Test the gzip sibling to be written and to be served on request."""
+        self.assertTrue(os.path.isfile(os.path.join(self.directory, "css", "app.css.gz")))
+
+        response = self.client.get("/static/css/app.css", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.mimetype, "text/css")
+        self.assertEqual(gzip.decompress(response.get_data()), CONTENT)
+        self.assertTrue("Accept-Encoding" in response.headers["Vary"])
+        response.close()
+
+        response = self.client.get("/static/css/app.css")
+        self.assertFalse("Content-Encoding" in response.headers)
+        self.assertEqual(response.get_data(), CONTENT)
+        response.close()
+
+    def test_unwritable_siblings(self):
+        """Test siblings to be written to the cache directory or to be skipped."""
+        os.remove(os.path.join(self.directory, "css", "app.css.gz"))
+        os.mkdir(os.path.join(self.directory, "css", "app.css.gz"))
+
+        unwritable = assets.StaticAssets(self.directory)
+        unwritable.scan()
+        self.assertEqual(unwritable.encodings["css/app.css"], {})
+
+        cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_directory)
+
+        cached = assets.StaticAssets(self.directory, cache_directory=cache_directory)
+        cached.scan()
+        self.assertEqual(cached.encodings["css/app.css"], {"gzip": cache_directory})
+        self.assertTrue(os.path.isfile(os.path.join(cache_directory, "css", "app.css.gz")))
+
+    def test_fingerprint(self):
+        """Test fingerprinted urls to be cached forever."""
+        url = self.assets.url_for("css/app.css")
+        self.assertNotEqual(url, "/static/css/app.css")
+        self.assertTrue(url.endswith(".css"))
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(), CONTENT)
+        self.assertEqual(response.cache_control.max_age, assets.MAX_AGE)
+        self.assertTrue(response.cache_control.immutable)
+        response.close()
+
+    def test_compress_response(self):
+        """Test large dynamic responses to be compressed on the fly."""
+        response = self.client.get("/large", headers={"Accept-Encoding": "gzip, br"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.get_data()), b"x" * 1000)
+
+        response = self.client.get("/small", headers={"Accept-Encoding": "gzip"})
+        self.assertFalse("Content-Encoding" in response.headers)
+
+        response = self.client.get("/large")
+        self.assertFalse("Content-Encoding" in response.headers)
@@ -0,0 +1,107 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the asyncserver submodule."""
+import time
+
+from tornado.gen import multi
+from tornado.testing import AsyncHTTPTestCase, gen_test
+
+from package import asyncserver
+from package import builder
+
+class AsyncServerTest(AsyncHTTPTestCase):
+    """Executes tests for the asynchronous production mode."""
+
+    def get_app(self):
+        """Builds the Tornado application."""
+        app = builder.make_app("test_app")
+        self.flask_app = app
+
+        @app.route("/slow")
+        def slow():
+            """A blocking route."""
+            time.sleep(0.5)
+            return "slow"
+
+        for index in range(40):
+            app.add_url_rule("/filler/%d" % index, "filler_%d" % index, lambda: "filler")
+
+        return asyncserver.make_async_app(app, threads=4)
+
+    def test_version(self):
+        """Test the native /get/version handler."""
+        response = self.fetch("/get/version")
+
+        self.assertEqual(response.code, 200)
+        self.assertTrue(response.body.startswith(b"v0."))
+
+    def test_sitemap_etag(self):
+        """Test the native /get/sitemap handler to honor If-None-Match."""
+        response = self.fetch("/get/sitemap")
+        self.assertTrue(b"/slow" in response.body)
+
+        response = self.fetch(
+            "/get/sitemap", headers={"If-None-Match": response.headers["Etag"]})
+        self.assertEqual(response.code, 304)
+
+    def test_sitemap_encoding(self):
+        """Test the native /get/sitemap handler to be compressed like the Flask route."""
+        headers = {"Accept-Encoding": "gzip"}
+        response = self.fetch("/get/sitemap", headers=headers, decompress_response=False)
+        flask_response = self.flask_app.test_client().get("/get/sitemap", headers=headers)
+
+        for name in ("Content-Encoding", "Vary"):
+            self.assertEqual(set(response.headers[name].split(", ")),
+                             set(flask_response.headers[name].split(", ")))
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertTrue(response.headers["Etag"].startswith("W/"))
+        self.assertTrue(flask_response.headers["ETag"].startswith("W/"))
+
+        response = self.fetch("/get/sitemap", headers={"Accept-Encoding": "identity"},
+                              decompress_response=False)
+        self.assertFalse("Content-Encoding" in response.headers)
+        self.assertFalse(response.headers["Etag"].startswith("W/"))
+
+    def test_overload(self):
+        """Test saturated routes to be rejected with 503, but not the health routes."""
+        control = self.flask_app.extensions["admission"]
+        control.configure(1, 0.0)
+
+        for route in ("/get/sitemap", "/slow"):
+            self.assertTrue(control.get_limiter(route).acquire())
+
+            response = self.fetch(route)
+            self.assertEqual(response.code, 503)
+            self.assertEqual(response.headers["Retry-After"], "1")
+
+        self.assertEqual(self.fetch("/get/version").code, 200)
+
+    @gen_test
+    def test_concurrent_fallback(self):
+        """Test blocking Flask routes not to serialize."""
+        start = time.time()
+        responses = yield multi([self.http_client.fetch(self.get_url("/slow")) for _ in range(4)])
+
+        self.assertTrue(all(response.body == b"slow" for response in responses))
+        self.assertTrue(time.time() - start < 1.5)
@@ -0,0 +1,485 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Load tests the service endpoints and compares the results to a baseline.
+
+The application is started from builder.make_app under the development server,
+with a thread per connection and with a thread pool, and the production server,
+listening on a TCP port and on a Unix domain socket. Each route is driven at the
+given concurrency and the latency percentiles and requests per second are
+reported as JSON:
+
+    python tests/benchmark.py --requests 2000 --concurrency 16
+    python tests/benchmark.py --update-baseline
+
+The process exits with 1, if a result regressed beyond the tolerance.
+
+With --startup, the cold start of the application is measured instead. A fresh
+interpreter imports the builder and builds the application under
+"python -X importtime" and the process exits with 1, if this takes longer than
+the budget:
+
+    python tests/benchmark.py --startup --startup-budget 500
+"""
+
+import argparse
+import http.client
+import importlib
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append("%s/.."         % os.path.dirname(os.path.abspath(__file__)))
+sys.path.append("%s/../package" % os.path.dirname(os.path.abspath(__file__)))
+
+PROJECT_NAME="package"
+
+BASELINE = "%s/benchmark_baseline.json" % os.path.dirname(os.path.abspath(__file__))
+
+SERVERS = ("development", "pooled", "production", "production-unix")
+ROUTES  = ("/get/version", "/get/sitemap")
+
+def get_free_port():
+    """Returns a free TCP port on localhost.
+
+    Returns:
+        int: Returns the port number.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    return port
+
+def get_address(server):
+    """Returns an address for the given server to listen on.
+
+    Args:
+        server (str): One of SERVERS.
+
+    Returns:
+        int|str: Returns a free TCP port or, for "production-unix", the path of a
+            Unix domain socket.
+    """
+    if server.endswith("-unix"):
+        return os.path.join(tempfile.mkdtemp(), "service.sock")
+
+    return get_free_port()
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """An HTTPConnection to a Unix domain socket."""
+
+    def __init__(self, path, timeout=10):
+        """Initiates the UnixHTTPConnection.
+
+        Args:
+            path (str):      Path of the socket.
+            timeout (float): Timeout of the socket operations.
+        """
+        http.client.HTTPConnection.__init__(self, "localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        """Connects to the socket."""
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+def connect(address, timeout=10):
+    """Creates an HTTP connection to a server.
+
+    Args:
+        address (int|str): Port or path of the Unix domain socket.
+        timeout (float):   Timeout of the socket operations.
+
+    Returns:
+        http.client.HTTPConnection: Returns the connection.
+    """
+    if isinstance(address, str):
+        return UnixHTTPConnection(address, timeout=timeout)
+
+    return http.client.HTTPConnection("127.0.0.1", address, timeout=timeout)
+
+def run_server(server, address):
+    """Runs the given server until the process gets terminated.
+
+    Args:
+        server (str):      One of SERVERS.
+        address (int|str): Port or path of the Unix domain socket to listen on.
+    """
+    server_module = importlib.import_module("%s.__main__" % PROJECT_NAME)
+
+    with open(os.devnull, "w") as devnull:
+        sys.stdout = sys.stderr = devnull
+
+        if server == "development":
+            server_module.start_development_server(address, host="127.0.0.1")
+        elif server == "pooled":
+            server_module.start_development_server(address, host="127.0.0.1", threads=8)
+        elif server == "production-unix":
+            server_module.start_production_server(0, workers=1, unix_socket=address)
+        else:
+            server_module.start_production_server(address, workers=1)
+
+def start_server(server, address, timeout=10.0):
+    """Starts the server in a separate process and waits until it accepts connections.
+
+    Args:
+        server (str):      One of SERVERS.
+        address (int|str): Port or path of the Unix domain socket to listen on.
+        timeout (float):   Seconds to wait for the server.
+
+    Returns:
+        multiprocessing.Process: Returns the server process.
+    """
+    process = multiprocessing.Process(target=run_server, args=(server, address))
+    process.daemon = True
+    process.start()
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = connect(address, timeout=0.1)
+            connection.connect()
+            connection.close()
+            return process
+        except (IOError, OSError):
+            time.sleep(0.05)
+
+    process.terminate()
+    raise RuntimeError("%s server did not start within %.1f seconds." % (server, timeout))
+
+def percentile(values, percent):
+    """Returns the percentile of the given values using the nearest rank.
+
+    Args:
+        values (list):   Sorted values.
+        percent (float): Percentile between 0 and 100.
+
+    Returns:
+        float: Returns the percentile, 0.0 for no values.
+    """
+    if not values:
+        return 0.0
+
+    rank = int(math.ceil(percent / 100.0 * len(values))) - 1
+    return values[max(0, min(rank, len(values) - 1))]
+
+def drive(address, route, requests, concurrency):
+    """Sends requests to the route using concurrent keep-alive connections.
+
+    Args:
+        address (int|str): Port or path of the Unix domain socket of the server.
+        route (str):       Route to be requested.
+        requests (int):    Total number of requests.
+        concurrency (int): Number of concurrent connections.
+
+    Returns:
+        dict: Returns the latency percentiles in milliseconds and the requests per second.
+    """
+    latencies = []
+    errors    = [0]
+    remaining = [requests]
+    lock      = threading.Lock()
+
+    def client():
+        """Sends requests until all requests have been sent."""
+        connection = connect(address)
+        local = []
+
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+
+            start = time.perf_counter()
+            try:
+                connection.request("GET", route)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    raise IOError(response.status)
+            except (IOError, OSError, http.client.HTTPException):
+                with lock:
+                    errors[0] += 1
+                connection.close()
+                connection = connect(address)
+                continue
+
+            local.append(time.perf_counter() - start)
+
+        connection.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+
+    latencies.sort()
+
+    return {
+        "requests":    len(latencies),
+        "errors":      errors[0],
+        "concurrency": concurrency,
+        "rps":         round(len(latencies) / duration, 1) if duration else 0.0,
+        "p50":         round(percentile(latencies, 50) * 1000, 3),
+        "p95":         round(percentile(latencies, 95) * 1000, 3),
+        "p99":         round(percentile(latencies, 99) * 1000, 3)
+    }
+
+def run_benchmarks(servers=SERVERS, routes=ROUTES, requests=1000, concurrency=8):
+    """Benchmarks every route on every server.
+
+    Args:
+        servers (tuple):   Servers to be benchmarked.
+        routes (tuple):    Routes to be requested.
+        requests (int):    Number of requests per route.
+        concurrency (int): Number of concurrent connections.
+
+    Returns:
+        dict: Returns the results, keyed by server and route.
+    """
+    results = {}
+
+    for server in servers:
+        address = get_address(server)
+        process = start_server(server, address)
+
+        try:
+            results[server] = {}
+            for route in routes:
+                # warm up connections, caches and the url map
+                drive(address, route, concurrency, concurrency)
+                results[server][route] = drive(address, route, requests, concurrency)
+        finally:
+            process.terminate()
+            process.join()
+            if isinstance(address, str):
+                shutil.rmtree(os.path.dirname(address), ignore_errors=True)
+
+    return results
+
+def compare(results, baseline, tolerance=0.25):
+    """Compares the results to the baseline.
+
+    Args:
+        results (dict):    Results of run_benchmarks.
+        baseline (dict):   Previously stored results.
+        tolerance (float): Allowed relative regression of p99 and requests per second.
+
+    Returns:
+        list: Returns a readable description of every regression.
+    """
+    regressions = []
+
+    for server, routes in results.items():
+        for route, result in routes.items():
+            expected = baseline.get(server, {}).get(route)
+            if expected is None:
+                continue
+
+            if result["p99"] > expected["p99"] * (1 + tolerance):
+                regressions.append("%s %s: p99 %.3fms exceeds baseline %.3fms" % (
+                    server, route, result["p99"], expected["p99"]))
+
+            if result["rps"] < expected["rps"] * (1 - tolerance):
+                regressions.append("%s %s: %.1f req/s below baseline %.1f req/s" % (
+                    server, route, result["rps"], expected["rps"]))
+
+            if result["errors"]:
+                regressions.append("%s %s: %d failed requests" % (
+                    server, route, result["errors"]))
+
+    return regressions
+
+STARTUP_CODE = """
+import json, sys, time
+start = time.perf_counter()
+import builder
+imported = time.perf_counter()
+builder.make_app("startup")
+built = time.perf_counter()
+sys.stdout.write(json.dumps([(imported - start) * 1000, (built - imported) * 1000]))
+"""
+
+def parse_importtime(output, top=10):
+    """Parses the output of "python -X importtime".
+
+    Args:
+        output (str): Output written to stderr by the interpreter.
+        top (int):    Number of modules to return.
+
+    Returns:
+        list: Returns the slowest modules by cumulative import time, as dictionaries
+            containing "module", "self_ms" and "cumulative_ms".
+    """
+    modules = []
+
+    for line in output.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[0].startswith("import time:"):
+            continue
+
+        try:
+            self_us, cumulative_us = int(parts[0].split(":")[1]), int(parts[1])
+        except ValueError:
+            continue
+
+        modules.append({
+            "module":        parts[2].strip(),
+            "self_ms":       round(self_us / 1000.0, 3),
+            "cumulative_ms": round(cumulative_us / 1000.0, 3)
+        })
+
+    modules.sort(key=lambda i: i["cumulative_ms"], reverse=True)
+
+    return modules[:top]
+
+def measure_startup(runs=5):
+    """Measures the cold start of the application in fresh interpreters.
+
+    Args:
+        runs (int): Number of interpreters to start. The median run is reported.
+
+    Returns:
+        dict: Returns the import and make_app times in milliseconds, their total and the
+            slowest imports of the median run.
+    """
+    package_directory = "%s/../%s" % (os.path.dirname(os.path.abspath(__file__)), PROJECT_NAME)
+    measurements = []
+
+    for _ in range(runs):
+        with subprocess.Popen([sys.executable, "-X", "importtime", "-c", STARTUP_CODE],
+                              cwd=package_directory,
+                              stdout=subprocess.PIPE,
+                              stderr=subprocess.PIPE,
+                              universal_newlines=True) as proc:
+            out, err = proc.communicate()
+
+        if proc.returncode != 0:
+            raise RuntimeError("Starting the application failed:\n%s" % err)
+
+        import_ms, make_app_ms = json.loads(out)
+        measurements.append((import_ms + make_app_ms, import_ms, make_app_ms, err))
+
+    measurements.sort(key=lambda i: i[0])
+    total_ms, import_ms, make_app_ms, err = measurements[len(measurements) // 2]
+
+    return {
+        "total_ms":    round(total_ms, 3),
+        "import_ms":   round(import_ms, 3),
+        "make_app_ms": round(make_app_ms, 3),
+        "slowest":     parse_importtime(err)
+    }
+
+def parse_arguments(arguments=None):
+    """Parses the command line arguments.
+
+    Args:
+        arguments (list): Arguments to be parsed, defaults to sys.argv.
+
+    Returns:
+        argparse.Namespace: Returns the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks the service endpoints.")
+    parser.add_argument("--servers", nargs="+", choices=SERVERS, default=list(SERVERS))
+    parser.add_argument("--routes", nargs="+", default=list(ROUTES))
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="File to write the results to.")
+    parser.add_argument("--startup", action="store_true",
+                        help="Measure the cold start instead of the endpoints.")
+    parser.add_argument("--startup-budget", type=float, default=500.0,
+                        help="Maximal cold start time in milliseconds.")
+    parser.add_argument("--startup-runs", type=int, default=5)
+
+    return parser.parse_args(arguments)
+
+def main(arguments=None):
+    """Runs the benchmarks and compares them to the baseline.
+
+    Args:
+        arguments (list): Command line arguments.
+
+    Returns:
+        int: Returns the exit code, 1 if there are regressions or the startup is
+            over budget.
+    """
+    options = parse_arguments(arguments)
+
+    if options.startup:
+        startup = measure_startup(options.startup_runs)
+        print(json.dumps({"startup": startup}, indent=4, sort_keys=True))
+
+        if startup["total_ms"] > options.startup_budget:
+            sys.stderr.write("REGRESSION: startup %.3fms exceeds budget %.3fms\n" % (
+                startup["total_ms"], options.startup_budget))
+            return 1
+        return 0
+
+    results = run_benchmarks(
+        options.servers, options.routes, options.requests, options.concurrency)
+
+    report = json.dumps(results, indent=4, sort_keys=True)
+    print(report)
+
+    if options.output:
+        with open(options.output, "w") as outfile:
+            outfile.write(report)
+
+    if options.update_baseline:
+        with open(options.baseline, "w") as outfile:
+            outfile.write(report + "\n")
+        return 0
+
+    if not os.path.isfile(options.baseline):
+        return 0
+
+    with open(options.baseline, "r") as infile:
+        regressions = compare(results, json.load(infile), options.tolerance)
+
+    for regression in regressions:
+        sys.stderr.write("REGRESSION: %s\n" % regression)
+
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
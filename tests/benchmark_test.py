@@ -0,0 +1,73 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the benchmark harness."""
+import unittest
+
+from tests import benchmark
+
+class BenchmarkTest(unittest.TestCase):
+    """Executes tests for the benchmark harness."""
+
+    def test_percentile(self):
+        """Test the nearest rank percentile."""
+        values = list(range(1, 101))
+
+        self.assertEqual(benchmark.percentile(values, 50), 50)
+        self.assertEqual(benchmark.percentile(values, 99), 99)
+        self.assertEqual(benchmark.percentile([], 99), 0.0)
+
+    def test_compare(self):
+        """Test regressions to be detected."""
+        baseline = {"production": {"/get/version": {"p99": 1.0, "rps": 1000.0, "errors": 0}}}
+        results  = {"production": {"/get/version": {"p99": 3.0, "rps": 100.0,  "errors": 0}}}
+
+        self.assertEqual(len(benchmark.compare(results, baseline)), 2)
+        self.assertEqual(benchmark.compare(baseline, baseline), [])
+
+    def test_run_benchmarks(self):
+        """Test a short benchmark run against the production server."""
+        results = benchmark.run_benchmarks(("production",), ("/get/version",), 20, 2)
+        result  = results["production"]["/get/version"]
+
+        self.assertEqual(result["requests"], 20)
+        self.assertEqual(result["errors"], 0)
+        self.assertTrue(result["p99"] >= result["p50"] > 0)
+
+    def test_parse_importtime(self):
+        """Test the import times to be parsed and sorted."""
+        output = ("import time: self [us] | cumulative | imported package\n"
+                  "import time:       100 |        100 |   json.decoder\n"
+                  "import time:       200 |       3000 | builder\n")
+
+        modules = benchmark.parse_importtime(output)
+
+        self.assertEqual([i["module"] for i in modules], ["builder", "json.decoder"])
+        self.assertEqual(modules[0]["cumulative_ms"], 3.0)
+
+    def test_measure_startup(self):
+        """Test the cold start to be measured."""
+        startup = benchmark.measure_startup(runs=1)
+
+        self.assertTrue(startup["total_ms"] >= startup["import_ms"] > 0)
+        self.assertTrue(startup["slowest"])
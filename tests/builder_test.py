@@ -22,6 +22,9 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """Tests the service submodule."""
+import os
+import subprocess
+import sys
 import unittest
 
 from package import builder
@@ -34,3 +37,17 @@ class BuilderTest(unittest.TestCase):
         app = builder.make_app("test_app")
 
         self.assertTrue(app is not None)
+
+    def test_app_caching(self):
+        """Test get_app to build the app once per project."""
+        self.assertTrue(builder.get_app("cached_app") is builder.get_app("cached_app"))
+        self.assertTrue(builder.get_app("cached_app") is not builder.get_app("other_app"))
+
+    def test_lazy_flask_import(self):
+        """Test Flask not to be imported with the builder."""
+        package_directory = os.path.dirname(os.path.abspath(builder.__file__))
+        output = subprocess.check_output(
+            [sys.executable, "-c", "import sys, builder; print('flask' in sys.modules)"],
+            cwd=package_directory)
+
+        self.assertEqual(output.strip(), b"False")
@@ -0,0 +1,189 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the cache submodule."""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from flask import request
+
+from package import builder
+from package import cache
+
+class LRUCacheTest(unittest.TestCase):
+    """Executes tests for the in-memory cache."""
+
+    def test_eviction(self):
+        """Test the least recently used entry to be evicted."""
+        lru = cache.LRUCache(maxsize=2)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+
+        self.assertEqual(lru.get("a"), 1)
+        self.assertTrue(lru.get("b") is cache.MISSING)
+        self.assertEqual(lru.stats(), {"hits": 2, "misses": 1, "entries": 2})
+
+    def test_ttl(self):
+        """Test entries to expire."""
+        lru = cache.LRUCache(ttl=0.01)
+        lru.set("a", 1)
+        lru.set("b", 2, ttl=60)
+        time.sleep(0.02)
+
+        self.assertEqual(lru.get("a", None), None)
+        self.assertEqual(lru.get("b"), 2)
+
+    def test_cached(self):
+        """Test the decorator to cache results per arguments and to invalidate them."""
+        calls = []
+
+        @cache.cached()
+        def square(value):
+            """Squares the value."""
+            calls.append(value)
+            return value * value
+
+        self.assertEqual([square(2), square(2), square(3)], [4, 4, 9])
+        square.invalidate(2)
+        square(2)
+        square(3)
+
+        self.assertEqual(calls, [2, 3, 2])
+        self.assertEqual(square.cache.stats()["hits"], 2)
+
+class FileCacheTest(unittest.TestCase):
+    """Executes tests for the file backed cache."""
+
+    def setUp(self):
+        """Creates the cache directory."""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Removes the cache directory."""
+        shutil.rmtree(self.directory)
+
+    def test_shared_entries(self):
+        """Test entries to be visible to other instances on the same directory."""
+        cache.FileCache(self.directory).set(("key", 1), {"value": 1})
+        shared = cache.FileCache(self.directory)
+
+        self.assertEqual(shared.get(("key", 1)), {"value": 1})
+        self.assertTrue(shared.get(("key", 2)) is cache.MISSING)
+
+        shared.invalidate(("key", 1))
+        self.assertTrue(shared.get(("key", 1)) is cache.MISSING)
+        self.assertEqual(shared.stats(), {"hits": 1, "misses": 2, "entries": 0})
+
+    def test_eviction_and_ttl(self):
+        """Test entries above maxsize to be evicted and expired entries to be missed."""
+        files = cache.make_cache(self.directory, maxsize=2)
+        for key in range(3):
+            files.set(key, key)
+
+        self.assertEqual(files.stats()["entries"], 2)
+
+        files.set("expired", 1, ttl=-1)
+        self.assertTrue(files.get("expired") is cache.MISSING)
+
+        files.invalidate()
+        self.assertEqual(files.stats()["entries"], 0)
+
+    def test_private_directory(self):
+        """Test directories writable by other users to be refused."""
+        os.chmod(self.directory, 0o777)
+        self.assertRaises(PermissionError, cache.FileCache, self.directory)
+
+        created = os.path.join(self.directory, "created")
+        cache.FileCache(created)
+        self.assertEqual(os.stat(created).st_mode & 0o777, 0o700)
+
+class CachedRouteTest(unittest.TestCase):
+    """Executes tests for cached routes."""
+
+    def test_cached_route(self):
+        """Test responses to be cached per path and query string."""
+        app = builder.make_app("test_app")
+        calls = []
+
+        @app.route("/counted")
+        @cache.cached_route(ttl=60)
+        def counted():
+            """Counts its calls."""
+            calls.append(1)
+            return "calls: %d" % len(calls)
+
+        client = app.test_client()
+
+        self.assertEqual(client.get("/counted").data, b"calls: 1")
+        self.assertEqual(client.get("/counted").data, b"calls: 1")
+        self.assertEqual(client.get("/counted?a=1").data, b"calls: 2")
+
+        app.extensions["cache"].invalidate(cache.route_key("/counted?"))
+        self.assertEqual(client.get("/counted").data, b"calls: 3")
+
+    def test_variants(self):
+        """Test responses to be cached per Accept header and to be revalidated."""
+        app = builder.make_app("test_app")
+        calls = []
+
+        @app.route("/negotiated")
+        @cache.cached_route()
+        def negotiated():
+            """Returns the Accept header of the request."""
+            calls.append(1)
+            return request.headers.get("Accept", "none")
+
+        client = app.test_client()
+
+        self.assertEqual(client.get("/negotiated").data, b"none")
+        self.assertEqual(client.get("/negotiated", headers={"Accept": "a/b"}).data, b"a/b")
+        response = client.get("/negotiated", headers={"Accept": "a/b"})
+        self.assertEqual(len(calls), 2)
+
+        etag = response.headers["ETag"]
+        response = client.get(
+            "/negotiated", headers={"Accept": "a/b", "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(calls), 2)
+
+    def test_fresh_date(self):
+        """Test cached responses to get the Date of the time they are served."""
+        app = builder.make_app("test_app")
+
+        @app.route("/dated")
+        @cache.cached_route()
+        def dated():
+            """Returns a response dated at the epoch."""
+            return "dated", 200, {"Date": "Thu, 01 Jan 1970 00:00:00 GMT"}
+
+        client = app.test_client()
+
+        for _ in range(2):
+            response = client.get("/dated")
+            self.assertEqual(response.data, b"dated")
+            self.assertTrue(response.date.year > 1970)
@@ -0,0 +1,109 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the config submodule."""
+import contextlib
+import io
+import os
+import unittest
+
+from package.config import ServerConfig
+
+class ServerConfigTest(unittest.TestCase):
+    """Executes tests for the ServerConfig."""
+
+    def test_defaults(self):
+        """Test the defaults to be used for missing options."""
+        config = ServerConfig(8080, workers=2)
+
+        self.assertEqual((config.port, config.workers, config.backlog), (8080, 2, 128))
+        self.assertRaises(TypeError, ServerConfig, 8080, unknown=1)
+
+    def test_environment_and_flags(self):
+        """Test flags to take precedence over environment variables."""
+        environ = {"SERVER_BACKLOG": "1024", "SERVER_MAX_CONNECTIONS": "10",
+                   "SERVER_NO_KEEP_ALIVE": "yes"}
+        config = ServerConfig.from_arguments(["8080", "--max-connections", "20"], environ)
+
+        self.assertEqual(config.port, 8080)
+        self.assertEqual(config.backlog, 1024)
+        self.assertEqual(config.max_connections, 20)
+        self.assertTrue(config.no_keep_alive)
+
+    def test_negated_flags(self):
+        """Test booleans enabled in the environment to be disabled by flags."""
+        environ = {"SERVER_REUSE_PORT": "1", "SERVER_NO_KEEP_ALIVE": "on"}
+        config = ServerConfig.from_arguments(["8080", "--no-reuse-port", "--keep-alive"], environ)
+
+        self.assertFalse(config.reuse_port)
+        self.assertFalse(config.no_keep_alive)
+        self.assertTrue(ServerConfig.from_arguments(["8080"], environ).reuse_port)
+
+    def test_invalid_environment(self):
+        """Test malformed environment variables to be reported by argparse."""
+        for environ in ({"SERVER_BACKLOG": "many"}, {"SERVER_REUSE_PORT": "maybe"}):
+            with contextlib.redirect_stderr(io.StringIO()) as stderr:
+                self.assertRaises(SystemExit, ServerConfig.from_arguments, [], environ)
+
+            self.assertTrue(list(environ)[0] in stderr.getvalue())
+
+    def test_unix_socket(self):
+        """Test the port to be optional, if a Unix domain socket is given."""
+        config = ServerConfig.from_arguments(["--unix-socket", "/tmp/service.sock"], {})
+
+        self.assertEqual(config.port, 0)
+        self.assertEqual(config.unix_socket, "/tmp/service.sock")
+        self.assertEqual((config.unix_socket_mode, config.fd), (0o660, -1))
+
+    def test_unix_socket_mode(self):
+        """Test the permissions to be parsed as octal number."""
+        environ = {"SERVER_UNIX_SOCKET_MODE": "600"}
+        config = ServerConfig.from_arguments(["--unix-socket", "/tmp/service.sock"], environ)
+        self.assertEqual(config.unix_socket_mode, 0o600)
+
+        for arguments, environ in ((["--unix-socket-mode", "999"], {}),
+                                   ([], {"SERVER_UNIX_SOCKET_MODE": "rw"})):
+            with contextlib.redirect_stderr(io.StringIO()) as stderr:
+                self.assertRaises(SystemExit, ServerConfig.from_arguments,
+                                  ["8080"] + arguments, environ)
+
+            self.assertTrue("invalid octal value" in stderr.getvalue())
+
+    def test_missing_address(self):
+        """Test a port or a socket to be required."""
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            self.assertRaises(SystemExit, ServerConfig.from_arguments, [], {})
+
+        self.assertTrue("PORT" in stderr.getvalue())
+
+        environ = {"LISTEN_PID": str(os.getpid()), "LISTEN_FDS": "1"}
+        self.assertEqual(ServerConfig.from_arguments(["--fd", "3"], {}).port, 0)
+        self.assertEqual(ServerConfig.from_arguments([], environ).port, 0)
+
+    def test_http_server_options(self):
+        """Test the options passed to Tornado's HTTPServer."""
+        options = ServerConfig(8080, body_timeout=0, max_body_size=1024).get_http_server_options()
+
+        self.assertEqual(options["body_timeout"], None)
+        self.assertEqual(options["max_body_size"], 1024)
+        self.assertEqual(options["idle_connection_timeout"], 60.0)
@@ -0,0 +1,158 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the counters submodule."""
+import gc
+import threading
+import unittest
+import weakref
+
+from package.counters import CallCountingMixin, ShardedCounter, counted
+
+class ShardedCounterTest(unittest.TestCase):
+    """Executes tests for the ShardedCounter."""
+
+    def test_increment(self):
+        """Test keyed increments and decrements."""
+        counter = ShardedCounter()
+        counter.increment()
+        counter.increment("a", 3)
+        counter.decrement("a")
+
+        self.assertEqual(counter.value(), 1)
+        self.assertEqual(counter.value("a"), 2)
+        self.assertEqual(counter.values(), {None: 1, "a": 2})
+
+    def test_concurrent_increments(self):
+        """Test counts not to get lost when incremented from many threads."""
+        counter = ShardedCounter()
+
+        def work():
+            """Increments the counter."""
+            for _ in range(1000):
+                counter.increment()
+
+        threads = [threading.Thread(target=work) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(counter.value(), 20000)
+
+    def test_retired_shards(self):
+        """Test shards of finished threads to be folded into the totals."""
+        counter = ShardedCounter()
+
+        for _ in range(10):
+            thread = threading.Thread(target=counter.increment)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(counter.value(), 10)
+        self.assertTrue(len(counter._shards) <= 1)      # pylint: disable=protected-access
+
+    def test_reset(self):
+        """Test the counters to be reset."""
+        counter = ShardedCounter()
+        counter.increment("a")
+        counter.reset()
+
+        self.assertEqual(counter.value("a"), 0)
+        self.assertEqual(counter.values(), {})
+
+        counter.increment("a", 2)
+        self.assertEqual(counter.values(), {"a": 2})
+
+    def test_concurrent_reset(self):
+        """Test increments racing with a reset to be counted after it."""
+        counter = ShardedCounter()
+        started = threading.Event()
+        reset = threading.Event()
+
+        def work():
+            """Increments the counter before and after the reset."""
+            counter.increment()
+            started.set()
+            reset.wait()
+            counter.increment()
+
+        thread = threading.Thread(target=work)
+        thread.start()
+        started.wait()
+        counter.reset()
+        reset.set()
+        thread.join()
+
+        self.assertEqual(counter.value(), 1)
+
+    def test_collected(self):
+        """Test counters to be collected with their owner, while their threads run."""
+        counter = ShardedCounter()
+        counter_ref = weakref.ref(counter)
+        incremented = threading.Event()
+        finished = threading.Event()
+
+        def work():
+            """Increments the counter and keeps the thread alive."""
+            counter_ref().increment()
+            incremented.set()
+            finished.wait()
+
+        thread = threading.Thread(target=work)
+        thread.start()
+        incremented.wait()
+        counter.increment()
+
+        del counter
+        gc.collect()
+        self.assertTrue(counter_ref() is None)
+
+        finished.set()
+        thread.join()
+
+class CallCountingMixinTest(unittest.TestCase):
+    """Executes tests for the CallCountingMixin."""
+
+    def test_counted(self):
+        """Test counted methods to be counted per instance."""
+
+        class Service(CallCountingMixin):
+            """A counted service."""
+
+            @counted
+            def echo(self, value):
+                """Returns the value."""
+                return value
+
+        first, second = Service(), Service()
+
+        self.assertEqual(first.echo(1), 1)
+        first.echo(2)
+        second.echo(3)
+
+        self.assertEqual((first.call_count, second.call_count), (2, 1))
+        self.assertEqual(first.get_call_counts(), {"echo": 2})
+
+        first.call_count = 0
+        self.assertEqual(first.call_count, 0)
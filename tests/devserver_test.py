@@ -0,0 +1,95 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the devserver submodule."""
+import http.client
+import threading
+import time
+import unittest
+
+from flask import Flask
+
+from package.devserver import PooledWSGIServer
+from package.metrics import Metrics
+
+class PooledWSGIServerTest(unittest.TestCase):
+    """Executes tests for the PooledWSGIServer."""
+
+    def setUp(self):
+        """Starts a server with two threads and a queue of two connections."""
+        app = Flask("devserver_app")
+
+        @app.route("/slow")
+        def slow():
+            """A blocking route."""
+            time.sleep(0.1)
+            return "slow"
+
+        self.server = PooledWSGIServer("127.0.0.1", 0, app, threads=2, queue_size=2)
+        self.port = self.server.socket.getsockname()[1]
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        """Stops the server."""
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+
+    def get(self, results):
+        """Requests the slow route."""
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        connection.request("GET", "/slow")
+        results.append(connection.getresponse().read())
+        connection.close()
+
+    def test_bounded_pool(self):
+        """Test a burst of requests to be served by the fixed threads."""
+        results = []
+        threads_before = threading.active_count()
+
+        clients = [threading.Thread(target=self.get, args=(results,)) for _ in range(8)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+
+        stats = self.server.stats()
+        self.assertEqual(results, [b"slow"] * 8)
+        self.assertEqual(stats["requests"], 8)
+        self.assertEqual(stats["threads"], 2)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertTrue(stats["wait_seconds"] > 0.1)
+        self.assertTrue(threading.active_count() <= threads_before)
+
+    def test_metrics(self):
+        """Test the state of the pool to be rendered with the metrics."""
+        metrics = Metrics()
+        self.server.register_metrics(metrics)
+        self.get([])
+
+        rendered = metrics.render()
+        self.assertTrue("dev_server_threads 2\n" in rendered)
+        self.assertTrue("dev_server_queue_depth 0\n" in rendered)
+        self.assertTrue("dev_server_requests_total 1\n" in rendered)
+        self.assertTrue("# TYPE dev_server_queue_wait_seconds_total counter\n" in rendered)
@@ -22,6 +22,7 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """Tests the dummy submodule."""
+import threading
 import unittest
 
 from package.dummy import Dummy
@@ -47,3 +48,53 @@ class DummyTest(unittest.TestCase):
         res_2 = Dummy().concatenate_some_values("1", "2")
 
         self.assertTrue(res_1 == res_2)
+
+    def test_call_count(self):
+        """Tests the calls to be counted exactly from many threads."""
+        dummy = Dummy()
+
+        def work():
+            """Calls the dummy."""
+            for i in range(500):
+                dummy.add_some_values(i, i)
+                dummy.concatenate_some_values(i, i)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(dummy.call_count == 8000)
+        self.assertTrue(dummy.get_call_counts() == {
+            "add_some_values": 4000, "concatenate_some_values": 4000})
+
+    def test_add_many_values(self):
+        """Tests the batch addition to count every pair once per batch."""
+        dummy = Dummy()
+        res = dummy.add_many_values([1, "a"], [2, "b"])
+
+        self.assertTrue(res == [3, "ab"])
+        self.assertTrue(dummy.call_count == 2)
+        self.assertRaises(ValueError, dummy.add_many_values, [1], [])
+
+    def test_concatenate_many_values(self):
+        """Tests the batch concatenation."""
+        res = Dummy().concatenate_many_values([1, "1"], [2, "2"])
+
+        self.assertTrue(res == ["12", "12"])
+
+    def test_numpy_batches(self):
+        """Tests the vectorized batch operations on NumPy arrays."""
+        try:
+            import numpy
+        except ImportError:                                                     # pragma: no cover
+            self.skipTest("NumPy is not installed")                             # pragma: no cover
+
+        dummy = Dummy()
+        added = dummy.add_many_values(numpy.arange(3), numpy.arange(3))
+        joined = dummy.concatenate_many_values(numpy.arange(2), numpy.array(["a", "b"]))
+
+        self.assertTrue(added.tolist() == [0, 2, 4])
+        self.assertTrue(joined.tolist() == ["0a", "1b"])
+        self.assertTrue(dummy.call_count == 5)
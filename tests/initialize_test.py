@@ -0,0 +1,118 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the initialization of projects from the template."""
+import os
+import shutil
+import tempfile
+import unittest
+
+import initialize
+
+class TransactionTest(unittest.TestCase):
+    """Executes tests for the Transaction."""
+
+    def setUp(self):
+        """Creates a directory with some files."""
+        self.directory = tempfile.mkdtemp()
+        for name in ("a", "b", "c"):
+            with open(os.path.join(self.directory, name), "w") as outfile:
+                outfile.write(name)
+
+    def tearDown(self):
+        """Removes the directory."""
+        shutil.rmtree(self.directory)
+
+    def get_files(self):
+        """Returns the names and contents of all files in the directory."""
+        files = {}
+        for name in os.listdir(self.directory):
+            with open(os.path.join(self.directory, name)) as infile:
+                files[name] = infile.read()
+
+        return files
+
+    def test_commit(self):
+        """Test all changes to be applied."""
+        transaction = initialize.Transaction(self.directory)
+        transaction.write("a", transaction.read("a") + "!")
+        transaction.remove("b")
+        transaction.rename("c", "d")
+        transaction.commit()
+
+        self.assertEqual(self.get_files(), {"a": "a!", "d": "c"})
+
+    def test_rollback(self):
+        """Test a failing change to revert all others."""
+        transaction = initialize.Transaction(self.directory)
+        transaction.write("a", "changed")
+        transaction.remove("b")
+        transaction.rename("c", "d")
+        transaction.rename("missing", "e")
+
+        self.assertRaises(OSError, transaction.commit)
+        self.assertEqual(self.get_files(), {"a": "a", "b": "b", "c": "c"})
+
+class CreateProjectTest(unittest.TestCase):
+    """Executes tests for projects created as copies of the template."""
+
+    def setUp(self):
+        """Creates the output directory."""
+        self.output = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Removes the output directory."""
+        shutil.rmtree(self.output)
+
+    def read(self, *path):
+        """Returns the content of a file of the output directory."""
+        with open(os.path.join(self.output, *path)) as infile:
+            return infile.read()
+
+    def test_flask_service(self):
+        """Test a Flask service to be created without the artifacts of the template."""
+        directory = initialize.create_project(self.output, "billing", True)
+
+        self.assertEqual(directory, os.path.join(self.output, "billing"))
+        self.assertTrue(os.path.isfile(os.path.join(directory, "billing", "service.py")))
+        self.assertFalse(os.path.exists(os.path.join(directory, "package")))
+        self.assertTrue("from billing import" in self.read("billing", "tests", "service_test.py"))
+        self.assertFalse("#### START" in self.read("billing", "billing", "__main__.py"))
+
+        for name in ("initialize.py", "REVIEW_DIFF.patch", "requests.jsonl",
+                     os.path.join("tests", "initialize_test.py")):
+            self.assertFalse(os.path.exists(os.path.join(directory, name)), name)
+
+        for results, _, names in os.walk(os.path.join(directory, "tests", "results")):
+            self.assertTrue(set(names) <= set(initialize.RESULTS_FILES), (results, names))
+
+        self.assertEqual([name for name in os.listdir(directory) if name.startswith(".init")], [])
+
+    def test_library(self):
+        """Test a project without a Flask service to drop the service files."""
+        directory = initialize.create_project(self.output, "tools", False)
+
+        self.assertTrue(os.path.isfile(os.path.join(directory, "tools", "__main__.py")))
+        self.assertFalse(os.path.exists(os.path.join(directory, "tools", "service.py")))
+        self.assertFalse(os.path.exists(os.path.join(directory, "tests", "service_test.py")))
+        self.assertFalse("MICROSERVICE" in self.read("tools", "tools", "__main__.py"))
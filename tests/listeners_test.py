@@ -0,0 +1,196 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the listeners submodule."""
+import http.client
+import importlib
+import multiprocessing
+import os
+import shutil
+import socket
+import stat
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from flask import Flask
+
+from package.config import ServerConfig
+from package.devserver import PooledWSGIServer
+from package.listeners import (bind_unix_socket, close_listener, get_server_address,
+                               get_systemd_fds, inherit_socket, open_listener)
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """An HTTPConnection to a Unix domain socket."""
+
+    def __init__(self, path):
+        """Initiates the UnixHTTPConnection.
+
+        Args:
+            path (str): Path of the socket.
+        """
+        http.client.HTTPConnection.__init__(self, "localhost", timeout=10)
+        self.path = path
+
+    def connect(self):
+        """Connects to the socket."""
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+def serve_development(path, threads):
+    """Runs the development server on the Unix domain socket, until it is terminated."""
+    server_module = importlib.import_module("package.__main__")
+
+    with open(os.devnull, "w") as devnull:
+        sys.stdout = sys.stderr = devnull
+        server_module.start_development_server(
+            0, unix_socket=path, threads=threads, warmup_requests=0)
+
+class ListenersTest(unittest.TestCase):
+    """Executes tests for the listeners."""
+
+    def setUp(self):
+        """Creates a directory for the socket files."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "service.sock")
+
+    def tearDown(self):
+        """Removes the directory."""
+        shutil.rmtree(self.directory)
+
+    def test_bind_unix_socket(self):
+        """Test the socket file to get its mode and to be removed on close."""
+        sock = bind_unix_socket(self.path, mode=0o600)
+
+        self.assertTrue(stat.S_ISSOCK(os.stat(self.path).st_mode))
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+        self.assertEqual(get_server_address(sock), ("unix://%s" % self.path, 0))
+
+        close_listener(sock)
+        self.assertFalse(os.path.exists(self.path))
+        close_listener(None)
+
+    def test_existing_paths(self):
+        """Test stale sockets to be replaced, but live sockets and files not."""
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.path)
+        stale.close()
+
+        sock = bind_unix_socket(self.path)
+        self.assertRaises(OSError, bind_unix_socket, self.path)
+        close_listener(sock)
+
+        with open(self.path, "w") as outfile:
+            outfile.write("data")
+        self.assertRaises(OSError, bind_unix_socket, self.path)
+        self.assertTrue(os.path.isfile(self.path))
+
+    def test_replaced_socket_file(self):
+        """Test a socket file bound by another process not to be removed."""
+        sock = bind_unix_socket(self.path)
+        os.remove(self.path)
+        other = bind_unix_socket(self.path)
+
+        close_listener(sock)
+        self.assertTrue(os.path.exists(self.path))
+        close_listener(other)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_systemd_fds(self):
+        """Test the socket activation variables to be checked against the pid."""
+        pid = str(os.getpid())
+
+        self.assertEqual(get_systemd_fds({"LISTEN_PID": pid, "LISTEN_FDS": "2"}), [3, 4])
+        self.assertEqual(get_systemd_fds({"LISTEN_PID": "1", "LISTEN_FDS": "2"}), [])
+        self.assertEqual(get_systemd_fds({}), [])
+
+    def test_open_listener(self):
+        """Test the configured sockets to be opened in order of precedence."""
+        self.assertEqual(open_listener(ServerConfig(8080), {}), None)
+
+        sock = open_listener(ServerConfig(0, unix_socket=self.path, unix_socket_mode=0o600), {})
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+
+        inherited = open_listener(ServerConfig(0, fd=os.dup(sock.fileno())), {})
+        self.assertEqual(inherited.family, socket.AF_UNIX)
+        self.assertEqual(inherited.getsockname(), self.path)
+        inherited.close()
+
+        close_listener(sock)
+
+    def test_inherit_socket(self):
+        """Test a TCP socket to be detected from its file descriptor."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(1)
+
+        inherited = inherit_socket(os.dup(sock.fileno()))
+        self.assertEqual(inherited.family, socket.AF_INET)
+        self.assertEqual(get_server_address(inherited), sock.getsockname())
+
+        inherited.close()
+        sock.close()
+
+    def test_serve_unix_socket(self):
+        """Test requests to be served on a Unix domain socket."""
+        app = Flask("listeners_app")
+
+        @app.route("/hello")
+        def hello():
+            """A simple route."""
+            return "hello"
+
+        sock = bind_unix_socket(self.path)
+        host, port = get_server_address(sock)
+        server = PooledWSGIServer(host, port, app, threads=2, fd=sock.fileno())
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+
+        try:
+            connection = UnixHTTPConnection(self.path)
+            connection.request("GET", "/hello")
+            self.assertEqual(connection.getresponse().read(), b"hello")
+            connection.close()
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+            close_listener(sock)
+
+    def test_terminated_devserver(self):
+        """Test the development server to remove its socket file, once terminated."""
+        for threads in (0, 2):
+            process = multiprocessing.Process(target=serve_development, args=(self.path, threads))
+            process.start()
+
+            deadline = time.time() + 10
+            while not os.path.exists(self.path) and time.time() < deadline:
+                time.sleep(0.05)
+            self.assertTrue(os.path.exists(self.path))
+
+            process.terminate()
+            process.join(10)
+            self.assertFalse(os.path.exists(self.path))
@@ -0,0 +1,84 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the metrics submodule."""
+import unittest
+
+from package import builder
+from package import service
+from package.metrics import Metrics
+
+class MetricsTest(unittest.TestCase):
+    """Executes tests for the request metrics."""
+
+    def setUp(self):
+        """Sets up the tests."""
+        self.app = builder.make_app("test_app")
+        self.app.config["TESTING"] = True
+
+        @self.app.route("/fail")
+        def fail():
+            """A failing route."""
+            raise ValueError("fail")
+
+        self.client = self.app.test_client()
+
+    def test_metrics_route(self):
+        """Test the /get/metrics route to report latencies."""
+        self.client.get("/get/version")
+        self.client.get("/get/version")
+        self.client.get("/unknown")
+
+        response = self.client.get("/get/metrics")
+        body = response.data.decode("UTF-8")
+
+        self.assertTrue(response.content_type.startswith("text/plain"))
+        self.assertTrue('http_request_duration_seconds_count{route="/get/version"} 2' in body)
+        self.assertTrue('http_request_duration_seconds_bucket{route="<unmatched>",le="+Inf"} 1'
+                        in body)
+        self.assertTrue("http_requests_in_flight 1" in body)
+
+    def test_exceptions(self):
+        """Test handler exceptions to be counted."""
+        self.app.config["TESTING"] = False
+        self.client.get("/fail")
+
+        body = self.app.extensions["metrics"].render()
+        self.assertTrue(
+            'http_request_exceptions_total{route="/fail",exception="ValueError"} 1' in body)
+
+    def test_sitemap(self):
+        """Test the sitemap to list the metrics route."""
+        urls = [endpoint["url"] for endpoint in service.get_sitemap(self.app)]
+        self.assertTrue("/get/metrics" in urls)
+
+    def test_buckets(self):
+        """Test the histogram buckets to be cumulative."""
+        metrics = Metrics(buckets=(1.0, 2.0))
+        metrics.finish("/a", metrics.start() - 1.5)
+        metrics.finish("/a", metrics.start())
+
+        body = metrics.render()
+        self.assertTrue('http_request_duration_seconds_bucket{route="/a",le="1.0"} 1' in body)
+        self.assertTrue('http_request_duration_seconds_bucket{route="/a",le="2.0"} 2' in body)
+        self.assertTrue('http_request_duration_seconds_count{route="/a"} 2' in body)
@@ -0,0 +1,109 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the prefork submodule."""
+import os
+import signal
+import threading
+import time
+import unittest
+
+from package.prefork import RestartPolicy, Supervisor
+
+def crash(_):
+    """Worker crashing immediately."""
+    raise ValueError("crash")
+
+def serve(_):
+    """Worker serving until it gets terminated."""
+    while True:
+        time.sleep(0.01)
+
+class SupervisorTest(unittest.TestCase):
+    """Executes tests for the Supervisor."""
+
+    def test_respawn_crashed_workers(self):
+        """Test crashed workers to be respawned until max_restarts is reached."""
+        supervisor = Supervisor(
+            crash, workers=2, policy=RestartPolicy(max_restarts=3, backoff=0.01))
+
+        self.assertRaises(RuntimeError, supervisor.run)
+        self.assertEqual(supervisor.policy.count(), 4)
+        self.assertEqual(supervisor.children, {})
+
+    def test_ignore_interrupt(self):
+        """Test workers to survive SIGINT, which the supervisor turns into SIGTERM."""
+        supervisor = Supervisor(serve, workers=1)
+        alive = []
+
+        def control():
+            """Interrupts the worker and stops the supervisor."""
+            time.sleep(0.3)
+            pid = list(supervisor.children)[0]
+            os.kill(pid, signal.SIGINT)
+            time.sleep(0.3)
+            alive.append(pid in supervisor.children)
+            supervisor.stop()
+
+        thread = threading.Thread(target=control)
+        thread.start()
+        supervisor.run()
+        thread.join()
+
+        self.assertEqual(alive, [True])
+        self.assertEqual(supervisor.children, {})
+
+    def test_restart_policy(self):
+        """Test the backoff to grow and the crashes to expire after the window."""
+        policy = RestartPolicy(max_restarts=3, window=10.0, backoff=1.0, max_backoff=3.0)
+
+        self.assertEqual([policy.record_crash(now) for now in (0.0, 1.0, 2.0)],
+                         [1.0, 2.0, 3.0])
+        self.assertEqual(policy.record_crash(3.0), None)
+
+        self.assertEqual(policy.count(11.5), 2)
+        self.assertEqual(policy.record_crash(12.5), 2.0)
+
+    def test_graceful_restart_and_stop(self):
+        """Test workers to be replaced on reload and terminated on stop."""
+        supervisor = Supervisor(serve, workers=2)
+        pids = []
+
+        def control():
+            """Reloads and stops the supervisor."""
+            time.sleep(0.3)
+            pids.append(set(supervisor.children))
+            os.kill(os.getpid(), signal.SIGHUP)
+            time.sleep(0.5)
+            pids.append(set(supervisor.children))
+            supervisor.stop()
+
+        thread = threading.Thread(target=control)
+        thread.start()
+        supervisor.run()
+        thread.join()
+
+        self.assertEqual(len(pids[0]), 2)
+        self.assertEqual(len(pids[1]), 2)
+        self.assertFalse(pids[0] & pids[1])
+        self.assertEqual(supervisor.children, {})
@@ -0,0 +1,152 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the profiler submodule."""
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+import unittest
+
+from package import builder
+from package import profiler
+
+def spin(stopped):
+    """Keeps a thread busy until stopped is set."""
+    while not stopped.is_set():
+        sum(range(1000))
+
+class SamplingProfilerTest(unittest.TestCase):
+    """Executes tests for the SamplingProfiler."""
+
+    def setUp(self):
+        """Creates a temporary profile directory."""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Removes the profile directory."""
+        shutil.rmtree(self.directory)
+
+    def test_bounded_window(self):
+        """Test the window to end on its own and to dump collapsed stacks."""
+        stopped = threading.Event()
+        thread = threading.Thread(target=spin, args=(stopped,))
+        thread.start()
+
+        sampler = profiler.SamplingProfiler(self.directory, interval=0.001, max_duration=0.1)
+        self.assertTrue(sampler.start(duration=10))
+        self.assertFalse(sampler.start())
+        sampler.join(5)
+        stopped.set()
+        thread.join()
+
+        self.assertFalse(sampler.running)
+        self.assertEqual(os.path.dirname(sampler.last_profile), self.directory)
+        self.assertTrue(str(os.getpid()) in sampler.last_profile)
+
+        with open(sampler.last_profile) as infile:
+            lines = infile.read().splitlines()
+
+        self.assertTrue(any("spin (profiler_test.py:" in line for line in lines))
+        for line in lines:
+            _, count = line.rsplit(" ", 1)
+            self.assertTrue(int(count) > 0)
+
+    def test_toggle(self):
+        """Test toggling to start and to end a window early."""
+        sampler = profiler.SamplingProfiler(self.directory, max_duration=60)
+
+        sampler.toggle()
+        self.assertTrue(sampler.running)
+        sampler.toggle()
+        sampler.join(5)
+
+        self.assertFalse(sampler.running)
+        self.assertTrue(os.path.isfile(sampler.last_profile))
+
+    def test_signal(self):
+        """Test the signal handler to toggle the profiler from another thread."""
+        sampler = profiler.SamplingProfiler(self.directory, max_duration=60)
+        previous = signal.getsignal(signal.SIGUSR2)
+        self.addCleanup(signal.signal, signal.SIGUSR2, previous)
+
+        profiler.install_signal_handler(sampler)
+        with sampler._lock:     # pylint: disable=protected-access
+            os.kill(os.getpid(), signal.SIGUSR2)
+
+        for _ in range(100):
+            if sampler.running:
+                break
+            time.sleep(0.01)
+
+        self.assertTrue(sampler.running)
+        sampler.stop()
+        sampler.join(5)
+
+    def test_is_authorized(self):
+        """Test the bearer token to be required."""
+        self.assertTrue(profiler.is_authorized("Bearer secret", "secret"))
+        self.assertFalse(profiler.is_authorized("Bearer wrong", "secret"))
+        self.assertFalse(profiler.is_authorized(None, "secret"))
+        self.assertFalse(profiler.is_authorized("Bearer ", ""))
+
+class ProfileRouteTest(unittest.TestCase):
+    """Executes tests for the /admin/profile route."""
+
+    def setUp(self):
+        """Creates an application profiling into a temporary directory."""
+        self.directory = tempfile.mkdtemp()
+        self.app = builder.make_app("profile_app")
+        self.app.extensions["profiler"].directory = self.directory
+        self.app.extensions["profiler"].max_duration = 0.05
+        self.client = self.app.test_client()
+        os.environ.pop("ADMIN_TOKEN", None)
+
+    def tearDown(self):
+        """Removes the token and the profile directory."""
+        os.environ.pop("ADMIN_TOKEN", None)
+        self.app.extensions["profiler"].join(5)
+        shutil.rmtree(self.directory)
+
+    def test_disabled_without_token(self):
+        """Test the route to be hidden without an admin token."""
+        self.assertEqual(self.client.post("/admin/profile").status_code, 404)
+
+    def test_protected(self):
+        """Test the route to require the admin token."""
+        os.environ["ADMIN_TOKEN"] = "secret"
+
+        self.assertEqual(self.client.post("/admin/profile").status_code, 403)
+
+        headers = {"Authorization": "Bearer secret"}
+        response = self.client.post("/admin/profile?seconds=10", headers=headers)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.get_json()["pid"], os.getpid())
+        self.assertEqual(self.client.post("/admin/profile", headers=headers).status_code, 409)
+
+        self.app.extensions["profiler"].join(5)
+        response = self.client.get("/admin/profile", headers=headers)
+        self.assertFalse(response.get_json()["running"])
+        self.assertTrue(response.get_json()["last_profile"].startswith(self.directory))
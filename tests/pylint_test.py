@@ -23,13 +23,25 @@
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """Runs pylint on your package and generates HTML reports."""
 
+import ast
+import hashlib
+import io
+import json
+import shutil
 import subprocess
+import sys
+import tempfile
 import unittest
 import multiprocessing
 import os
+from multiprocessing.pool import ThreadPool
 
 import jinja2
 
+TESTS_DIRECTORY  = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIRECTORY   = os.path.dirname(TESTS_DIRECTORY)
+REPORT_DIRECTORY = "%s/results/pylint" % TESTS_DIRECTORY
+
 PROJECT_NAME="package"
 
 class ReportGenerator(object):
@@ -37,6 +49,8 @@ class ReportGenerator(object):
 
     reports = {}
 
+    environments = {}
+
     categories = {
         "R": "Refactor",
         "C": "Convention",
@@ -45,12 +59,12 @@ class ReportGenerator(object):
         "F": "Fatal Error"
     }
 
-    def __init__(self, module_name, pylint_report, output_directory="results/pylint"):
+    def __init__(self, module_name, pylint_report, output_directory=REPORT_DIRECTORY):
         """Initiates the ReportGenerator.
 
         Args:
             module_name (str):      Name of the linted module/package.
-            pylint_report (str):    Linter output.
+            pylint_report (list):   Message records, as created by make_record.
             output_directory (str): Directory to place the reports in.
         """
         super(ReportGenerator, self).__init__()
@@ -64,87 +78,89 @@ class ReportGenerator(object):
 
     @classmethod
     def get_jinja2_template(cls, template_dir="html_templates", template="main.html"):
-        """Creates and returns a jinja2.Template.
+        """Returns a jinja2.Template from the shared environment.
+
+        The environment is created once per template directory. Compiled templates
+        are kept in memory and in a bytecode cache in results/pylint/bytecode.
 
         Args:
             template_dir (str): Directory containing the HTML templates.
             template (str):     Name of the template.
 
         Returns:
-            jinja2.Template: Returns the jinja2 environment.
+            jinja2.Template: Returns the jinja2 template.
         """
-        template_dir = "%s/%s" % (os.path.dirname(os.path.abspath(__file__)), template_dir)
-        jinja_env = jinja2.Environment(
-            loader=jinja2.FileSystemLoader(template_dir),
-            trim_blocks=True)
+        template_dir = "%s/%s" % (TESTS_DIRECTORY, template_dir)
+
+        if template_dir not in cls.environments:
+            bytecode_dir = "%s/bytecode" % REPORT_DIRECTORY
+            os.makedirs(bytecode_dir, exist_ok=True)
 
-        return jinja_env.get_template(template)
+            cls.environments[template_dir] = jinja2.Environment(
+                loader=jinja2.FileSystemLoader(template_dir),
+                bytecode_cache=jinja2.FileSystemBytecodeCache(bytecode_dir),
+                trim_blocks=True)
+
+        return cls.environments[template_dir].get_template(template)
 
     def generate_summary(self):
         """Generates a summary for the main report."""
-        ReportGenerator.reports[self.module_name] = {}
-
-        for category in ["C", "R", "W", "E", "F"]:
-            ReportGenerator.reports[self.module_name][category] = 0
+        summary = dict((category, 0) for category in ["C", "R", "W", "E", "F"])
 
-            for submodule in self.parsed_report:
-                count = len([i for i in self.parsed_report[submodule] if i["category"] == category])
+        for messages in self.parsed_report.values():
+            for message in messages:
+                summary[message["category"]] = summary.get(message["category"], 0) + 1
 
-                ReportGenerator.reports[self.module_name][category] += count
+        summary["state"] = "ok"
 
-        ReportGenerator.reports[self.module_name]["state"] = "ok"
+        if summary["C"] > 0:                                                   # pragma: no cover
+            summary["state"] = "convention"                                    # pragma: no cover
+        if summary["R"] > 0:                                                   # pragma: no cover
+            summary["state"] = "refactor"                                      # pragma: no cover
+        if summary["W"] > 0:                                                   # pragma: no cover
+            summary["state"] = "warning"                                       # pragma: no cover
+        if summary["E"] > 0:                                                   # pragma: no cover
+            summary["state"] = "error"                                         # pragma: no cover
+        if summary["F"] > 0:                                                   # pragma: no cover
+            summary["state"] = "fatal"                                         # pragma: no cover
 
-        if ReportGenerator.reports[self.module_name]["C"] > 0:                 # pragma: no cover
-            ReportGenerator.reports[self.module_name]["state"] = "convention"  # pragma: no cover
-        if ReportGenerator.reports[self.module_name]["R"] > 0:                 # pragma: no cover
-            ReportGenerator.reports[self.module_name]["state"] = "refactor"    # pragma: no cover
-        if ReportGenerator.reports[self.module_name]["W"] > 0:                 # pragma: no cover
-            ReportGenerator.reports[self.module_name]["state"] = "warning"     # pragma: no cover
-        if ReportGenerator.reports[self.module_name]["E"] > 0:                 # pragma: no cover
-            ReportGenerator.reports[self.module_name]["state"] = "error"       # pragma: no cover
-        if ReportGenerator.reports[self.module_name]["F"] > 0:                 # pragma: no cover
-            ReportGenerator.reports[self.module_name]["state"] = "fatal"       # pragma: no cover
+        ReportGenerator.reports[self.module_name] = summary
 
-    def generate_report_for_submodule(self, module_output):
-        """Generates a report for a specific (submodule).
+    @classmethod
+    def make_record(cls, message):
+        """Creates a compact record from a message of pylint's JSON output.
 
         Args:
-            module_output (str): pylint output of a specific submodule.
-        """
-        result = []
-
-        for entry in module_output:                                            # pragma: no cover
-            entry = entry.split(":")
-
-            if len(entry) < 8:
-                continue
-
-            result.append({
-                "category":      entry[0],
-                "category_name": entry[1],
-                "message_id":    entry[2],
-                "line":          entry[3],
-                "column":        entry[4],
-                "object":        entry[5],
-                "message":       entry[6],
-                "symbol":        entry[7]
-            })
-
-        result.sort(key=lambda i: i["line"])                                   # pragma: no cover
+            message (dict): Message as reported by pylint.
 
-        return result
+        Returns:
+            dict: Returns the record used by the templates and the summary.
+        """
+        return {
+            "module":        message.get("module", ""),
+            "category":      message["message-id"][:1],
+            "category_name": message.get("type", ""),
+            "message_id":    message["message-id"],
+            "line":          message.get("line") or 0,
+            "column":        message.get("column") or 0,
+            "object":        message.get("obj", ""),
+            "message":       message.get("message", ""),
+            "symbol":        message.get("symbol", "")
+        }
 
     def parse_report(self):
-        """Parses the report into usable format for the ReportGenerator.
+        """Groups the message records by module in a single pass.
 
         Returns:
-            list: Returns the parsed report.
+            dict: Returns the records of every module, sorted by line.
         """
         result = {}
 
-        for module in self.pylint_report.split("************* Module "):
-            module = module.split("\n")
-            result[module[0].strip()] = self.generate_report_for_submodule(module[1:])
+        for record in self.pylint_report:
+            result.setdefault(record["module"], []).append(record)
+
+        for records in result.values():
+            records.sort(key=lambda i: (i["line"], i["column"]))
 
         return result
 
@@ -155,11 +171,10 @@ class ReportGenerator(object):
             output_directory (str): Directory used to generate the report in.
         """
         template = ReportGenerator.get_jinja2_template(template="module.html")
-        outfile = open("%s/%s.html" % (output_directory, self.module_name), "w")
-        outfile.write(template.render(
-            module_name=self.module_name,
-            messages=self.parsed_report))
-        outfile.close()
+        with open("%s/%s.html" % (output_directory, self.module_name), "w") as outfile:
+            outfile.writelines(template.generate(
+                module_name=self.module_name,
+                messages=self.parsed_report))
 
     @classmethod
     def persist_main_report(cls, output_directory):
@@ -169,20 +184,367 @@ class ReportGenerator(object):
             output_directory (str): Directory used to generate the report in.
         """
         template = ReportGenerator.get_jinja2_template(template="index.html")
-        outfile = open("%s/index.html" % output_directory, "w")
-        outfile.write(template.render(reports=cls.reports, categories=ReportGenerator.categories))
-        outfile.close()
+        with open("%s/index.html" % output_directory, "w") as outfile:
+            outfile.writelines(template.generate(
+                reports=cls.reports, categories=ReportGenerator.categories))
+
+def iter_json_array(stream, chunk_size=65536):
+    """Yields the elements of a JSON array while it is read from the stream.
+
+    Args:
+        stream (file):    Text stream containing a JSON array.
+        chunk_size (int): Number of characters to read at once.
+
+    Yields:
+        object: The decoded elements of the array.
+    """
+    decoder = json.JSONDecoder()
+    buffer  = ""
+    started = False
+
+    for chunk in iter(lambda: stream.read(chunk_size), ""):
+        buffer += chunk
+        position = 0
+
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+
+            if position == len(buffer):
+                break
+
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array.")
+                started = True
+                position += 1
+                continue
+
+            if buffer[position] == "]":
+                return
+
+            try:
+                element, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                break
+
+            yield element
+
+        buffer = buffer[position:]
+
+class IncrementalLinter(object):
+    """Runs pylint on changed files only and caches the results per file.
+
+    A file is linted again, if its content, the content of a project module it
+    imports, directly or indirectly, the pylintrc or the pylint version changed.
+    Stale files are split into chunks, which are linted by parallel pylint
+    processes. Targets and files are relative to the root directory, which pylint
+    runs in, so it picks up the pylintrc of the project.
+    """
+
+    def __init__(self, cache_file=None, jobs=None, root=ROOT_DIRECTORY):
+        """Initiates the IncrementalLinter.
+
+        Args:
+            cache_file (str): File to store the results per file in, defaults to
+                              cache.json in the report directory.
+            jobs (int):       Number of parallel pylint processes.
+            root (str):       Directory of the project.
+        """
+        super(IncrementalLinter, self).__init__()
+
+        self.root       = root
+        self.cache_file = cache_file or "%s/cache.json" % REPORT_DIRECTORY
+        self.jobs       = jobs or multiprocessing.cpu_count()
+        self.cache      = self.load_cache()
+        self.salt       = self.get_salt(root)
+        self.modules    = {}
+
+    @classmethod
+    def get_salt(cls, directory):
+        """Returns a hash of the pylint version and the pylintrc in use.
+
+        Args:
+            directory (str): Directory pylint runs in.
+
+        Returns:
+            str: Returns the hash.
+        """
+        salt = hashlib.sha1(b"records")
+
+        try:
+            import pylint
+            salt.update(pylint.__version__.encode("UTF-8"))
+        except (ImportError, AttributeError):                                  # pragma: no cover
+            pass                                                                # pragma: no cover
+
+        while True:
+            for name in ("pylintrc", ".pylintrc"):
+                if os.path.isfile(os.path.join(directory, name)):
+                    with open(os.path.join(directory, name), "rb") as infile:
+                        salt.update(infile.read())
+                    return salt.hexdigest()
+
+            if os.path.dirname(directory) == directory:
+                return salt.hexdigest()
+            directory = os.path.dirname(directory)
+
+    def load_cache(self):
+        """Loads the cached results from disk.
+
+        Returns:
+            dict: Returns the cached results, keyed by file.
+        """
+        try:
+            with open(self.cache_file, "r") as infile:
+                return json.load(infile)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def save_cache(self):
+        """Writes the cached results to disk."""
+        temporary = "%s.%d" % (self.cache_file, os.getpid())
+        try:
+            with open(temporary, "w") as outfile:
+                json.dump(self.cache, outfile)
+            os.rename(temporary, self.cache_file)
+        except (IOError, OSError):                                              # pragma: no cover
+            pass                                                                # pragma: no cover
+
+    def collect_files(self, relative_path):
+        """Returns all python files of the given module or package.
+
+        Args:
+            relative_path (str): Path to the module/package, relative to the root.
+
+        Returns:
+            list: Returns the sorted paths of the files, relative to the root.
+
+        Raises:
+            ValueError: Raised if the path contains no python files, e.g. because it
+                is a module name or does not exist.
+        """
+        if os.path.isfile(os.path.join(self.root, relative_path)):
+            return [os.path.normpath(relative_path)]
+
+        files = []
+        for directory, _, names in os.walk(os.path.join(self.root, relative_path)):
+            files.extend(os.path.relpath(os.path.join(directory, name), self.root)
+                         for name in names if name.endswith(".py"))
+
+        if not files:
+            raise ValueError("%s contains no python files in %s" % (relative_path, self.root))
+
+        return sorted(files)
+
+    def hash_content(self, path):
+        """Returns the hash of the content of the file.
+
+        Args:
+            path (str): Path of the file, relative to the root.
+
+        Returns:
+            str: Returns the hash.
+        """
+        module = self.modules.setdefault(path, {})
+        if "digest" not in module:
+            with open(os.path.join(self.root, path), "rb") as infile:
+                module["digest"] = hashlib.sha1(infile.read()).hexdigest()
+
+        return module["digest"]
+
+    def resolve_module(self, directory, name):
+        """Returns the file of the module, if it is part of the project.
+
+        Args:
+            directory (str): Directory to look up the module in, relative to the root.
+            name (str):      Dotted name of the module.
+
+        Returns:
+            str: Returns the path of the file, relative to the root, or None.
+        """
+        base = os.path.join(directory, *name.split(".")) if name else directory
+
+        for path in (base + ".py", os.path.join(base, "__init__.py")):
+            if os.path.isfile(os.path.join(self.root, path)):
+                return os.path.normpath(path)
+
+        return None
+
+    def find_imports(self, path):
+        """Returns the project modules imported by the file.
+
+        Modules are looked up next to the file, as the package imports its modules by
+        their bare names, and in the root directory. Relative imports are resolved
+        against the package of the file.
+
+        Args:
+            path (str): Path of the file, relative to the root.
+
+        Returns:
+            list: Returns the paths of the imported files, relative to the root.
+        """
+        module = self.modules.setdefault(path, {})
+        if "imports" in module:
+            return module["imports"]
+
+        try:
+            with open(os.path.join(self.root, path), "rb") as infile:
+                tree = ast.parse(infile.read(), path)
+        except (SyntaxError, ValueError):
+            tree = ast.Module(body=[], type_ignores=[])
+
+        directory = os.path.dirname(path)
+        requests  = []
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                requests.extend(((directory, ""), alias.name) for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                bases = (directory, "")
+                if node.level:
+                    bases = (os.path.normpath(os.path.join(directory, *[".."] * (node.level - 1))),)
+
+                name = node.module or ""
+                requests.append((bases, name))
+                requests.extend((bases, ("%s.%s" % (name, alias.name)).lstrip("."))
+                                for alias in node.names)
+
+        imported = set()
+        for bases, name in requests:
+            for base in bases:
+                resolved = self.resolve_module(base, name)
+                if resolved is not None:
+                    imported.add(resolved)
+                    break
+
+        imported.discard(os.path.normpath(path))
+        module["imports"] = sorted(imported)
+
+        return module["imports"]
+
+    def hash_file(self, path):
+        """Returns the cache key for the current content of the file.
+
+        The key covers the project modules the file imports, directly or indirectly,
+        as pylint infers names and types across modules.
+
+        Args:
+            path (str): Path of the file, relative to the root.
+
+        Returns:
+            str: Returns the hash.
+        """
+        dependencies = set()
+        pending      = [path]
+
+        while pending:
+            for imported in self.find_imports(pending.pop()):
+                if imported not in dependencies and imported != path:
+                    dependencies.add(imported)
+                    pending.append(imported)
+
+        key = hashlib.sha1(self.salt.encode("UTF-8"))
+        for dependency in [path] + sorted(dependencies):
+            key.update(("%s:%s\n" % (dependency, self.hash_content(dependency))).encode("UTF-8"))
+
+        return key.hexdigest()
+
+    def run_pylint(self, files):
+        """Runs pylint on the given files and streams its JSON output.
+
+        Args:
+            files (list): Paths of the files.
+
+        Returns:
+            tuple: Returns a tuple, containing (results, cacheable). The results map every
+                file to the list of its message records.
+
+        Raises:
+            RuntimeError: Raised if pylint failed without reporting any message, e.g.
+                because it crashed.
+        """
+        command = [sys.executable, "-m", "pylint", "--jobs=1", "--output-format=json"] + files
+        results = dict((path, []) for path in files)
+        reported = 0
+
+        with tempfile.TemporaryFile("w+") as errors:
+            with subprocess.Popen(command,
+                                  cwd=self.root,
+                                  stdin=subprocess.DEVNULL,
+                                  stdout=subprocess.PIPE,
+                                  stderr=errors,
+                                  universal_newlines=True) as proc:
+                for message in iter_json_array(proc.stdout):
+                    results.setdefault(os.path.normpath(message.get("path", "")), []).append(
+                        ReportGenerator.make_record(message))
+                    reported += 1
+
+            # fatal errors (1) and usage errors (32) must not be cached
+            if proc.returncode & 33 and not reported:
+                errors.seek(0)
+                raise RuntimeError("pylint failed with %d:\n%s" % (proc.returncode, errors.read()))
+
+        return results, not proc.returncode & 33
+
+    def lint(self, targets):
+        """Lints the given modules/packages, using cached results for unchanged files.
+
+        Args:
+            targets (list): Paths to the modules/packages.
+
+        Returns:
+            dict: Returns the message records for every target.
+        """
+        files  = dict((target, self.collect_files(target)) for target in targets)
+        hashes = dict((path, self.hash_file(path)) for paths in files.values() for path in paths)
+
+        stale = sorted(path for path, digest in hashes.items()
+                       if self.cache.get(path, {}).get("hash") != digest)
+
+        if stale:
+            chunks = [stale[i::self.jobs] for i in range(min(self.jobs, len(stale)))]
+            pool = ThreadPool(len(chunks))
+            try:
+                for results, cacheable in pool.map(self.run_pylint, chunks):
+                    for path, records in results.items():
+                        self.cache[path] = {
+                            "hash":     hashes.get(path) if cacheable else None,
+                            "messages": records
+                        }
+            finally:
+                pool.close()
+
+            self.save_cache()
+
+        reports = {}
+        for target, paths in files.items():
+            reports[target] = [record for path in paths
+                               for record in self.cache.get(path, {}).get("messages", [])]
+
+        return reports
 
 class PyLintTest(unittest.TestCase):
     """Checks your code with pylint."""
 
+    targets = (PROJECT_NAME, "tests")
+    reports = {}
+
+    @classmethod
+    def setUpClass(cls):
+        """Sets up the PyLintTest class.
+
+        This method lints all targets at once, so pylint runs in parallel.
+        """
+        cls.reports = IncrementalLinter().lint(cls.targets)
+
     @classmethod
     def tearDownClass(cls):
         """Tears down the PyLintTest class.
 
         This method will start the overview report generation.
         """
-        ReportGenerator.persist_main_report("results/pylint")
+        ReportGenerator.persist_main_report(REPORT_DIRECTORY)
 
     def get_pylint_output_and_status(self, relative_path):
         """Runs pylint on the given path.
@@ -191,17 +553,12 @@ class PyLintTest(unittest.TestCase):
             relative_path (str): Path to the module/package to be checked.
 
         Returns:
-            str: Returns the output of pylint.
+            list: Returns the message records reported by pylint.
         """
-        command = "pylint --jobs=%s %s" % (multiprocessing.cpu_count(), relative_path)
-        proc = subprocess.Popen(command.split(" "),
-                                stdin=subprocess.PIPE,
-                                stdout=subprocess.PIPE,
-                                stderr=subprocess.PIPE)
-
-        out     = proc.communicate()[0]
+        if relative_path not in self.reports:
+            self.reports.update(IncrementalLinter().lint([relative_path]))
 
-        return out.decode("UTF-8")
+        return self.reports[relative_path]
 
     def run_pylint_and_generate_report(self, module_name):
         """Checks the given module with pylint and generated the report.
@@ -210,13 +567,13 @@ class PyLintTest(unittest.TestCase):
             module_name (str): Name of the module to be checked.
 
         Returns:
-            int: Returns the return code of pylint.
+            int: Returns the number of messages reported by pylint.
         """
         report = self.get_pylint_output_and_status(module_name)
 
         # Generate the HTML Report for the module
         generator = ReportGenerator(module_name, report)
-        generator.persist_report("results/pylint")
+        generator.persist_report(REPORT_DIRECTORY)
 
         return len(report)
 
@@ -229,3 +586,117 @@ class PyLintTest(unittest.TestCase):
         """Checking your tests with pylint."""
         errors = self.run_pylint_and_generate_report("tests")
         self.assertTrue(errors == 0)
+
+class ReportPipelineTest(unittest.TestCase):
+    """Checks the parsing of pylint's JSON output."""
+
+    def test_iter_json_array(self):
+        """Test elements to be decoded across chunk boundaries."""
+        stream = io.StringIO('[\n    {"message": "a: b ] c"},\n    {"line": 12}\n]\n')
+
+        self.assertEqual(list(iter_json_array(stream, chunk_size=5)),
+                         [{"message": "a: b ] c"}, {"line": 12}])
+        self.assertEqual(list(iter_json_array(io.StringIO(""))), [])
+
+    def test_summary(self):
+        """Test records to be grouped and counted per category."""
+        messages = [
+            {"module": "a", "message-id": "C0111", "type": "convention", "line": 9,
+             "message": "with: colons"},
+            {"module": "a", "message-id": "W0612", "type": "warning", "line": 2},
+            {"module": "b", "message-id": "C0103", "type": "convention", "line": 1}
+        ]
+
+        generator = ReportGenerator(
+            "__pipeline_test__", [ReportGenerator.make_record(i) for i in messages])
+        summary = ReportGenerator.reports.pop("__pipeline_test__")
+
+        self.assertEqual([i["line"] for i in generator.parsed_report["a"]], [2, 9])
+        self.assertEqual(generator.parsed_report["a"][1]["message"], "with: colons")
+        self.assertEqual((summary["C"], summary["W"], summary["state"]), (2, 1, "warning"))
+
+    def test_shared_environment(self):
+        """Test templates to be compiled once per process."""
+        first  = ReportGenerator.get_jinja2_template(template="module.html")
+        second = ReportGenerator.get_jinja2_template(template="module.html")
+
+        self.assertTrue(first is second)
+
+class IncrementalLinterTest(unittest.TestCase):
+    """Checks the caching of the IncrementalLinter."""
+
+    def setUp(self):
+        """Creates a project with a single module."""
+        self.directory = tempfile.mkdtemp()
+        shutil.copy(os.path.join(ROOT_DIRECTORY, ".pylintrc"), self.directory)
+        self.write("module.py", '"""A module."""\n')
+
+    def tearDown(self):
+        """Removes the project."""
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content, mode="w"):
+        """Writes a file of the project."""
+        with open(os.path.join(self.directory, name), mode) as outfile:
+            outfile.write(content)
+
+    def lint(self, targets=("module.py",)):
+        """Lints the targets and returns the reports and the linted files."""
+        linter = IncrementalLinter(
+            os.path.join(self.directory, "cache.json"), jobs=1, root=self.directory)
+        linted = []
+        run_pylint = linter.run_pylint
+
+        def record(files):
+            """Records the linted files."""
+            linted.extend(files)
+            return run_pylint(files)
+
+        linter.run_pylint = record
+
+        return linter.lint(list(targets)), linted
+
+    def test_cache(self):
+        """Test unchanged files to be cached and edited files to be linted again."""
+        reports, linted = self.lint()
+        self.assertEqual((reports, linted), ({"module.py": []}, ["module.py"]))
+        self.assertEqual(self.lint(), (reports, []))
+
+        self.write("module.py", "import os\n", "a")
+        reports, linted = self.lint()
+        self.assertEqual(linted, ["module.py"])
+        self.assertEqual([i["symbol"] for i in reports["module.py"]], ["unused-import"])
+
+    def test_pylintrc_change(self):
+        """Test all files to be linted again, once the pylintrc changed."""
+        self.lint()
+        self.write(".pylintrc", "\n# changed\n", "a")
+
+        self.assertEqual(self.lint()[1], ["module.py"])
+
+    def test_imported_change(self):
+        """Test files to be linted again, once a module they import changed."""
+        os.mkdir(os.path.join(self.directory, "package"))
+        self.write("package/__init__.py", '"""A package."""\n')
+        self.write("package/names.py", '"""Names."""\n\nNAME = "name"\n')
+        self.write("package/user.py", '"""Imports a name."""\n\nfrom names import NAME\n\n'
+                                      'print(NAME)\n')
+        self.write("module.py", '"""Imports a package."""\n\nfrom package import user\n\n'
+                                'print(user)\n')
+
+        self.lint(["module.py", "package"])
+        self.write("package/names.py", '"""Names."""\n\nRENAMED = "name"\n')
+
+        reports, linted = self.lint(["module.py", "package"])
+        self.assertEqual(sorted(linted), ["module.py", "package/names.py", "package/user.py"])
+        self.assertEqual([i["symbol"] for i in reports["package"]], ["no-name-in-module"])
+
+    def test_failures(self):
+        """Test missing targets and crashes of pylint to fail loudly."""
+        os.mkdir(os.path.join(self.directory, "empty"))
+
+        self.assertRaises(ValueError, self.lint, ["missing"])
+        self.assertRaises(ValueError, self.lint, ["empty"])
+
+        self.write(".pylintrc", '[MASTER]\ninit-hook=raise ValueError("broken")\n')
+        self.assertRaises(RuntimeError, self.lint)
@@ -0,0 +1,303 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Runs the test suite in parallel, slowest test classes first.
+
+The suite is split into its test classes, which keep their setUpClass fixtures,
+and the classes are run by a pool of processes. The durations of every run are
+recorded in results/durations.json and the next run starts the slowest classes
+first, so the longest one does not end up last on a single process. Classes
+without a recorded duration are started before all others.
+
+Every process measures the coverage of the project and the tests. The data is
+merged into the HTML report in results/coverage, just like nosetests -c nose.cfg:
+
+    python tests/runner.py --processes 4
+
+The process exits with 1, if a test failed.
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+import unittest
+
+TESTS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIRECTORY  = os.path.dirname(TESTS_DIRECTORY)
+
+PROJECT_NAME="package"
+
+sys.path.append(ROOT_DIRECTORY)
+sys.path.append("%s/%s" % (ROOT_DIRECTORY, PROJECT_NAME))
+
+RESULTS_DIRECTORY  = "%s/results" % TESTS_DIRECTORY
+DURATIONS          = "%s/durations.json" % RESULTS_DIRECTORY
+COVERAGE_DATA      = "%s/.coverage" % RESULTS_DIRECTORY
+COVERAGE_DIRECTORY = "%s/coverage" % RESULTS_DIRECTORY
+COVERAGE_SOURCES   = ["%s/%s" % (ROOT_DIRECTORY, PROJECT_NAME), TESTS_DIRECTORY]
+
+_COVERAGE = None
+
+def collect_test_classes(pattern="*_test.py"):
+    """Discovers the test classes of the suite.
+
+    Args:
+        pattern (str): Pattern of the test modules.
+
+    Returns:
+        list: Returns the dotted names of the test classes, e.g. "tests.cache_test.LRUCacheTest".
+    """
+    suite = unittest.TestLoader().discover(
+        TESTS_DIRECTORY, pattern=pattern, top_level_dir=ROOT_DIRECTORY)
+    names = []
+
+    def visit(test):
+        """Collects the classes of all tests within test."""
+        if isinstance(test, unittest.TestSuite):
+            for child in test:
+                visit(child)
+            return
+
+        # import errors are reported by a _FailedTest, which is run like any other
+        name = "%s.%s" % (type(test).__module__, type(test).__name__)
+        if name not in names:
+            names.append(name)
+
+    visit(suite)
+    return names
+
+def load_durations(path=DURATIONS):
+    """Loads the recorded durations of the test classes.
+
+    Args:
+        path (str): Path of the durations file.
+
+    Returns:
+        dict: Returns the seconds per test class, empty if nothing was recorded yet.
+    """
+    try:
+        with open(path, "r") as infile:
+            return json.load(infile)
+    except (IOError, ValueError):
+        return {}
+
+def save_durations(durations, path=DURATIONS):
+    """Records the durations of the test classes.
+
+    Args:
+        durations (dict): Seconds per test class.
+        path (str):       Path of the durations file.
+    """
+    with open(path, "w") as outfile:
+        json.dump(durations, outfile, indent=2, sort_keys=True)
+
+def schedule(names, durations):
+    """Orders the test classes, slowest first.
+
+    Started in this order by a pool, the classes are distributed like the
+    longest processing time first heuristic does.
+
+    Args:
+        names (list):     Names of the test classes.
+        durations (dict): Recorded seconds per test class.
+
+    Returns:
+        list: Returns the names, unknown classes first and the others by duration.
+    """
+    return sorted(names, key=lambda name: -durations.get(name, float("inf")))
+
+def start_coverage():
+    """Starts measuring the coverage within a worker process."""
+    global _COVERAGE     # pylint: disable=global-statement
+    import coverage
+
+    _COVERAGE = coverage.Coverage(
+        data_file=COVERAGE_DATA, data_suffix=True, branch=True, source=COVERAGE_SOURCES)
+    _COVERAGE.start()
+
+def work(tasks, results, with_coverage):
+    """Runs test classes from tasks until it receives None.
+
+    Args:
+        tasks (multiprocessing.Queue):   Names of the test classes to be run.
+        results (multiprocessing.Queue): Queue for the results of run_test_class.
+        with_coverage (bool):            Whether to measure the coverage.
+    """
+    os.chdir(TESTS_DIRECTORY)
+    if with_coverage:
+        start_coverage()
+
+    for name in iter(tasks.get, None):
+        results.put(run_test_class(name))
+
+def run_test_class(name):
+    """Runs a test class.
+
+    Args:
+        name (str): Dotted name of the test class.
+
+    Returns:
+        dict: Returns the "name", "duration", "tests" and "failures" of the run and
+            its "output".
+    """
+    stream = io.StringIO()
+    start = time.time()
+
+    try:
+        suite = unittest.TestLoader().loadTestsFromName(name)
+    except Exception:   # pylint: disable=broad-except
+        import traceback
+        return {"name": name, "duration": 0.0, "tests": 0, "failures": 1,
+                "output": traceback.format_exc()}
+
+    result = unittest.TextTestRunner(stream=stream, verbosity=2).run(suite)
+
+    if _COVERAGE is not None:
+        _COVERAGE.stop()
+        _COVERAGE.save()
+        _COVERAGE.start()
+
+    return {
+        "name":     name,
+        "duration": time.time() - start,
+        "tests":    result.testsRun,
+        "failures": len(result.failures) + len(result.errors) + len(result.unexpectedSuccesses),
+        "output":   stream.getvalue()
+    }
+
+def report_coverage():
+    """Merges the coverage data of all processes into the HTML report.
+
+    Returns:
+        float: Returns the total coverage in percent.
+    """
+    import coverage
+
+    merged = coverage.Coverage(data_file=COVERAGE_DATA, branch=True, source=COVERAGE_SOURCES)
+    merged.combine()
+    merged.save()
+
+    return merged.html_report(directory=COVERAGE_DIRECTORY)
+
+def run_tests(processes=None, with_coverage=True, pattern="*_test.py"):
+    """Runs the suite on a pool of processes.
+
+    Args:
+        processes (int):      Number of processes, defaults to the number of CPUs.
+        with_coverage (bool): Whether to measure the coverage.
+        pattern (str):        Pattern of the test modules.
+
+    Returns:
+        list: Returns the results of all test classes, see run_test_class.
+    """
+    os.chdir(TESTS_DIRECTORY)
+
+    durations = load_durations()
+    names = schedule(collect_test_classes(pattern), durations)
+
+    # spawned processes import the tests after the coverage is started. Unlike the
+    # workers of a multiprocessing.Pool, they may start processes of their own.
+    context = multiprocessing.get_context("spawn")
+    tasks, finished = context.Queue(), context.Queue()
+    workers = [context.Process(target=work, args=(tasks, finished, with_coverage))
+               for _ in range(min(processes or multiprocessing.cpu_count(), len(names)))]
+
+    for name in names:
+        tasks.put(name)
+    for worker in workers:
+        tasks.put(None)
+        worker.start()
+
+    results = []
+    while len(results) < len(names):
+        try:
+            result = finished.get(timeout=1.0)
+        except queue.Empty:
+            if not any(worker.is_alive() for worker in workers):
+                break
+            continue
+
+        sys.stdout.write(result["output"])
+        sys.stdout.flush()
+        results.append(result)
+
+    for worker in workers:
+        worker.join()
+
+    crashed = set(names) - set(result["name"] for result in results)
+    results.extend({"name": name, "duration": 0.0, "tests": 0, "failures": 1,
+                    "output": "%s: worker process died\n" % name} for name in sorted(crashed))
+
+    durations.update((result["name"], result["duration"]) for result in results if result["tests"])
+    save_durations(durations)
+
+    return results
+
+def parse_arguments(arguments=None):
+    """Parses the command line arguments.
+
+    Args:
+        arguments (list): Arguments, defaults to sys.argv.
+
+    Returns:
+        argparse.Namespace: Returns the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Number of processes. Default: number of CPUs")
+    parser.add_argument("--pattern", default="*_test.py", help="Pattern of the test modules.")
+    parser.add_argument("--no-coverage", action="store_true", help="Skip the coverage report.")
+
+    return parser.parse_args(arguments)
+
+def main(arguments=None):
+    """Runs the suite and reports the results.
+
+    Args:
+        arguments (list): Arguments, defaults to sys.argv.
+
+    Returns:
+        int: Returns the exit code, 1 if a test failed.
+    """
+    arguments = parse_arguments(arguments)
+    start = time.time()
+
+    results = run_tests(arguments.processes, not arguments.no_coverage, arguments.pattern)
+    tests    = sum(result["tests"] for result in results)
+    failures = sum(result["failures"] for result in results)
+
+    print("Ran %d tests of %d classes in %.3fs: %s" % (
+        tests, len(results), time.time() - start, "FAILED" if failures else "OK"))
+
+    if not arguments.no_coverage:
+        print("Coverage: %.1f%%" % report_coverage())
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
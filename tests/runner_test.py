@@ -0,0 +1,69 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the parallel test runner."""
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests import runner
+
+class RunnerTest(unittest.TestCase):
+    """Executes tests for the parallel test runner."""
+
+    def test_schedule(self):
+        """Test unknown test classes first and the others slowest first."""
+        durations = {"a": 1.0, "b": 5.0, "c": 0.5}
+
+        self.assertEqual(runner.schedule(["a", "b", "c", "d"], durations), ["d", "b", "a", "c"])
+
+    def test_collect_test_classes(self):
+        """Test the suite to be split into its test classes."""
+        names = runner.collect_test_classes("runner_test.py")
+
+        self.assertEqual(names, ["tests.runner_test.RunnerTest"])
+
+    def test_durations(self):
+        """Test the durations to be saved and loaded."""
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "durations.json")
+
+        try:
+            self.assertEqual(runner.load_durations(path), {})
+            runner.save_durations({"a": 1.5}, path)
+            self.assertEqual(runner.load_durations(path), {"a": 1.5})
+        finally:
+            shutil.rmtree(directory)
+
+    def test_run_test_class(self):
+        """Test a test class to be run and its result to be reported."""
+        result = runner.run_test_class("tests.counters_test.ShardedCounterTest")
+
+        self.assertEqual(result["name"], "tests.counters_test.ShardedCounterTest")
+        self.assertTrue(result["tests"] > 0)
+        self.assertEqual(result["failures"], 0)
+        self.assertTrue(result["duration"] > 0)
+
+        result = runner.run_test_class("tests.missing_test.MissingTest")
+        self.assertEqual(result["failures"], 1)
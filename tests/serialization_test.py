@@ -0,0 +1,88 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the serialization submodule."""
+import json
+import unittest
+
+from package import builder
+from package import serialization
+
+TEST_MIMETYPE = "application/x-test"
+
+class SerializationTest(unittest.TestCase):
+    """Executes tests for the response encoders."""
+
+    def tearDown(self):
+        """Removes the test encoder."""
+        serialization.ENCODERS.pop(TEST_MIMETYPE, None)
+        builder.serialization.ENCODERS.pop(TEST_MIMETYPE, None)
+
+    def test_encode_json(self):
+        """Test the encoders to produce the same compact JSON."""
+        data = {"b": [1, 2.5, None], "a": "ä"}
+        expected = json.dumps(
+            data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("UTF-8")
+
+        self.assertEqual(serialization.encode_json(data), expected)
+        self.assertEqual(json.loads(serialization.encode(data).decode("UTF-8")), data)
+
+        if serialization.orjson is not None:
+            self.assertEqual(serialization.encode_orjson(data), expected)
+
+    def test_negotiate(self):
+        """Test JSON to be chosen unless another registered encoder is preferred."""
+        serialization.register_encoder(TEST_MIMETYPE, repr)
+
+        self.assertEqual(serialization.negotiate(None), serialization.JSON)
+        self.assertEqual(serialization.negotiate("*/*"), serialization.JSON)
+        self.assertEqual(serialization.negotiate("text/html"), serialization.JSON)
+        self.assertEqual(serialization.negotiate(TEST_MIMETYPE), TEST_MIMETYPE)
+        self.assertEqual(
+            serialization.negotiate("application/json;q=0.5, %s" % TEST_MIMETYPE), TEST_MIMETYPE)
+
+    def test_sitemap_route(self):
+        """Test the sitemap to be served as JSON or by a plugged in encoder."""
+        # the builder imports the submodules of the package by their plain names
+        builder.serialization.register_encoder(
+            TEST_MIMETYPE, lambda data: repr(data).encode("UTF-8"))
+        client = builder.make_app("serialization_app").test_client()
+
+        response = client.get("/get/sitemap")
+        self.assertEqual(response.mimetype, serialization.JSON)
+        self.assertTrue({"url": "/get/version", "methods": ["GET", "HEAD", "OPTIONS"]}
+                        in response.get_json())
+
+        custom = client.get("/get/sitemap", headers={"Accept": TEST_MIMETYPE})
+        self.assertEqual(custom.mimetype, TEST_MIMETYPE)
+        self.assertTrue(custom.data.startswith(b"[{"))
+        self.assertNotEqual(custom.headers["ETag"], response.headers["ETag"])
+        self.assertTrue("Accept" in custom.headers["Vary"])
+
+    @unittest.skipIf(serialization.msgpack is None, "msgpack is not installed")
+    def test_msgpack(self):
+        """Test MessagePack to be offered, if msgpack is installed."""
+        data = {"methods": ["GET"]}
+        packed = serialization.encode(data, serialization.MSGPACK)
+
+        self.assertEqual(serialization.msgpack.unpackb(packed, raw=False), data)
@@ -0,0 +1,97 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the server submodule."""
+import asyncio
+import socket
+
+from tornado.gen import sleep, with_timeout
+from tornado.iostream import IOStream
+from tornado.testing import AsyncHTTPTestCase, gen_test
+from tornado.web import Application, RequestHandler
+
+from package.server import BoundedHTTPServer
+
+class HelloHandler(RequestHandler):
+    """Says hello."""
+
+    def get(self):
+        """Handles GET requests."""
+        self.write("hello")
+
+    def data_received(self, chunk):
+        """Ignores streamed request bodies."""
+
+class BoundedHTTPServerTest(AsyncHTTPTestCase):
+    """Executes tests for the BoundedHTTPServer."""
+
+    def get_app(self):
+        """Builds the Tornado application."""
+        return Application([(r"/", HelloHandler)])
+
+    def get_http_server(self):
+        """Builds a server accepting a single connection at a time."""
+        return BoundedHTTPServer(self._app, max_connections=1)
+
+    async def request(self, stream):
+        """Sends a keep-alive request on the stream and reads the response."""
+        await stream.write(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        return await stream.read_until(b"hello")
+
+    @gen_test
+    async def test_backpressure(self):
+        """Test a second connection to wait until the first one is closed."""
+        first = IOStream(socket.socket())
+        await first.connect(("127.0.0.1", self.get_http_port()))
+        await self.request(first)
+
+        second = IOStream(socket.socket())
+        await second.connect(("127.0.0.1", self.get_http_port()))
+        pending = asyncio.ensure_future(self.request(second))
+
+        self.assertFalse(self.http_server.accepting)
+        await sleep(0.2)
+        self.assertFalse(pending.done())
+
+        first.close()
+        response = await with_timeout(self.io_loop.time() + 5, pending)
+
+        self.assertTrue(response.endswith(b"hello"))
+        self.assertTrue(self.http_server.accepting is False)
+        second.close()
+
+    @gen_test
+    async def test_stop_while_paused(self):
+        """Test a paused server to close its sockets on stop."""
+        stream = IOStream(socket.socket())
+        await stream.connect(("127.0.0.1", self.get_http_port()))
+        await self.request(stream)
+
+        self.assertFalse(self.http_server.accepting)
+        self.http_server.stop()
+        stream.close()
+        await sleep(0.05)
+
+        self.assertTrue(all(sock.fileno() == -1 for sock in self.http_server.listening))
+        self.assertFalse(self.http_server.accepting)
+        self.assertRaises(ValueError, BoundedHTTPServer, self._app, ssl_options={})
@@ -32,7 +32,7 @@ class ServiceTest(unittest.TestCase):
 
     def setUp(self):
         """Sets up the tests."""
-        self.app    = builder.make_app("test_app")
+        self.app    = builder.get_app("test_app")
         self.app.config["TESTING"] = True
         self.app.config["DEBUG"]   = True
 
@@ -49,7 +49,7 @@ class ServiceTest(unittest.TestCase):
         app = Flask(import_name="test_app")
         sitemap = service.get_sitemap(app)
 
-        self.assertTrue(type(sitemap) == list)
+        self.assertTrue(isinstance(sitemap, list))
 
     def test_get_sitemap_excludes(self):
         """Test the sitemap retrieval with excludes."""
@@ -76,4 +76,28 @@ class ServiceTest(unittest.TestCase):
         response = self.client.get("/sitemap")
         self.assertTrue(len(response.data.decode("UTF-8")) > 0)
 
+    def test_get_sitemap_cached(self):
+        """Test the sitemap to be computed once and invalidated on new rules."""
+        from flask import Flask
+        app = Flask(import_name="test_app")
+
+        body, etag = service.get_sitemap_json(app, ())
+        self.assertTrue(service.get_sitemap_json(app, ())[0] is body)
+
+        @app.route("/new")
+        def new():
+            return ""       # pragma: no cover
+
+        new_body, new_etag = service.get_sitemap_json(app, ())
+        self.assertTrue(b"/new" in new_body)
+        self.assertNotEqual(etag, new_etag)
+
+    def test_get_sitemap_route_etag(self):
+        """Test the /get/sitemap route to honor If-None-Match."""
+        response = self.client.get("/get/sitemap")
+        self.assertEqual(response.mimetype, "application/json")
+        self.assertTrue(b"/get/version" in response.data)
 
+        response = self.client.get(
+            "/get/sitemap", headers={"If-None-Match": response.headers["ETag"]})
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,155 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the singleflight submodule."""
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from package import builder
+from package import service
+from package import singleflight
+
+class SingleFlightTest(unittest.TestCase):
+    """Executes tests for the SingleFlight."""
+
+    def setUp(self):
+        """Creates a slow function counting its calls."""
+        self.calls = []
+        self.flight = singleflight.SingleFlight()
+
+    def slow(self, value):
+        """Returns value after a while."""
+        self.calls.append(value)
+        time.sleep(0.1)
+        return value * 2
+
+    def test_threads(self):
+        """Test concurrent threads to share a single call."""
+        results = []
+
+        def call():
+            """Calls the slow function through the flight."""
+            results.append(self.flight.call("key", self.slow, 21))
+
+        threads = [threading.Thread(target=call) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [42] * 10)
+        self.assertEqual(self.calls, [21])
+        self.assertEqual(self.flight.stats(), {"calls": 1, "coalesced": 9, "timeouts": 0})
+
+        self.assertEqual(self.flight.call("key", self.slow, 1), 2)
+        self.assertEqual(self.calls, [21, 1])
+
+    def test_exception(self):
+        """Test the exception of the call to be raised for every caller."""
+        errors = []
+
+        def fail():
+            """Fails after a while."""
+            time.sleep(0.1)
+            raise ValueError("fail")
+
+        def call():
+            """Calls the failing function through the flight."""
+            try:
+                self.flight.call("key", fail)
+            except ValueError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(errors), 5)
+
+    def test_coroutines(self):
+        """Test concurrent coroutines to share a single call within the executor."""
+        executor = ThreadPoolExecutor(4)
+
+        async def gather():
+            """Awaits many concurrent calls."""
+            return await asyncio.gather(*[
+                self.flight.call_async("key", self.slow, 21, executor=executor)
+                for _ in range(10)])
+
+        try:
+            self.assertEqual(asyncio.run(gather()), [42] * 10)
+        finally:
+            executor.shutdown()
+
+        self.assertEqual(self.calls, [21])
+        self.assertEqual(self.flight.stats(), {"calls": 1, "coalesced": 9, "timeouts": 0})
+
+    def test_coalesced(self):
+        """Test the decorator to coalesce calls with equal arguments only."""
+        @singleflight.coalesced()
+        def double(value):
+            """Doubles value after a while."""
+            return self.slow(value)
+
+        threads = [threading.Thread(target=double, args=(value % 2,)) for value in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(self.calls), [0, 1])
+        self.assertEqual(asyncio.run(double.call_async(None, 5)), 10)
+
+    def test_timeout(self):
+        """Test waiting threads to call the function themselves after the timeout."""
+        flight = singleflight.SingleFlight(timeout=0.01)
+        release = threading.Event()
+
+        def hang():
+            """Blocks until released."""
+            release.wait(5)
+            return "leader"
+
+        leader = threading.Thread(target=flight.call, args=("key", hang))
+        leader.start()
+        time.sleep(0.05)
+
+        self.assertEqual(flight.call("key", lambda: "follower"), "follower")
+        release.set()
+        leader.join()
+
+        self.assertEqual(flight.stats(), {"calls": 1, "coalesced": 0, "timeouts": 1})
+
+    def test_sitemap_build(self):
+        """Test cold sitemaps to be built through the flight and warm ones to be cached."""
+        app = builder.make_app("test_app")
+        builds = service.sitemap_flight.stats()["calls"]
+
+        sitemap = service.get_sitemap(app)
+        self.assertEqual(service.get_sitemap(app), sitemap)
+        self.assertEqual(service.sitemap_flight.stats()["calls"], builds + 1)
@@ -0,0 +1,123 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the streaming submodule."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, Response
+from tornado.log import app_log
+from tornado.simple_httpclient import HTTPStreamClosedError
+from tornado.testing import AsyncHTTPTestCase, ExpectLog, gen_test
+
+from package.streaming import StreamingWSGIContainer
+
+class StreamingWSGIContainerTest(AsyncHTTPTestCase):
+    """Executes tests for the streaming production mode."""
+
+    def get_app(self):
+        """Builds an application with a streamed route."""
+        app = Flask("streaming_app")
+        self.closed = []
+
+        @app.route("/stream")
+        def stream():
+            """Yields a chunk every 0.1 seconds."""
+            def generate():
+                """Generates the chunks."""
+                try:
+                    for index in range(5):
+                        yield ("chunk %d\n" % index).encode("UTF-8")
+                        time.sleep(0.1)
+                finally:
+                    self.closed.append(True)
+
+            return Response(generate(), mimetype="text/plain")
+
+        @app.route("/failing/<int:chunks>")
+        def failing(chunks):
+            """Yields the given number of chunks and raises."""
+            def generate():
+                """Generates the chunks."""
+                try:
+                    for index in range(chunks):
+                        yield ("chunk %d\n" % index).encode("UTF-8")
+                    raise ValueError("failing")
+                finally:
+                    self.closed.append(True)
+
+            return Response(generate(), mimetype="text/plain")
+
+        @app.route("/buffered")
+        def buffered():
+            """Returns a buffered response."""
+            return "static"
+
+        return StreamingWSGIContainer(app, executor=ThreadPoolExecutor(2))
+
+    @gen_test
+    def test_stream(self):
+        """Test the chunks to arrive as soon as they are yielded."""
+        start = time.time()
+        arrivals = []
+
+        response = yield self.http_client.fetch(
+            self.get_url("/stream"),
+            streaming_callback=lambda chunk: arrivals.append(time.time() - start))
+
+        self.assertEqual(response.code, 200)
+        self.assertEqual(response.headers["Transfer-Encoding"], "chunked")
+        self.assertTrue(arrivals[0] < 0.3)
+        self.assertTrue(arrivals[-1] > 0.3)
+        self.assertEqual(self.closed, [True])
+
+    def test_stream_body(self):
+        """Test the streamed body to be complete."""
+        response = self.fetch("/stream")
+
+        self.assertEqual(response.body, b"".join(b"chunk %d\n" % index for index in range(5)))
+
+    def test_buffered(self):
+        """Test single chunk responses to keep their Content-Length."""
+        response = self.fetch("/buffered")
+
+        self.assertEqual(response.body, b"static")
+        self.assertEqual(response.headers["Content-Length"], "6")
+        self.assertFalse("Transfer-Encoding" in response.headers)
+
+    def test_failing_stream(self):
+        """Test the connection to be closed, if the application fails mid-stream."""
+        with ExpectLog(app_log, "Uncaught exception"):
+            self.assertRaises(HTTPStreamClosedError, self.fetch, "/failing/2")
+
+        self.assertEqual(self.closed, [True])
+
+        self.assertEqual(self.fetch("/buffered").body, b"static")
+
+    def test_failing_before_headers(self):
+        """Test a 500 response, if the application fails before the headers were sent."""
+        with ExpectLog(app_log, "Uncaught exception"):
+            response = self.fetch("/failing/0")
+
+        self.assertEqual(response.code, 500)
+        self.assertEqual(self.closed, [True])
@@ -0,0 +1,130 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the version submodule."""
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+import zlib
+
+from package import version
+
+COMMIT_HASH = "0123456789abcdef0123456789abcdef01234567"
+
+class VersionTest(unittest.TestCase):
+    """Executes tests for the version metadata."""
+
+    def setUp(self):
+        """Sets up a fake git checkout."""
+        self.directory = tempfile.mkdtemp()
+        self.git_dir   = os.path.join(self.directory, ".git")
+
+        os.makedirs(os.path.join(self.git_dir, "refs", "heads"))
+        self.write(".git/HEAD", "ref: refs/heads/master\n")
+
+        version.clear_cache()
+
+    def tearDown(self):
+        """Removes the fake git checkout."""
+        shutil.rmtree(self.directory)
+        version.clear_cache()
+
+    def write(self, relative_path, content, mode="w"):
+        """Writes a file into the fake git checkout."""
+        path = os.path.join(self.directory, relative_path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        with open(path, mode) as outfile:
+            outfile.write(content)
+
+    def write_commit(self, timestamp):
+        """Writes a loose commit object for COMMIT_HASH."""
+        body = ("tree 4b825dc642cb6eb9a060e54bf8d69288fbee4904\n"
+                "author A <a@b.c> %d +0000\n"
+                "committer A <a@b.c> %d +0000\n\nmessage\n" % (timestamp, timestamp)).encode()
+        data = b"commit " + str(len(body)).encode() + b"\0" + body
+
+        self.write(".git/objects/%s/%s" % (COMMIT_HASH[:2], COMMIT_HASH[2:]),
+                   zlib.compress(data), "wb")
+
+    def test_loose_ref(self):
+        """Test resolving a loose branch reference."""
+        self.write(".git/refs/heads/master", COMMIT_HASH + "\n")
+        self.write_commit(0)
+
+        info = version.read_version_info(self.directory)
+
+        self.assertEqual(info["branch"], "master")
+        self.assertEqual(info["hash"], COMMIT_HASH[:7])
+        self.assertNotEqual(info["date"], version.UNKNOWN)
+
+    def test_packed_ref(self):
+        """Test resolving a branch from packed-refs."""
+        self.write(".git/packed-refs",
+                   "# pack-refs with: peeled fully-peeled sorted\n"
+                   "%s refs/heads/master\n" % COMMIT_HASH)
+
+        info = version.read_version_info(self.directory)
+
+        self.assertEqual(info["hash"], COMMIT_HASH[:7])
+        self.assertEqual(info["date"], version.UNKNOWN)
+
+    def test_detached_head(self):
+        """Test reading a detached HEAD."""
+        self.write(".git/HEAD", COMMIT_HASH + "\n")
+
+        info = version.read_version_info(self.directory)
+
+        self.assertEqual(info["branch"], "HEAD")
+        self.assertEqual(info["hash"], COMMIT_HASH[:7])
+
+    def test_no_checkout(self):
+        """Test the fallback without a git checkout."""
+        shutil.rmtree(self.git_dir)
+
+        info = version.read_version_info(self.directory)
+
+        self.assertEqual(info["hash"], version.UNKNOWN)
+
+    def test_caching(self):
+        """Test the metadata to be resolved only once."""
+        self.write(".git/refs/heads/master", COMMIT_HASH + "\n")
+        info = version.get_version_info(self.directory)
+
+        self.write(".git/HEAD", "ref: refs/heads/other\n")
+
+        self.assertTrue(version.get_version_info(self.directory) is info)
+
+    def test_matches_git(self):
+        """Test the metadata of this checkout to match git."""
+        directory = os.path.dirname(os.path.abspath(__file__))
+        try:
+            expected = subprocess.check_output(
+                ["git", "rev-parse", "--short=7", "HEAD"], cwd=directory).decode().strip()
+        except (OSError, subprocess.CalledProcessError):   # pragma: no cover
+            self.skipTest("git is not available")           # pragma: no cover
+
+        self.assertEqual(version.read_version_info(directory)["hash"], expected)
@@ -0,0 +1,125 @@
+# !/usr/bin/env python
+#  -*- coding: UTF-8 -*-
+
+# Copyright (c) 2016-2017 Christian Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Tests the warmup submodule."""
+import json
+import unittest
+
+from flask import Flask
+
+from package import builder
+from package.warmup import WarmUp
+
+class WarmUpTest(unittest.TestCase):
+    """Executes tests for the WarmUp."""
+
+    def setUp(self):
+        """Creates an application with routes to be warmed up and to be skipped."""
+        self.app = Flask("warmup_app")
+        self.calls = []
+
+        @self.app.route("/cold")
+        def cold():
+            """A route without arguments."""
+            self.calls.append("cold")
+            return "cold"
+
+        @self.app.route("/broken")
+        def broken():
+            """A failing route."""
+            raise ValueError("broken")
+
+        @self.app.route("/item/<name>")
+        def item(name):
+            """A route with arguments."""
+            self.calls.append(name)
+            return name
+
+        @self.app.route("/post", methods=["POST"])
+        def post():
+            """A route without GET."""
+            self.calls.append("post")
+            return "post"
+
+        @self.app.route("/admin/profile")
+        def profile():
+            """An excluded route."""
+            self.calls.append("profile")
+            return "profile"
+
+    def test_routes(self):
+        """Test GET routes without arguments to be requested only."""
+        self.assertEqual(WarmUp().get_routes(self.app), ["/broken", "/cold"])
+
+    def test_run(self):
+        """Test the routes to be requested and the application to be ready afterwards."""
+        warmup = WarmUp()
+        self.assertFalse(warmup.ready)
+
+        results = warmup.run(self.app, requests=2)
+
+        self.assertTrue(warmup.ready)
+        self.assertEqual(self.calls, ["cold", "cold"])
+        self.assertEqual(results["/cold"]["status"], 200)
+        self.assertEqual(results["/broken"]["status"], 500)
+        self.assertEqual(warmup.stats()["routes"], results)
+
+    def test_skip(self):
+        """Test the application to be ready without requests."""
+        warmup = WarmUp()
+        warmup.run(self.app, requests=0)
+
+        self.assertTrue(warmup.ready)
+        self.assertEqual(self.calls, [])
+
+class ReadyRouteTest(unittest.TestCase):
+    """Executes tests for the /get/ready route."""
+
+    def test_ready(self):
+        """Test the application to report ready only once it is warmed up."""
+        app = builder.make_app("test_app")
+        client = app.test_client()
+
+        response = client.get("/get/ready")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
+        self.assertTrue(response.cache_control.no_store)
+
+        results = app.extensions["warmup"].run(app)
+        self.assertEqual(results["/get/version"]["status"], 200)
+        self.assertFalse("/get/ready" in results)
+
+        response = client.get("/get/ready")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(json.loads(response.get_data(as_text=True))["ready"])
+
+    def test_unrecorded(self):
+        """Test the warm-up requests to bypass the metrics and the admission control."""
+        app = builder.make_app("test_app")
+        app.extensions["warmup"].run(app, requests=3)
+
+        self.assertEqual(app.extensions["metrics"].latencies.values(), {})
+        self.assertEqual(app.extensions["admission"].stats(), {})
+
+        app.test_client().get("/get/sitemap")
+        self.assertEqual(list(app.extensions["admission"].stats()), ["/get/sitemap"])